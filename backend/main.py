@@ -1,17 +1,159 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, FileResponse, PlainTextResponse
+from starlette.websockets import WebSocketState
 import paramiko
 import asyncio
 import json
-import threading
-import queue
-import time
+import codecs
+import struct
 import os
+import time
+import socket
+import hashlib
+import hmac
+import secrets
+import threading
+import functools
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
 import stat
+import posixpath
+import shlex
+import tarfile
+import uuid
+from collections import deque, OrderedDict
 from typing import List, Dict, Optional
 from pathlib import Path
 import io
+import gzip
+import pickle
+import subprocess
+import fcntl
+import sys
+import re
+import zlib
+import urllib.parse
+import base64
+import tempfile
+import logging
+import bisect
+import ctypes
+import ctypes.util
+from array import array
+
+# 로그 설정 - LOG_LEVEL: DEBUG/INFO/WARNING/ERROR
+# LOG_FORMAT: text ("시각 레벨 메시지 key=value ...") 또는 json (한 줄에 JSON 객체 하나)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+
+logger = logging.getLogger("term")
+
+class StructuredFormatter(logging.Formatter):
+    """log()로 넘긴 필드를 메시지 뒤에 key=value(text) 또는 JSON 필드로 붙임"""
+    def format(self, record):
+        fields = getattr(record, "fields", {})
+        if LOG_FORMAT == "json":
+            return json.dumps({
+                "time": self.formatTime(record),
+                "level": record.levelname,
+                "message": record.getMessage(),
+                **fields
+            }, ensure_ascii=False, default=str)
+        line = f"{self.formatTime(record)} {record.levelname} {record.getMessage()}"
+        for key, value in fields.items():
+            value = str(value)
+            # 공백/따옴표가 있는 값은 따옴표로 감싸 logfmt처럼 나눌 수 있게 함
+            if not value or " " in value or '"' in value:
+                value = json.dumps(value, ensure_ascii=False)
+            line += f" {key}={value}"
+        return line
+
+def setup_logging():
+    handler = logging.StreamHandler()
+    handler.setFormatter(StructuredFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+setup_logging()
+
+def log(level, message, **fields):
+    """구조화 로그 - 레벨이 꺼져 있으면 포맷/기록 없이 바로 반환"""
+    if logger.isEnabledFor(level):
+        logger.log(level, message, extra={"fields": fields})
+
+# 메트릭 (/metrics, Prometheus 텍스트 형식)
+METRICS_LOOP_LAG_INTERVAL = float(os.environ.get("METRICS_LOOP_LAG_INTERVAL", "0.5"))  # 이벤트 루프 지연 측정 주기 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def metric_labels(names, values):
+    """라벨 문자열 {name="value",...} - 세션 ID 등 임의 문자열은 이스케이프"""
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+class Counter:
+    """누적 카운터 - 라벨 값 조합별 (워커 스레드에서도 증가시키므로 잠금 사용)"""
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, amount=1, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+    
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in self._values.items():
+                lines.append(f"{self.name}{metric_labels(self.labels, label_values)} {value}")
+        return lines
+
+class Histogram:
+    """누적 버킷 히스토그램 - 라벨 값 조합별"""
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # 라벨 값 → [버킷별 개수..., +Inf 개수], 합계
+        self._lock = threading.Lock()
+    
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+    
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total) in self._series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{self.name}_bucket{metric_labels(self.labels + ('le',), label_values + (le,))} {cumulative}")
+                lines.append(f"{self.name}_sum{metric_labels(self.labels, label_values)} {total}")
+                lines.append(f"{self.name}_count{metric_labels(self.labels, label_values)} {cumulative}")
+        return lines
+
+SSH_CONNECT_SECONDS = Histogram("term_ssh_connect_phase_seconds", "SSH 연결 단계별 소요 시간 (tcp, kex, auth)", ("phase",))
+SSH_CONNECT_FAILURES = Counter("term_ssh_connect_failures_total", "실패한 SSH 연결 (실패 단계별)", ("phase",))
+SFTP_OPERATION_SECONDS = Histogram("term_sftp_operation_seconds", "SFTP 작업 소요 시간 (세션 잠금 대기 포함)", ("operation",))
+SFTP_TRANSFER_BYTES = Counter("term_sftp_transfer_bytes_total", "SFTP로 전송한 바이트 (upload, download, view, job_upload, job_download, delta_upload, delta_read)", ("direction",))
+RESIZE_REQUESTS = Counter("term_resize_requests_total", "터미널 크기 조정 요청 (applied: 원격에 적용, coalesced: 다음 요청으로 대체, unchanged: 같은 크기)", ("result",))
+EXEC_RESULTS = Counter("term_exec_results_total", "다중 호스트 명령 실행 결과 (ok, failed, error, timeout)", ("result",))
+SESSION_EVICTIONS = Counter("term_session_evictions_total", "세션 점검에서 정리한 세션 (종류, 이유별)", ("kind", "reason"))
+EVENT_LOOP_LAG_SECONDS = Histogram("term_event_loop_lag_seconds", "이벤트 루프 지연 (예약한 시각보다 늦게 깨어난 시간)")
+event_loop_lag = 0.0  # 마지막으로 측정한 지연
 
 app = FastAPI()
 
@@ -24,20 +166,849 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 바이너리 프레임 프로토콜 - 첫 1바이트가 opcode, 나머지가 페이로드
+# connect 요청/응답만 JSON 텍스트 프레임으로 유지
+OP_DATA = 0x00        # 터미널 입출력 원본 바이트
+OP_RESIZE = 0x01      # 클라이언트→서버: !HH (cols, rows) / 서버→클라이언트: !BHH (success, cols, rows)
+OP_DISCONNECT = 0x02  # 클라이언트→서버: 세션 종료 요청
+OP_DATA_DEFLATE = 0x03  # 서버→클라이언트: !I (원본 크기) + raw deflate (세션 단위 스트림, 프레임마다 sync flush)
+
+def decode_binary_frame(frame: bytes) -> Optional[dict]:
+    """바이너리 프레임을 JSON 메시지와 같은 형태의 dict로 변환"""
+    if not frame:
+        return None
+    opcode, payload = frame[0], frame[1:]
+    if opcode == OP_DATA:
+        return {"type": "command", "data": payload}
+    if opcode == OP_RESIZE and len(payload) >= 4:
+        cols, rows = struct.unpack('!HH', payload[:4])
+        return {"type": "resize", "cols": cols, "rows": rows}
+    if opcode == OP_DISCONNECT:
+        return {"type": "disconnect"}
+    return None
+
+# 출력 압축 설정 - connect/attach 시 "compression": "deflate"로 요청 (바이너리 프로토콜 전용)
+COMPRESS_LEVEL = int(os.environ.get("COMPRESS_LEVEL", "3"))
+COMPRESS_WINDOW_BITS = int(os.environ.get("COMPRESS_WINDOW_BITS", "15"))  # 브라우저 DecompressionStream은 최대 15
+COMPRESS_MEM_LEVEL = 8
+COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", "64"))  # 이보다 작은 프레임(키 입력 에코 등)은 압축 생략
+
+class OutputCompressor:
+    """세션 단위 deflate 스트림
+    
+    프레임마다 새로 압축하지 않고 하나의 압축 컨텍스트를 이어 쓰므로
+    반복되는 ANSI 시퀀스/화면 갱신/로그 줄이 이전 프레임을 참조해 작게 압축됨.
+    프레임마다 Z_SYNC_FLUSH로 끝내므로 클라이언트는 받은 즉시 풀 수 있음.
+    """
+    def __init__(self, level=COMPRESS_LEVEL, window_bits=COMPRESS_WINDOW_BITS, min_size=COMPRESS_MIN_SIZE):
+        self.min_size = min_size
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, -window_bits, COMPRESS_MEM_LEVEL)
+        
+        # 통계
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.frames_compressed = 0
+        self.frames_skipped = 0
+        self.cpu_seconds = 0.0
+    
+    def encode(self, data):
+        """출력 바이트 → 전송할 바이너리 프레임"""
+        if len(data) < self.min_size:
+            self.frames_skipped += 1
+            self.bytes_in += len(data)
+            self.bytes_out += len(data)
+            return bytes([OP_DATA]) + data
+        start = time.thread_time()
+        body = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        self.cpu_seconds += time.thread_time() - start
+        self.frames_compressed += 1
+        self.bytes_in += len(data)
+        self.bytes_out += len(body)
+        return struct.pack('!BI', OP_DATA_DEFLATE, len(data)) + body
+    
+    def stats(self):
+        return {
+            "compression": "deflate",
+            "compressed_frames": self.frames_compressed,
+            "uncompressed_frames": self.frames_skipped,
+            "raw_bytes": self.bytes_in,
+            "sent_bytes": self.bytes_out,
+            "ratio": round(self.bytes_in / self.bytes_out, 2) if self.bytes_out else None,
+            "cpu_ms": round(self.cpu_seconds * 1000, 2),
+            "cpu_us_per_kb": round(self.cpu_seconds * 1e6 / (self.bytes_in / 1024), 2) if self.bytes_in else None,
+        }
+
+# SSH 연결 설정 - 연결/키 교환/인증은 블로킹이므로 전용 워커 풀에서 실행
+SSH_CONNECT_WORKERS = int(os.environ.get("SSH_CONNECT_WORKERS", "16"))  # 동시 연결 시도 상한
+SSH_TCP_TIMEOUT = float(os.environ.get("SSH_TCP_TIMEOUT", "10"))        # TCP 연결 타임아웃 (초)
+SSH_KEX_TIMEOUT = float(os.environ.get("SSH_KEX_TIMEOUT", "15"))        # 배너 + 키 교환 타임아웃 (초)
+SSH_AUTH_TIMEOUT = float(os.environ.get("SSH_AUTH_TIMEOUT", "15"))      # 인증 타임아웃 (초)
+
+connect_executor = ThreadPoolExecutor(max_workers=SSH_CONNECT_WORKERS, thread_name_prefix="ssh-connect")
+
+class SSHConnectError(Exception):
+    """SSH 연결 실패 - 실패한 단계(tcp, kex, auth)를 함께 기록"""
+    def __init__(self, phase, error):
+        super().__init__(f"{phase}: {error}")
+        self.phase = phase
+        self.error = error
+
+class TimedSSHClient(paramiko.SSHClient):
+    """키 교환이 끝나고 인증을 시작한 시각을 기록하는 SSHClient (단계별 연결 시간 측정용)"""
+    auth_started = None
+    
+    def _auth(self, *args, **kwargs):
+        self.auth_started = time.perf_counter()
+        return super()._auth(*args, **kwargs)
+
+def open_ssh_client(hostname, username, password, port=22, on_socket=None):
+    """단계별 타임아웃을 적용해 인증된 SSHClient 생성 (블로킹 - connect_executor에서 호출)
+    
+    on_socket: TCP 소켓이 만들어지면 호출 - 연결 도중 취소할 때 소켓을 닫을 수 있도록 전달
+    """
+    started = time.perf_counter()
+    try:
+        sock = socket.create_connection((hostname, port), timeout=SSH_TCP_TIMEOUT)
+    except Exception as e:
+        SSH_CONNECT_FAILURES.inc(1, "tcp")
+        raise SSHConnectError("tcp", e)
+    connected = time.perf_counter()
+    SSH_CONNECT_SECONDS.observe(connected - started, "tcp")
+    if on_socket:
+        on_socket(sock)
+    
+    client = TimedSSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    try:
+        # timeout은 sock 지정 시 키 교환(start_client) 타임아웃으로만 사용됨
+        client.connect(
+            hostname, port=port, username=username, password=password, sock=sock,
+            timeout=SSH_KEX_TIMEOUT, banner_timeout=SSH_KEX_TIMEOUT, auth_timeout=SSH_AUTH_TIMEOUT
+        )
+    except Exception as e:
+        # 키 교환이 끝나면 transport.host_key가 채워지므로 이후 실패는 인증 단계
+        transport = client.get_transport()
+        kex_done = transport is not None and transport.host_key is not None
+        client.close()
+        sock.close()
+        phase = "auth" if isinstance(e, paramiko.AuthenticationException) or kex_done else "kex"
+        SSH_CONNECT_FAILURES.inc(1, phase)
+        raise SSHConnectError(phase, e)
+    finished = time.perf_counter()
+    auth_started = client.auth_started or finished
+    SSH_CONNECT_SECONDS.observe(auth_started - connected, "kex")
+    SSH_CONNECT_SECONDS.observe(finished - auth_started, "auth")
+    return client
+
+# 트랜스포트 풀 설정 - 같은 호스트/계정의 탭과 SFTP는 인증된 연결 하나를 공유
+SSH_POOL_MAX_CHANNELS = int(os.environ.get("SSH_POOL_MAX_CHANNELS", "8"))    # 트랜스포트당 채널 상한 (sshd MaxSessions 기본값 10)
+SSH_POOL_IDLE_TIMEOUT = float(os.environ.get("SSH_POOL_IDLE_TIMEOUT", "60"))  # 사용하지 않는 연결 유지 시간 (초)
+SSH_KEEPALIVE_INTERVAL = int(os.environ.get("SSH_KEEPALIVE_INTERVAL", "30"))  # keepalive 전송 간격 (초)
+
+class PooledConnection:
+    """풀에 보관된 인증된 SSHClient 하나와 그 위에서 사용 중인 채널 수"""
+    def __init__(self, key, client):
+        self.key = key
+        self.client = client
+        self.refs = 0
+        self.last_used = time.monotonic()
+    
+    @property
+    def active(self):
+        transport = self.client.get_transport()
+        return transport is not None and transport.is_active()
+
+class ChannelLimitError(paramiko.SSHException):
+    """연결의 채널 수가 SSH_POOL_MAX_CHANNELS에 도달했고 같은 호스트/계정의 여유 있는 연결도 없음"""
+
+class TransportPool:
+    """(host, port, user, 인증정보 지문) 별로 인증된 SSH 연결을 재사용하는 풀
+    
+    새 터미널은 기존 Transport 위에 채널만 새로 열고, SFTP는 서브시스템 채널로 붙음.
+    참조 카운트가 0이 된 연결은 SSH_POOL_IDLE_TIMEOUT 이후 evict_idle()에서 닫힘.
+    """
+    def __init__(self, max_channels=SSH_POOL_MAX_CHANNELS, idle_timeout=SSH_POOL_IDLE_TIMEOUT):
+        self.max_channels = max_channels
+        self.idle_timeout = idle_timeout
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        # 비밀번호 지문은 프로세스별 임의 키로 HMAC 처리하여 평문/단순 해시를 메모리에 남기지 않음
+        self._secret = os.urandom(32)
+    
+    def make_key(self, hostname, port, username, password):
+        fingerprint = hmac.new(self._secret, password.encode(), hashlib.sha256).hexdigest()
+        return (hostname, int(port), username, fingerprint)
+    
+    def _take(self, key):
+        """채널 여유가 있는 살아 있는 연결을 찾아 참조 증가 (self._lock 보유 상태에서 호출)"""
+        entries = self._entries.get(key, [])
+        for conn in list(entries):
+            if not conn.active:
+                entries.remove(conn)
+                conn.client.close()
+                continue
+            if conn.refs < self.max_channels:
+                conn.refs += 1
+                conn.last_used = time.monotonic()
+                return conn
+        return None
+    
+    def acquire(self, hostname, username, password, port=22, on_socket=None):
+        """연결 하나를 빌려옴 (블로킹 - connect_executor에서 호출)"""
+        key = self.make_key(hostname, port, username, password)
+        with self._lock:
+            conn = self._take(key)
+            if conn:
+                return conn
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        
+        # 같은 키로 동시에 들어온 요청은 첫 핸드셰이크가 끝날 때까지 기다렸다가 재사용
+        with key_lock:
+            with self._lock:
+                conn = self._take(key)
+                if conn:
+                    return conn
+            client = open_ssh_client(hostname, username, password, port, on_socket=on_socket)
+            client.get_transport().set_keepalive(SSH_KEEPALIVE_INTERVAL)
+            conn = PooledConnection(key, client)
+            conn.refs = 1
+            with self._lock:
+                self._entries.setdefault(key, []).append(conn)
+            return conn
+    
+    def retain(self, conn):
+        """이미 빌린 연결 위에 채널을 하나 더 여는 경우 참조 증가
+        
+        conn이 채널 상한에 도달했으면 같은 키의 여유 있는 연결을 대신 빌려주고, 그것도 없으면 ChannelLimitError.
+        호출한 쪽은 반환된 연결의 client로 채널을 열고 그 연결을 release해야 함
+        (평문 비밀번호를 보관하지 않으므로 여기서 새 연결을 열 수는 없음)
+        """
+        with self._lock:
+            if conn.refs < self.max_channels:
+                conn.refs += 1
+                conn.last_used = time.monotonic()
+                return conn
+            other = self._take(conn.key)
+        if other is None:
+            raise ChannelLimitError(f"연결당 채널 상한({self.max_channels})에 도달했습니다")
+        return other
+    
+    def spare(self, conn):
+        """conn과 같은 호스트/계정의 살아 있는 연결들에 더 열 수 있는 채널 수"""
+        with self._lock:
+            return sum(max(0, self.max_channels - other.refs) for other in self._entries.get(conn.key, []) if other.active)
+    
+    def release(self, conn):
+        with self._lock:
+            conn.refs = max(0, conn.refs - 1)
+            conn.last_used = time.monotonic()
+            if conn.refs == 0 and not conn.active:
+                self._discard(conn)
+    
+    def _discard(self, conn):
+        entries = self._entries.get(conn.key, [])
+        if conn in entries:
+            entries.remove(conn)
+        if not entries:
+            self._entries.pop(conn.key, None)
+            self._key_locks.pop(conn.key, None)
+        conn.client.close()
+    
+    def evict_idle(self):
+        """참조가 없고 유휴 시간이 지난 연결, 끊어진 연결 정리"""
+        now = time.monotonic()
+        with self._lock:
+            for entries in list(self._entries.values()):
+                for conn in list(entries):
+                    if conn.refs == 0 and (now - conn.last_used >= self.idle_timeout or not conn.active):
+                        self._discard(conn)
+    
+    def stats(self):
+        with self._lock:
+            return [
+                {
+                    "host": key[0], "port": key[1], "username": key[2],
+                    "connections": len(entries),
+                    "channels": [conn.refs for conn in entries],
+                }
+                for key, entries in self._entries.items()
+            ]
+
+transport_pool = TransportPool()
+
+# SFTP 파일 I/O 설정 - paramiko SFTP 호출은 블로킹이므로 전용 워커 풀에서 실행
+SFTP_WORKERS = int(os.environ.get("SFTP_WORKERS", "32"))
+SFTP_DOWNLOAD_WINDOW = 2 * 1024 * 1024  # 다운로드 시 한 번에 파이프라인으로 요청하는 크기 (전송당 최대 2개 윈도우만 메모리에 보관)
+
+SFTP_UPLOAD_CHUNK = 1024 * 1024        # 업로드 시 한 번에 SFTP로 넘기는 크기
+FILE_VIEW_MAX_BYTES = int(os.environ.get("FILE_VIEW_MAX_BYTES", str(1024 * 1024)))  # 파일 보기/따라가기에서 한 번에 읽는 최대 크기
+FILE_VIEW_BLOCK = 64 * 1024            # 줄 단위로 읽을 때 한 번에 읽는 블록 크기
+FILE_FOLLOW_INTERVAL = float(os.environ.get("FILE_FOLLOW_INTERVAL", "1.0"))  # 따라가기 모드에서 파일 크기를 확인하는 주기 (초)
+FILE_FOLLOW_CHUNK = 256 * 1024         # 따라가기 모드의 WebSocket 메시지 하나에 담는 최대 크기 (일반적인 클라이언트 한도 1MB 이하)
+
+sftp_executor = ThreadPoolExecutor(max_workers=SFTP_WORKERS, thread_name_prefix="sftp-io")
+
+class TransferProgress:
+    """업로드 진행 상황 - SSE 엔드포인트에서 조회"""
+    def __init__(self, transfer_id, filename, total=None, offset=0):
+        self.transfer_id = transfer_id
+        self.filename = filename
+        self.total = total
+        self.offset = offset
+        self.transferred = 0
+        self.started = time.monotonic()
+        self.finished = None
+        self.done = False
+        self.error = None
+    
+    def finish(self, error=None):
+        self.done = True
+        self.error = error
+        self.finished = time.monotonic()
+    
+    def snapshot(self):
+        elapsed = (self.finished or time.monotonic()) - self.started
+        return {
+            "id": self.transfer_id,
+            "filename": self.filename,
+            "total": self.total,
+            "offset": self.offset,
+            "transferred": self.transferred,
+            "position": self.offset + self.transferred,
+            "bytes_per_sec": round(self.transferred / elapsed) if elapsed > 0 else 0,
+            "done": self.done,
+            "error": self.error,
+        }
+
+# 업로드 ID → 진행 상황 (완료 후 TRANSFER_PROGRESS_TTL 초 동안 유지)
+transfer_progress: Dict[str, TransferProgress] = {}
+TRANSFER_PROGRESS_TTL = 300
+
+def track_transfer(transfer_id, filename, total=None, offset=0):
+    now = time.monotonic()
+    for key, progress in list(transfer_progress.items()):
+        if progress.done and now - progress.finished > TRANSFER_PROGRESS_TTL:
+            del transfer_progress[key]
+    progress = TransferProgress(transfer_id, filename, total, offset)
+    if transfer_id:
+        transfer_progress[transfer_id] = progress
+    return progress
+
+def parse_range_header(range_header, file_size):
+    """단일 `bytes=start-end` Range 헤더를 (start, end) 포함 범위로 변환
+    
+    형식이 잘못되었거나 다중 범위면 None (Range 무시 후 전체 전송)
+    start가 파일 크기 이상이면 그대로 반환하므로 호출 측에서 416 처리
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first == "":
+            # bytes=-N : 마지막 N바이트
+            suffix = int(last)
+            if suffix <= 0:
+                return None
+            return max(0, file_size - suffix), file_size - 1
+        start = int(first)
+        end = int(last) if last else file_size - 1
+    except ValueError:
+        return None
+    if last and end < start:
+        return None
+    return start, min(end, file_size - 1)
+
+# 원격 디렉토리 목록 캐시 설정
+LISTING_CACHE_TTL = float(os.environ.get("LISTING_CACHE_TTL", "15"))  # 캐시 유효 시간 (초)
+LISTING_CACHE_SIZE = int(os.environ.get("LISTING_CACHE_SIZE", "64"))  # 세션당 보관하는 디렉토리 수 (LRU)
+LISTING_PAGE_SIZE = 1000      # 기본 페이지 크기
+LISTING_PAGE_MAX = 10000      # 한 페이지 최대 항목 수
+LISTING_VIEWS_MAX = 8         # 디렉토리당 보관하는 정렬/필터 결과 수
+LISTING_SORT_KEYS = {
+    "name": lambda f: f['name'].lower(),
+    "size": lambda f: f['size'],
+    "modified": lambda f: f['modified'],
+    "type": lambda f: (f['type'], posixpath.splitext(f['name'])[1].lower(), f['name'].lower()),
+}
+
+def file_entry(file_attr):
+    """SFTPAttributes → 목록 항목"""
+    return {
+        'name': file_attr.filename,
+        'type': 'directory' if stat.S_ISDIR(file_attr.st_mode) else 'file',
+        'size': file_attr.st_size if file_attr.st_size else 0,
+        'modified': file_attr.st_mtime if file_attr.st_mtime else 0,
+        'permissions': oct(file_attr.st_mode)[-3:] if file_attr.st_mode else '000'
+    }
+
+def filter_entries(files, query=None, kind=None, hidden=False):
+    """이름 부분 일치(대소문자 무시), 종류, 숨김 파일 필터"""
+    query = query.lower() if query else None
+    return [
+        f for f in files
+        if (hidden or not f['name'].startswith('.') or f['name'] == '..')
+        and (not kind or f['type'] == kind)
+        and (not query or query in f['name'].lower())
+    ]
+
+class ListingCache:
+    """세션별 원격 디렉토리 목록 캐시 (TTL + LRU)
+    
+    디렉토리마다 원본 목록과 정렬/필터 결과(view)를 보관하므로
+    같은 조건으로 다음 페이지를 요청하면 다시 정렬하지 않음.
+    """
+    def __init__(self, ttl=LISTING_CACHE_TTL, max_entries=LISTING_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # path → (loaded_at, files, views)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, path):
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                self.entries.pop(path, None)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(path)
+            self.hits += 1
+            return entry
+    
+    def put(self, path, files):
+        entry = (time.monotonic(), files, OrderedDict())
+        with self.lock:
+            self.entries[path] = entry
+            self.entries.move_to_end(path)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry
+    
+    def view(self, entry, sort, order, query, kind, hidden):
+        """정렬/필터 결과 - 같은 조건이면 재사용"""
+        _, files, views = entry
+        key = (sort, order, query, kind, hidden)
+        with self.lock:
+            result = views.get(key)
+            if result is not None:
+                views.move_to_end(key)
+                return result
+        result = filter_entries(files, query, kind, hidden)
+        if sort in LISTING_SORT_KEYS:
+            result.sort(key=LISTING_SORT_KEYS[sort], reverse=(order == "desc"))
+            # 디렉토리는 항상 먼저
+            result.sort(key=lambda f: f['type'] != 'directory')
+        with self.lock:
+            views[key] = result
+            while len(views) > LISTING_VIEWS_MAX:
+                views.popitem(last=False)
+        return result
+    
+    def discard(self, path):
+        with self.lock:
+            self.entries.pop(path, None)
+    
+    def invalidate(self, path, ancestors=False):
+        """path와 그 하위 디렉토리, 상위 디렉토리 캐시 삭제 (ancestors=True면 모든 상위 디렉토리)"""
+        path = path.rstrip('/') or '/'
+        parents = {posixpath.dirname(path)}
+        if ancestors:
+            parent = path
+            while parent not in ('', '/'):
+                parent = posixpath.dirname(parent)
+                parents.add(parent)
+        with self.lock:
+            for cached in list(self.entries):
+                if cached == path or cached.startswith(path + '/') or cached in parents:
+                    del self.entries[cached]
+    
+    def stats(self):
+        with self.lock:
+            return {"directories": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+# 출력 파이프라인 설정
+OUTPUT_BUFFER_MAX = 1024 * 1024    # 세션당 버퍼 상한 (바이트) - 초과하면 채널 읽기 중단
+OUTPUT_FRAME_MAX = 64 * 1024       # WebSocket 프레임 하나의 최대 크기
+OUTPUT_COALESCE_DELAY = 0.004      # 연속 출력 중일 때 프레임을 모으는 최대 대기 시간 (초)
+
+class OutputPipeline:
+    """SSH 출력 → WebSocket 전송 사이의 세션별 바이트 버퍼
+    
+    - 대화형 에코처럼 간헐적인 출력은 즉시 전송
+    - 직전 프레임 이후 바로 다시 출력이 오는 대량 출력은 짧게 모아서 큰 프레임으로 전송
+    - 버퍼가 상한에 도달하면 on_full, 절반 아래로 비워지면 on_drain 호출 (채널 읽기 중단/재개)
+    """
+    def __init__(self, max_buffer=OUTPUT_BUFFER_MAX, max_frame=OUTPUT_FRAME_MAX,
+                 coalesce_delay=OUTPUT_COALESCE_DELAY):
+        self.max_buffer = max_buffer
+        self.max_frame = max_frame
+        self.coalesce_delay = coalesce_delay
+        self.buffer = bytearray()
+        self.closed = False
+        self.on_drain = None
+        self._event = asyncio.Event()
+        self._pending_chunks = 0
+        self._last_flush = 0.0
+        
+        # 통계
+        self.bytes_in = 0
+        self.chunks_in = 0
+        self.frames_out = 0
+        self.bytes_out = 0
+        self.bytes_coalesced = 0
+        self.peak_buffered = 0
+        self.pause_count = 0
+        self.frames_per_sec = 0.0
+        self._rate_start = time.monotonic()
+        self._rate_frames = 0
+    
+    def feed(self, data):
+        self.buffer += data
+        self._pending_chunks += 1
+        self.bytes_in += len(data)
+        self.chunks_in += 1
+        if len(self.buffer) > self.peak_buffered:
+            self.peak_buffered = len(self.buffer)
+        self._event.set()
+    
+    def full(self):
+        return len(self.buffer) >= self.max_buffer
+    
+    def clear(self):
+        """전송 대기 중인 출력 폐기 (detach 시 - 출력은 스크롤백에 남아 있음)"""
+        self.buffer = bytearray()
+        self._pending_chunks = 0
+    
+    def close(self):
+        self.closed = True
+        self._event.set()
+    
+    async def _wait(self, timeout=None):
+        self._event.clear()
+        if timeout is None:
+            await self._event.wait()
+            return True
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    async def read(self):
+        """다음 프레임으로 보낼 바이트 반환 (종료되고 남은 데이터가 없으면 None)"""
+        while not self.buffer:
+            if self.closed:
+                return None
+            await self._wait()
+        
+        # 직전 전송 직후 다시 출력이 왔다면 대량 출력으로 보고 프레임을 모음
+        now = time.monotonic()
+        if now - self._last_flush < self.coalesce_delay:
+            deadline = now + self.coalesce_delay
+            while len(self.buffer) < self.max_frame and not self.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not await self._wait(remaining):
+                    break
+        
+        size = min(len(self.buffer), self.max_frame)
+        frame = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        if self._pending_chunks > 1:
+            self.bytes_coalesced += size
+        self._pending_chunks = 1 if self.buffer else 0
+        self._record_frame(size)
+        
+        if len(self.buffer) < self.max_buffer // 2 and self.on_drain:
+            self.on_drain()
+        return frame
+    
+    def _record_frame(self, size):
+        now = time.monotonic()
+        self._last_flush = now
+        self.frames_out += 1
+        self.bytes_out += size
+        self._rate_frames += 1
+        elapsed = now - self._rate_start
+        if elapsed >= 1.0:
+            self.frames_per_sec = self._rate_frames / elapsed
+            self._rate_start = now
+            self._rate_frames = 0
+    
+    def stats(self):
+        elapsed = time.monotonic() - self._rate_start
+        frames_per_sec = self._rate_frames / elapsed if elapsed >= 1.0 else self.frames_per_sec
+        return {
+            "buffered_bytes": len(self.buffer),
+            "peak_buffered_bytes": self.peak_buffered,
+            "max_buffer_bytes": self.max_buffer,
+            "bytes_in": self.bytes_in,
+            "chunks_in": self.chunks_in,
+            "frames_out": self.frames_out,
+            "bytes_out": self.bytes_out,
+            "bytes_coalesced": self.bytes_coalesced,
+            "frames_per_sec": round(frames_per_sec, 2),
+            "pause_count": self.pause_count,
+        }
+
+# 스크롤백 / detach 설정
+SCROLLBACK_SIZE = int(os.environ.get("SCROLLBACK_SIZE", str(256 * 1024)))  # 세션당 스크롤백 (바이트)
+DETACH_GRACE_PERIOD = float(os.environ.get("DETACH_GRACE_PERIOD", "300"))  # WebSocket 종료 후 세션 유지 시간 (초), 0이면 즉시 종료
+DETACHED_SESSIONS_MAX = int(os.environ.get("DETACHED_SESSIONS_MAX", "1000"))  # 초과하면 가장 오래된 detach 세션부터 종료
+# detach 세션 메모리 상한 ≈ DETACHED_SESSIONS_MAX × SCROLLBACK_SIZE (detach 중에는 출력 파이프라인 버퍼를 쓰지 않음)
+
+class ScrollbackBuffer:
+    """고정 크기 바이트 링 버퍼
+    
+    bytearray 하나에 덮어쓰므로 청크마다 객체가 남지 않고 메모리는 capacity로 고정.
+    total은 세션 시작 후 전체 출력 바이트 수 (= 스트림 오프셋) - 클라이언트는 받은 바이트 수를
+    오프셋으로 기억해 두었다가 재연결 시 그 이후만 다시 받음.
+    """
+    def __init__(self, capacity=SCROLLBACK_SIZE):
+        self.capacity = capacity
+        self.buffer = bytearray()  # capacity까지 늘어난 뒤에는 크기 고정
+        self.head = 0              # 가장 오래된 바이트의 위치 (가득 찬 뒤에만 0이 아님)
+        self.total = 0
+    
+    def write(self, data):
+        size = len(data)
+        if size >= self.capacity:
+            self.buffer = bytearray(data[size - self.capacity:])
+            self.head = 0
+            self.total += size
+            return
+        
+        room = self.capacity - len(self.buffer)
+        if room:
+            self.buffer += data[:room]
+            data = data[room:]
+        if data:
+            # 가득 찬 상태: 가장 오래된 위치부터 덮어씀
+            first = min(len(data), self.capacity - self.head)
+            self.buffer[self.head:self.head + first] = data[:first]
+            self.buffer[:len(data) - first] = data[first:]
+            self.head = (self.head + len(data)) % self.capacity
+        self.total += size
+    
+    def read_from(self, offset):
+        """offset 이후 남아 있는 출력 - (실제 시작 오프셋, 바이트)
+        
+        offset이 이미 덮어쓴 위치면 남아 있는 가장 오래된 위치부터 반환
+        """
+        oldest = self.total - len(self.buffer)
+        start = min(max(offset, oldest), self.total)
+        index = (self.head + start - oldest) % max(len(self.buffer), 1)
+        size = self.total - start
+        end = index + size
+        if end <= len(self.buffer):
+            return start, bytes(self.buffer[index:end])
+        return start, bytes(self.buffer[index:]) + bytes(self.buffer[:end - len(self.buffer)])
+
+# 세션 녹화 설정
+RECORD_SESSIONS = os.environ.get("RECORD_SESSIONS", "0") == "1"      # 1이면 모든 세션 녹화 (아니면 connect의 "record": true)
+RECORDINGS_DIR = os.environ.get("RECORDINGS_DIR", "recordings")
+RECORDING_COMPRESS = os.environ.get("RECORDING_COMPRESS", "0") == "1"  # gzip 압축 (.cast.gz)
+RECORD_INPUT = os.environ.get("RECORD_INPUT", "0") == "1"  # 1이면 입력("i" 이벤트)도 녹화 (아니면 connect의 "record_input": true) - 입력한 비밀번호도 남음
+RECORDING_FLUSH_INTERVAL = 0.5   # 모인 이벤트를 writer 프로세스로 넘기는 주기 (초)
+RECORDING_FSYNC_INTERVAL = 5.0   # 디스크 동기화 주기 (초)
+RECORDING_FLUSH_BYTES = 1024 * 1024  # 주기 전이라도 이만큼 쌓이면 바로 기록
+RECORDING_PIPE_SIZE = 1024 * 1024  # writer 프로세스로 가는 파이프 버퍼 크기
+
+class RecordingWriter:
+    """세션 녹화기들의 이벤트를 모아 녹화 writer 프로세스로 보내는 스레드 (모든 세션이 공유)
+    
+    writer 프로세스가 죽으면 다시 띄우지만, 그때 녹화 중이던 파일은 이후 이벤트가 기록되지 않음
+    """
+    def __init__(self):
+        self.recorders = set()
+        self._process = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._send_lock = threading.Lock()  # writer 프로세스 파이프 쓰기 (전송 스레드 ↔ shutdown)
+        self._thread = None
+    
+    def register(self, recorder):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="recording-writer", daemon=True)
+                self._thread.start()
+            self.recorders.add(recorder)
+        self._wakeup.set()
+    
+    def wake(self):
+        self._wakeup.set()
+    
+    def _send(self, command, path, payload=None):
+        if self._process is None or self._process.poll() is not None:
+            if self._process is not None:
+                log(logging.WARNING, "녹화 writer 프로세스가 종료되어 다시 시작합니다")
+            # 앱 전체를 다시 import하지 않도록 표준 라이브러리만 쓰는 별도 모듈로 실행 (녹화 경로는 절대 경로)
+            self._process = subprocess.Popen(
+                [sys.executable, "-m", "recording_writer"], stdin=subprocess.PIPE,
+                cwd=os.path.dirname(os.path.abspath(__file__))
+            )
+            if hasattr(fcntl, "F_SETPIPE_SZ"):
+                # 파이프 버퍼를 키워 대량 출력 중 두 프로세스 사이의 전환 횟수를 줄임
+                try:
+                    fcntl.fcntl(self._process.stdin.fileno(), fcntl.F_SETPIPE_SZ, RECORDING_PIPE_SIZE)
+                except OSError:
+                    pass
+        pickle.dump((command, path, payload), self._process.stdin, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    def shutdown(self, timeout=10):
+        """녹화 중인 세션을 모두 마무리하고 writer 프로세스 종료 (서버 종료 시)"""
+        with self._lock:
+            recorders = list(self.recorders)
+        for recorder in recorders:
+            recorder.close()
+        deadline = time.monotonic() + timeout
+        while self.recorders and time.monotonic() < deadline:
+            self._wakeup.set()
+            time.sleep(0.05)
+        with self._send_lock:
+            process, self._process = self._process, None
+        if process is not None:
+            process.stdin.close()
+            process.wait(timeout=max(0.1, deadline - time.monotonic()))
+    
+    def _run(self):
+        last_sync = time.monotonic()
+        while True:
+            self._wakeup.wait(RECORDING_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            with self._lock:
+                recorders = list(self.recorders)
+            if not recorders:
+                continue
+            sync = time.monotonic() - last_sync >= RECORDING_FSYNC_INTERVAL
+            if sync:
+                last_sync = time.monotonic()
+            with self._send_lock:
+                self._flush(recorders, sync)
+    
+    def _flush(self, recorders, sync):
+        try:
+            for recorder in recorders:
+                if not recorder.opened:
+                    self._send("open", recorder.path, (recorder.header, recorder.compress))
+                    recorder.opened = True
+                closed = recorder.closed
+                events = recorder.take()
+                if events:
+                    self._send("events", recorder.path, events)
+                if closed:
+                    self._send("close", recorder.path)
+                    with self._lock:
+                        self.recorders.discard(recorder)
+            if sync:
+                self._send("sync", None)
+            self._process.stdin.flush()
+        except Exception as e:
+            log(logging.ERROR, "녹화 이벤트 전송 실패", error=e)
+
+recording_writer = RecordingWriter()
+
+class SessionRecorder:
+    """asciicast v2 세션 녹화기
+    
+    record()는 이벤트 루프에서 (시각, 종류, 데이터)를 리스트에 추가만 함.
+    RecordingWriter 스레드가 주기적으로 모아서 writer 프로세스로 넘기고,
+    인코딩/파일 쓰기/fsync/압축은 writer 프로세스에서 처리.
+    """
+    def __init__(self, path, width, height, title=None, compress=False, record_input=False):
+        self.path = os.path.abspath(path)
+        self.record_input = record_input
+        self.started = time.monotonic()
+        self.bytes_recorded = 0
+        self.closed = False
+        self._events = []
+        self._pending_bytes = 0
+        self._lock = threading.Lock()
+        
+        header = {
+            "version": 2,
+            "width": width,
+            "height": height,
+            "timestamp": int(time.time()),
+            "env": {"TERM": "xterm"},
+        }
+        if title:
+            header["title"] = title
+        self.header = json.dumps(header).encode()
+        self.compress = compress
+        self.opened = False
+        recording_writer.register(self)
+    
+    def record(self, kind, data):
+        """kind: "o"(출력 바이트), "i"(입력), "r"(크기 "COLSxROWS")"""
+        now = time.monotonic() - self.started
+        with self._lock:
+            self._events.append((now, kind, data))
+            self._pending_bytes += len(data)
+            self.bytes_recorded += len(data)
+            flush = self._pending_bytes >= RECORDING_FLUSH_BYTES
+            if flush:
+                self._pending_bytes = 0
+        if flush:
+            recording_writer.wake()
+    
+    def take(self):
+        with self._lock:
+            events, self._events = self._events, []
+            self._pending_bytes = 0
+        return events
+    
+    def close(self):
+        """남은 이벤트는 writer 스레드가 넘긴 뒤 파일이 닫힘 (호출 측은 기다리지 않음)"""
+        self.closed = True
+        recording_writer.wake()
+
+def recording_path(recording_id):
+    """녹화 ID → 파일 경로 (녹화 디렉토리 밖이거나 없으면 None)"""
+    if not re.fullmatch(r"[\w.-]+\.cast(\.gz)?", recording_id):
+        return None
+    path = os.path.join(RECORDINGS_DIR, recording_id)
+    return path if os.path.isfile(path) else None
+
 class SSHSession:
     def __init__(self):
         self.client = None
+        self.conn = None
         self.channel = None
         self.connected = False
-        self.output_queue = queue.Queue()
+        self.output = OutputPipeline()
+        self.output.on_drain = self._resume_reading
+        self.loop = None
+        self.channel_fd = None
+        self.reading_paused = False
+        self.closing = False
+        self._sock = None
+        self.scrollback = ScrollbackBuffer()
+        self.websocket = None      # 현재 붙어 있는 WebSocket (detach 중이면 None)
+        self.attach_token = secrets.token_urlsafe(32)  # 재연결(attach) 자격 - connection_result로 연결한 클라이언트에만 전달
+        self.monitor_task = None
+        self.detached_at = None
+        self._expire_handle = None
+        self.recorder = None
+        self.compressor = None     # 출력 압축 (연결/재연결마다 새 스트림)
+        self.input_bytes = 0       # 클라이언트 → SSH 입력 바이트
+        self.created = self.last_activity = time.monotonic()  # 마지막 입출력 시각 (유휴 세션 정리 기준)
         self.terminal_width = 80  # 기본 터미널 너비
         self.terminal_height = 24  # 기본 터미널 높이
         
     def connect(self, hostname, username, password, port=22):
         try:
-            self.client = paramiko.SSHClient()
-            self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            self.client.connect(hostname, port=port, username=username, password=password)
+            # 같은 호스트/계정의 인증된 연결이 풀에 있으면 채널만 새로 열림
+            self.conn = transport_pool.acquire(hostname, username, password, port, on_socket=self._set_socket)
+            self.client = self.conn.client
+            # 이후 소켓은 풀이 소유하므로 세션 종료 시 닫지 않음
+            self._sock = None
+            if self.closing:
+                raise Exception("연결 도중 세션이 종료됨")
             
             # PTY 크기와 함께 쉘 호출 - 기본 터미널 타입으로 설정
             self.channel = self.client.invoke_shell(
@@ -48,87 +1019,489 @@ class SSHSession:
                 height_pixels=0
             )
             self.channel.settimeout(0.1)
+            if self.closing:
+                raise Exception("연결 도중 세션이 종료됨")
             self.connected = True
             
-            print(f"SSH 연결 성공 - 터미널 크기: {self.terminal_width}x{self.terminal_height}")
-            
-            # 출력 읽기 스레드 시작
-            self.output_thread = threading.Thread(target=self._read_output)
-            self.output_thread.daemon = True
-            self.output_thread.start()
+            log(logging.INFO, "SSH 연결 성공", host=hostname, cols=self.terminal_width, rows=self.terminal_height)
             
             return True
         except Exception as e:
-            print(f"SSH 연결 실패: {e}")
+            log(logging.WARNING, "SSH 연결 실패", host=hostname, error=e)
+            self._release()
             return False
     
+    def _set_socket(self, sock):
+        self._sock = sock
+        if self.closing:
+            sock.close()
+    
+    async def connect_async(self, hostname, username, password, port=22):
+        """이벤트 루프를 막지 않도록 connect_executor에서 연결
+        
+        작업이 취소되면 (WebSocket 종료 등) 소켓을 닫아 워커 스레드가 즉시 빠져나오게 함
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                connect_executor, self.connect, hostname, username, password, port
+            )
+        except asyncio.CancelledError:
+            self.disconnect()
+            raise
+    
+    def start_reading(self, loop):
+        """채널 fd를 이벤트 루프에 등록 - 데이터가 도착했을 때만 깨어나서 읽음"""
+        self.loop = loop
+        self.channel_fd = self.channel.fileno()
+        loop.add_reader(self.channel_fd, self._read_output)
+    
+    def _stop_reading(self):
+        if self.loop and self.channel_fd is not None:
+            if not self.reading_paused:
+                self.loop.remove_reader(self.channel_fd)
+            self.channel_fd = None
+            # 출력 대기 중인 monitor_output 깨우기
+            self.output.close()
+    
+    def _pause_reading(self):
+        """출력 버퍼가 가득 차면 채널 읽기 중단
+        
+        paramiko는 읽어간 만큼만 윈도우를 늘려주므로 원격 쪽 전송도 TCP/SSH 흐름 제어로 멈춤
+        """
+        if self.channel_fd is not None and not self.reading_paused:
+            self.loop.remove_reader(self.channel_fd)
+            self.reading_paused = True
+            self.output.pause_count += 1
+    
+    def _resume_reading(self):
+        if self.channel_fd is not None and self.reading_paused:
+            self.reading_paused = False
+            self.loop.add_reader(self.channel_fd, self._read_output)
+    
     def _read_output(self):
-        while self.connected and self.channel:
-            try:
-                if self.channel.recv_ready():
-                    data = self.channel.recv(1024).decode('utf-8', errors='ignore')
-                    self.output_queue.put(data)
-                time.sleep(0.01)
-            except Exception as e:
-                if self.connected:
-                    print(f"출력 읽기 오류: {e}")
-                break
+        """이벤트 루프 콜백: 채널 버퍼에 쌓인 데이터를 출력 버퍼 상한까지 읽음"""
+        self.last_activity = time.monotonic()
+        try:
+            while self.channel.recv_ready():
+                if self.detached_at is None and self.output.full():
+                    self._pause_reading()
+                    return
+                data = self.channel.recv(32768)
+                if not data:
+                    break
+                self.scrollback.write(data)
+                if self.recorder:
+                    self.recorder.record("o", data)
+                # detach 중에는 스크롤백에만 기록 - 원격 작업은 멈추지 않고 오래된 출력부터 덮어씀
+                if self.detached_at is None:
+                    self.output.feed(data)
+            
+            # EOF/종료 시 파이프가 계속 readable 상태로 남으므로 등록 해제
+            if self.channel.closed or self.channel.eof_received:
+                if not self.channel.recv_ready():
+                    self.connected = False
+                    self._stop_reading()
+        except Exception as e:
+            if self.connected:
+                log(logging.WARNING, "출력 읽기 오류", error=e)
+            self.connected = False
+            self._stop_reading()
     
     def send_command(self, command):
         if self.channel and self.connected:
             try:
                 self.channel.send(command)
+                self.input_bytes += len(command.encode() if isinstance(command, str) else command)
+                self.last_activity = time.monotonic()
+                if self.recorder and self.recorder.record_input:
+                    self.recorder.record("i", command)
                 return True
             except Exception as e:
-                print(f"명령어 전송 실패: {e}")
+                log(logging.WARNING, "명령어 전송 실패", error=e)
                 return False
         return False
     
     def resize_terminal(self, cols, rows):
-        """터미널 크기 조정"""
+        """터미널 크기 조정 (연결 전이면 크기만 저장해 두고 쉘 생성 시 사용)"""
+        # 터미널 크기 업데이트
+        self.terminal_width = cols
+        self.terminal_height = rows
+        if self.recorder:
+            self.recorder.record("r", f"{cols}x{rows}")
+        
         if self.channel and self.connected:
             try:
-                # 터미널 크기 업데이트
-                self.terminal_width = cols
-                self.terminal_height = rows
-                
                 # PTY 크기 조정
                 self.channel.resize_pty(width=cols, height=rows, width_pixels=0, height_pixels=0)
-                print(f"터미널 크기 조정 완료: {cols}x{rows}")
+                log(logging.DEBUG, "터미널 크기 조정 완료", cols=cols, rows=rows)
                 return True
             except Exception as e:
-                print(f"터미널 크기 조정 실패: {e}")
+                log(logging.WARNING, "터미널 크기 조정 실패", error=e)
                 return False
         return False
     
-    def get_output(self):
-        output = ""
-        while not self.output_queue.empty():
-            try:
-                output += self.output_queue.get_nowait()
-            except queue.Empty:
-                break
-        return output
+    async def get_output(self):
+        """출력이 도착할 때까지 대기한 후 다음 프레임 분량의 출력 바이트를 반환 (종료 시 None)"""
+        return await self.output.read()
+    
+    def start_recording(self, name, record_input=False):
+        """asciicast 녹화 시작 - 녹화 ID (파일 이름) 반환 (record_input이 아니면 출력/크기 변경만 기록)"""
+        os.makedirs(RECORDINGS_DIR, exist_ok=True)
+        safe_name = re.sub(r"[^\w-]", "_", name)
+        recording_id = f"{safe_name}-{time.strftime('%Y%m%d-%H%M%S')}.cast" + (".gz" if RECORDING_COMPRESS else "")
+        self.recorder = SessionRecorder(
+            os.path.join(RECORDINGS_DIR, recording_id), self.terminal_width, self.terminal_height,
+            title=name, compress=RECORDING_COMPRESS, record_input=record_input
+        )
+        return recording_id
+    
+    def check_attach_token(self, token):
+        """재연결 요청의 토큰 확인 (상수 시간 비교)"""
+        if not isinstance(token, str):
+            return False
+        return hmac.compare_digest(token.encode(), self.attach_token.encode())
+    
+    def attach(self, websocket, offset=0):
+        """WebSocket 연결 - 이전 연결은 끊고, offset 이후의 스크롤백을 반환 (시작 오프셋, 바이트)
+        
+        이벤트 루프에서 호출되므로 스크롤백을 읽고 파이프라인을 비우는 사이에 새 출력이 끼어들지 않음
+        """
+        previous = self.websocket
+        if self.monitor_task:
+            self.monitor_task.cancel()
+            self.monitor_task = None
+        if self._expire_handle:
+            self._expire_handle.cancel()
+            self._expire_handle = None
+        self.websocket = websocket
+        self.detached_at = None
+        self.last_activity = time.monotonic()
+        self.output.clear()
+        self._resume_reading()
+        if previous is not None and previous is not websocket:
+            # 네트워크가 바뀌어 이전 WebSocket이 아직 끊긴 줄 모르는 경우
+            asyncio.create_task(close_websocket(previous))
+        return self.scrollback.read_from(offset)
+    
+    def detach(self, on_expire):
+        """WebSocket 없이 세션 유지 - DETACH_GRACE_PERIOD 안에 다시 attach하지 않으면 on_expire 호출"""
+        self.websocket = None
+        if self.monitor_task:
+            self.monitor_task.cancel()
+            self.monitor_task = None
+        self.detached_at = time.monotonic()
+        # 보내지 못한 출력은 스크롤백에 있으므로 버리고, 버퍼가 차서 멈춘 읽기는 재개
+        self.output.clear()
+        self._resume_reading()
+        self._expire_handle = self.loop.call_later(DETACH_GRACE_PERIOD, on_expire)
+    
+    def _release(self):
+        if self.channel:
+            self.channel.close()
+            self.channel = None
+        if self.conn:
+            transport_pool.release(self.conn)
+            self.conn = None
+    
+    def buffered_bytes(self):
+        """세션이 붙잡고 있는 출력 메모리 (스크롤백 + 전송 대기 버퍼)"""
+        return len(self.scrollback.buffer) + len(self.output.buffer)
+    
+    def resources(self):
+        now = time.monotonic()
+        return {
+            "kind": "ssh",
+            "state": session_state(self),
+            "channel_open": bool(self.channel and not self.channel.closed),
+            "idle": round(now - self.last_activity, 1),
+            "age": round(now - self.created, 1),
+            "detached_for": round(now - self.detached_at, 1) if self.detached_at is not None else None,
+            "connection_channels": self.conn.refs if self.conn else 0,
+            "buffered_bytes": self.buffered_bytes(),
+            "output_bytes": self.scrollback.total,
+            "input_bytes": self.input_bytes,
+            "recording": self.recorder is not None,
+        }
     
     def disconnect(self):
+        self.closing = True
         self.connected = False
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
+        if self._expire_handle:
+            self._expire_handle.cancel()
+            self._expire_handle = None
+        self._stop_reading()
+        self._release()
+        if self._sock:
+            # 연결 진행 중이면 워커 스레드의 블로킹 읽기를 깨움
+            self._sock.close()
+
+def run_remote_command(client, command):
+    """원격 명령 실행 후 (종료 코드, stdout, stderr) 반환 (블로킹)"""
+    stdin, stdout, stderr = client.exec_command(command)
+    stdin.close()
+    out = stdout.read()
+    err = stderr.read()
+    return stdout.channel.recv_exit_status(), out, err
+
+# 여러 호스트에 같은 명령 실행 (/api/exec)
+EXEC_MAX_PARALLEL = int(os.environ.get("EXEC_MAX_PARALLEL", "64"))  # 동시에 실행하는 호스트 수 상한
+EXEC_MAX_HOSTS = int(os.environ.get("EXEC_MAX_HOSTS", "1000"))      # 요청당 호스트 수 상한
+EXEC_TIMEOUT = float(os.environ.get("EXEC_TIMEOUT", "30"))          # 호스트별 기본 제한 시간 (연결 포함, 초)
+EXEC_OUTPUT_LIMIT = int(os.environ.get("EXEC_OUTPUT_LIMIT", str(1024 * 1024)))  # 호스트별 출력 상한 (넘는 부분은 버림)
+EXEC_READ_SIZE = 32768
+
+# 연결/채널 열기만 블로킹이므로 전용 풀에서 실행 (대량 실행이 터미널 연결용 connect_executor를 막지 않도록)
+# 출력은 터미널과 같이 채널 fd를 이벤트 루프에 등록해서 받음 - 실행 중인 호스트가 스레드를 붙잡지 않음
+exec_executor = ThreadPoolExecutor(max_workers=EXEC_MAX_PARALLEL, thread_name_prefix="ssh-exec")
+
+def start_remote_exec(target, command):
+    """풀에서 연결을 빌려 exec 채널을 열고 (연결, 채널) 반환 (블로킹 - exec_executor에서 호출)"""
+    conn = transport_pool.acquire(target["hostname"], target["username"], target["password"], target["port"])
+    try:
+        channel = conn.client.get_transport().open_session(timeout=SSH_AUTH_TIMEOUT)
+        channel.exec_command(command)
+        # 표준 입력을 읽는 명령이 기다리지 않도록 바로 EOF 전송
+        channel.shutdown_write()
+    except Exception:
+        transport_pool.release(conn)
+        raise
+    return conn, channel
+
+def finish_remote_exec(conn, channel):
+    channel.close()
+    transport_pool.release(conn)
+
+class RemoteExec:
+    """호스트 하나에서 명령 실행 - stdout/stderr를 도착하는 대로 emit으로 넘기고 결과 이벤트 반환"""
+    def __init__(self, index, target, command, timeout, emit):
+        self.index = index
+        self.target = target
+        self.host = target["label"]
+        self.command = command
+        self.timeout = timeout
+        self.emit = emit
+        self.conn = None
+        self.channel = None
+        self.loop = None
+        self.channel_fd = None
+        self.finished = None
+        self.output_bytes = 0
+        self.truncated = False
+        self.decoders = {
+            "stdout": codecs.getincrementaldecoder("utf-8")(errors="replace"),
+            "stderr": codecs.getincrementaldecoder("utf-8")(errors="replace"),
+        }
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        result = {"type": "result", "index": self.index, "host": self.host, "exit_status": None,
+                  "error": None, "timed_out": False, "truncated": False}
+        future = exec_executor.submit(start_remote_exec, self.target, self.command)
+        try:
+            result["exit_status"] = await asyncio.wait_for(self._execute(future), self.timeout)
+        except asyncio.TimeoutError:
+            result["timed_out"] = True
+            result["error"] = f"시간 초과 ({self.timeout:g}초)"
+        except SSHConnectError as e:
+            result["error"] = f"연결 실패 - {e}"
+        except Exception as e:
+            result["error"] = str(e) or type(e).__name__
+        finally:
+            self._close(future)
+        for stream, decoder in self.decoders.items():
+            self._emit_text(stream, decoder.decode(b"", final=True))
+        result["truncated"] = self.truncated
+        result["elapsed"] = round(time.monotonic() - started, 3)
+        return result
+
+    async def _execute(self, future):
+        self.conn, self.channel = await asyncio.wrap_future(future)
+        self.finished = self.loop.create_future()
+        self.channel_fd = self.channel.fileno()
+        self.loop.add_reader(self.channel_fd, self._read_output)
+        await self.finished
+        if self.channel.exit_status_ready():
+            return self.channel.recv_exit_status()
+        # EOF 뒤에 exit-status가 늦게 오는 경우만 워커 스레드에서 기다림
+        return await self.loop.run_in_executor(exec_executor, self.channel.recv_exit_status)
+
+    def _read_output(self):
+        """이벤트 루프 콜백: 버퍼에 쌓인 stdout/stderr를 모두 읽고 EOF면 읽기 종료"""
+        channel = self.channel
+        while channel.recv_ready():
+            self._add_output("stdout", channel.recv(EXEC_READ_SIZE))
+        while channel.recv_stderr_ready():
+            self._add_output("stderr", channel.recv_stderr(EXEC_READ_SIZE))
+        # EOF 이후에는 파이프가 계속 읽기 가능 상태로 남으므로 리더를 바로 해제
+        if channel.eof_received or channel.closed:
+            self._stop_reading()
+            if not self.finished.done():
+                self.finished.set_result(None)
+
+    def _add_output(self, stream, data):
+        # 상한을 넘은 출력도 계속 읽어서 버림 - 읽지 않으면 윈도우가 닫혀 원격 명령이 멈춤
+        room = EXEC_OUTPUT_LIMIT - self.output_bytes
+        if len(data) > room:
+            data = data[:max(room, 0)]
+            self.truncated = True
+        if data:
+            self.output_bytes += len(data)
+            self._emit_text(stream, self.decoders[stream].decode(data))
+
+    def _emit_text(self, stream, text):
+        if text:
+            self.emit({"type": "output", "index": self.index, "host": self.host, "stream": stream, "data": text})
+
+    def _stop_reading(self):
+        if self.channel_fd is not None:
+            self.loop.remove_reader(self.channel_fd)
+            self.channel_fd = None
+
+    def _close(self, future):
+        self._stop_reading()
         if self.channel:
-            self.channel.close()
-        if self.client:
-            self.client.close()
+            finish_remote_exec(self.conn, self.channel)
+        elif not future.cancel():
+            # 연결 중에 시간 초과/취소된 경우 - 연결이 끝나는 대로 채널을 닫고 반납
+            future.add_done_callback(self._close_late)
+
+    @staticmethod
+    def _close_late(future):
+        if future.exception() is None:
+            finish_remote_exec(*future.result())
+
+def parse_exec_targets(exec_data):
+    """hosts 항목("host", "user@host:port" 또는 {hostname, port, username, password})을 연결 정보로 변환
+
+    항목에 없는 값은 요청의 username/password/port를 사용
+    """
+    targets = []
+    for host in exec_data.get("hosts") or []:
+        target = {
+            "username": exec_data.get("username"),
+            "password": exec_data.get("password"),
+            "port": exec_data.get("port", 22),
+        }
+        if isinstance(host, dict):
+            target.update({key: host[key] for key in ("hostname", "port", "username", "password") if host.get(key) is not None})
+        elif isinstance(host, str):
+            if "@" in host:
+                target["username"], host = host.rsplit("@", 1)
+            # host:port (IPv6 주소처럼 콜론이 여러 개면 포트로 보지 않음)
+            if host.count(":") == 1 and host.rsplit(":", 1)[1].isdigit():
+                host, target["port"] = host.rsplit(":", 1)
+            target["hostname"] = host
+        if not target.get("hostname") or not target["username"] or target["password"] is None:
+            raise HTTPException(status_code=400, detail=f"호스트 정보가 올바르지 않습니다: {host}")
+        target["port"] = int(target["port"])
+        target["label"] = target["hostname"] if target["port"] == 22 else f"{target['hostname']}:{target['port']}"
+        targets.append(target)
+    return targets
+
+async def stream_exec_batch(targets, command, timeout, parallel):
+    """호스트별 RemoteExec를 최대 parallel개씩 실행하며 이벤트를 NDJSON 줄로 전송
+
+    클라이언트가 연결을 끊으면 제너레이터가 닫히면서 남은 실행을 모두 취소
+    """
+    events = asyncio.Queue()
+    semaphore = asyncio.Semaphore(parallel)
+    started = time.monotonic()
+
+    async def run_host(index, target):
+        async with semaphore:
+            result = await RemoteExec(index, target, command, timeout, events.put_nowait).run()
+        if result["timed_out"]:
+            EXEC_RESULTS.inc(1, "timeout")
+        elif result["error"]:
+            EXEC_RESULTS.inc(1, "error")
+        else:
+            EXEC_RESULTS.inc(1, "ok" if result["exit_status"] == 0 else "failed")
+        events.put_nowait(result)
+
+    tasks = [asyncio.create_task(run_host(index, target)) for index, target in enumerate(targets)]
+    try:
+        yield json.dumps({"type": "start", "hosts": len(targets), "parallel": parallel}) + "\n"
+        remaining = len(targets)
+        succeeded = 0
+        while remaining:
+            # 이미 쌓인 이벤트는 한 번에 묶어서 전송
+            batch = [await events.get()]
+            while not events.empty():
+                batch.append(events.get_nowait())
+            for event in batch:
+                if event["type"] == "result":
+                    remaining -= 1
+                    succeeded += event["exit_status"] == 0
+            yield "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in batch)
+        elapsed = round(time.monotonic() - started, 3)
+        log(logging.INFO, "다중 호스트 명령 실행 완료", hosts=len(targets), succeeded=succeeded, elapsed=elapsed)
+        yield json.dumps({"type": "done", "succeeded": succeeded, "failed": len(targets) - succeeded, "elapsed": elapsed}) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def make_remote_dirs(sftp, path):
+    """mkdir -p: 없는 상위 디렉토리부터 차례로 생성"""
+    missing = []
+    while path not in ('', '/'):
+        try:
+            if stat.S_ISDIR(sftp.stat(path).st_mode):
+                break
+            raise IOError(f"디렉토리가 아닙니다: {path}")
+        except FileNotFoundError:
+            missing.append(path)
+            path = posixpath.dirname(path)
+    for directory in reversed(missing):
+        sftp.mkdir(directory)
+
+def within_home(path, home):
+    """정규화된 원격 경로가 홈 디렉토리 자체이거나 그 아래인지 (/home/al 홈에서 /home/alice는 밖)"""
+    home = home.rstrip('/')
+    return path == (home or '/') or path.startswith(home + '/')
+
+def sftp_locked(method):
+    """SFTPSession 메서드를 세션 잠금 안에서 실행
+    
+    paramiko SFTPClient는 여러 스레드가 동시에 동기 요청을 보내면 다른 스레드의 응답을
+    가로채 버릴 수 있으므로 같은 SFTP 채널에 대한 요청은 직렬화함
+    """
+    operation = method.__name__
+    
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        started = time.perf_counter()
+        self.last_activity = time.monotonic()
+        try:
+            with self.lock:
+                return method(self, *args, **kwargs)
+        finally:
+            SFTP_OPERATION_SECONDS.observe(time.perf_counter() - started, operation)
+    return wrapper
 
 class SFTPSession:
     def __init__(self):
         self.client = None
+        self.conn = None
         self.sftp = None
         self.connected = False
         self.home_dir = None
+        self.lock = threading.RLock()
+        self.listings = ListingCache()
+        self.upload_paths = {}  # 업로드 중인 원격 파일 → 경로 (닫을 때 목록 캐시 무효화)
+        self.index = None  # 원격 디렉토리 색인 (RemoteIndex)
+        self.disk_usage = {}  # 디렉토리 경로 → DiskUsageJob (끝난 결과도 보관)
+        self.created = self.last_activity = time.monotonic()  # 마지막 SFTP 작업 시각 (유휴 세션 정리 기준)
         
     def connect(self, hostname, username, password, port=22):
         try:
-            self.client = paramiko.SSHClient()
-            self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            self.client.connect(hostname, port=port, username=username, password=password)
+            # 같은 호스트의 터미널 연결이 있으면 그 Transport 위에 SFTP 채널만 염
+            self.conn = transport_pool.acquire(hostname, username, password, port)
+            self.client = self.conn.client
             
             self.sftp = self.client.open_sftp()
             self.connected = True
@@ -138,259 +1511,3081 @@ class SFTPSession:
                 # Execute pwd command to get current directory
                 stdin, stdout, stderr = self.client.exec_command('pwd')
                 self.home_dir = stdout.read().decode().strip()
-                print(f"Home directory set to: {self.home_dir}")
+                log(logging.DEBUG, "SFTP 홈 디렉토리", path=self.home_dir)
             except Exception as e:
-                print(f"Failed to get home directory: {e}")
+                log(logging.WARNING, "SFTP 홈 디렉토리 조회 실패", error=e)
                 self.home_dir = f'/home/{username}'
             
             return True
         except Exception as e:
-            print(f"SFTP 연결 실패: {e}")
+            log(logging.WARNING, "SFTP 연결 실패", host=hostname, error=e)
+            self.disconnect()
             return False
     
-    def list_files(self, path='.'):
+    @sftp_locked
+    def _listing_path(self, path):
+        # Prevent going above home directory
+        full_path = self.sftp.normalize(path)
+        if not within_home(full_path, self.home_dir):
+            full_path = self.home_dir
+        return full_path
+    
+    def _load_listing(self, full_path, on_batch=None):
+        """원격 디렉토리 읽기 - 캐시에 있으면 캐시 사용
+        
+        on_batch가 있으면 읽는 도중 SFTP 응답 단위로 항목 묶음을 넘김 (NDJSON 스트리밍용)
+        """
+        entry = self.listings.get(full_path)
+        if entry is not None:
+            if on_batch:
+                on_batch(entry[1])
+            return entry, True
+        
+        files = []
+        batch = []
+        # listdir_iter는 READDIR 요청을 여러 개 미리 보내 두므로 listdir_attr보다 빠름
+        for file_attr in self.sftp.listdir_iter(full_path):
+            batch.append(file_entry(file_attr))
+            if on_batch and len(batch) >= LISTING_PAGE_SIZE:
+                on_batch(batch)
+                files.extend(batch)
+                batch = []
+        if on_batch and batch:
+            on_batch(batch)
+        files.extend(batch)
+        return self.listings.put(full_path, files), False
+    
+    @sftp_locked
+    def list_files(self, path='.', sort='name', order='asc', query=None, kind=None,
+                   hidden=False, cursor=None, limit=LISTING_PAGE_SIZE):
+        """정렬/필터된 원격 파일 목록의 한 페이지
+        
+        cursor는 이전 응답의 next_cursor (목록 내 위치) - 마지막 페이지면 next_cursor가 None
+        """
         if not self.connected or not self.sftp:
             return []
         
         try:
-            # Prevent going above home directory
-            full_path = self.sftp.normalize(path)
-            if not full_path.startswith(self.home_dir):
-                full_path = self.home_dir
-            
-            files = []
-            file_list = self.sftp.listdir_attr(full_path)
-            
-            for file_attr in file_list:
-                if file_attr.filename.startswith('.') and file_attr.filename != '..':
-                    continue  # Skip hidden files except parent directory
-                
-                file_info = {
-                    'name': file_attr.filename,
-                    'type': 'directory' if stat.S_ISDIR(file_attr.st_mode) else 'file',
-                    'size': file_attr.st_size if file_attr.st_size else 0,
-                    'modified': file_attr.st_mtime if file_attr.st_mtime else 0,
-                    'permissions': oct(file_attr.st_mode)[-3:] if file_attr.st_mode else '000'
-                }
-                files.append(file_info)
+            full_path = self._listing_path(path)
+            entry, cached = self._load_listing(full_path)
+            files = self.listings.view(entry, sort, order, query, kind, hidden)
             
-            return {'files': files, 'path': full_path}
+            start = max(0, int(cursor)) if cursor else 0
+            end = start + max(1, min(limit, LISTING_PAGE_MAX))
+            return {
+                'files': files[start:end],
+                'path': full_path,
+                'total': len(files),
+                'next_cursor': str(end) if end < len(files) else None,
+                'cached': cached
+            }
         except Exception as e:
-            print(f"파일 목록 조회 실패: {e}")
-            return {'files': [], 'path': self.home_dir}
+            log(logging.WARNING, "파일 목록 조회 실패", path=path, error=e)
+            return {'files': [], 'path': self.home_dir, 'total': 0, 'next_cursor': None, 'cached': False}
+    
+    @sftp_locked
+    def scan_files(self, path, on_batch, query=None, kind=None, hidden=False):
+        """원격 디렉토리를 읽으면서 항목 묶음을 on_batch로 넘김 (서버 순서, 블로킹)
+        
+        on_batch는 먼저 디렉토리 경로 하나로 호출된 뒤 항목 리스트로 호출됨
+        """
+        full_path = self._listing_path(path)
+        on_batch(full_path)
+        self._load_listing(
+            full_path,
+            on_batch=lambda batch: on_batch(filter_entries(batch, query, kind, hidden))
+        )
+    
+    def _upload_path(self, remote_path, filename):
+        # Prevent going above home directory
+        full_remote_path = self.sftp.normalize(remote_path)
+        if not within_home(full_remote_path, self.home_dir):
+            full_remote_path = self.home_dir
+        
+        # Create full file path
+        return os.path.join(full_remote_path, os.path.basename(filename))
     
-    def upload_file(self, local_file, remote_path):
+    @sftp_locked
+    def upload_status(self, remote_path, filename):
+        """이어 올리기용: 원격에 이미 올라간 부분 파일 크기 조회"""
         if not self.connected or not self.sftp:
-            return False
+            return None
         
+        remote_file_path = self._upload_path(remote_path, filename)
         try:
-            # Prevent going above home directory
-            full_remote_path = self.sftp.normalize(remote_path)
-            if not full_remote_path.startswith(self.home_dir):
-                full_remote_path = self.home_dir
-            
-            # Create full file path
-            remote_file_path = os.path.join(full_remote_path, local_file.filename)
-            
-            # Upload file
-            file_content = local_file.file.read()
-            with self.sftp.open(remote_file_path, 'wb') as remote_file:
-                remote_file.write(file_content)
-            
-            return True
-        except Exception as e:
-            print(f"파일 업로드 실패: {e}")
-            return False
+            size = self.sftp.stat(remote_file_path).st_size
+        except IOError:
+            size = None
+        return {"path": remote_file_path, "exists": size is not None, "size": size or 0}
+    
+    @sftp_locked
+    def open_upload(self, remote_path, filename, offset=0):
+        """업로드할 원격 파일 열기 (블로킹 - sftp_executor에서 호출)
+        
+        offset > 0이면 기존 파일을 offset에서 잘라내고 그 위치부터 이어서 씀.
+        쓰기는 파이프라인 모드 - 응답(ACK)을 기다리지 않고 연속 전송한 뒤 close에서 한꺼번에 확인.
+        """
+        if not self.connected or not self.sftp:
+            return None
+        
+        remote_file_path = self._upload_path(remote_path, filename)
+        self.listings.invalidate(posixpath.dirname(remote_file_path))
+        if offset:
+            remote_file = self.sftp.open(remote_file_path, 'r+b')
+            size = remote_file.stat().st_size
+            if offset > size:
+                remote_file.close()
+                raise ValueError(f"이어 올릴 위치({offset})가 원격 파일 크기({size})보다 큽니다")
+            remote_file.truncate(offset)
+            remote_file.seek(offset)
+        else:
+            remote_file = self.sftp.open(remote_file_path, 'wb')
+        remote_file.set_pipelined(True)
+        self.upload_paths[remote_file] = remote_file_path
+        return remote_file
+    
+    @sftp_locked
+    def write_chunk(self, remote_file, data):
+        remote_file.write(data)
+    
+    async def upload_stream(self, chunks, remote_file, progress):
+        """비동기 청크 이터레이터를 원격 파일에 기록
+        
+        SFTP_UPLOAD_CHUNK 단위로 모아서 워커 스레드에 넘기고, 쓰는 동안 다음 청크를 받아 둠
+        (메모리는 전송당 최대 2개 청크)
+        """
+        pending = None
+        pending_size = 0
+        buffer = bytearray()
+        try:
+            async for data in chunks:
+                buffer += data
+                if len(buffer) < SFTP_UPLOAD_CHUNK:
+                    continue
+                if pending:
+                    await asyncio.wrap_future(pending)
+                    progress.transferred += pending_size
+                    SFTP_TRANSFER_BYTES.inc(pending_size, "upload")
+                pending_size = len(buffer)
+                pending = sftp_executor.submit(self.write_chunk, remote_file, bytes(buffer))
+                buffer = bytearray()
+            if pending:
+                await asyncio.wrap_future(pending)
+                progress.transferred += pending_size
+                SFTP_TRANSFER_BYTES.inc(pending_size, "upload")
+                pending = None
+            if buffer:
+                await asyncio.wrap_future(sftp_executor.submit(self.write_chunk, remote_file, bytes(buffer)))
+                progress.transferred += len(buffer)
+                SFTP_TRANSFER_BYTES.inc(len(buffer), "upload")
+        finally:
+            def close_file(in_flight):
+                if in_flight:
+                    concurrent.futures.wait([in_flight])
+                try:
+                    self.close_file(remote_file)
+                finally:
+                    remote_file_path = self.upload_paths.pop(remote_file, None)
+                    if remote_file_path:
+                        self.listings.invalidate(posixpath.dirname(remote_file_path))
+            # 파이프라인으로 보낸 쓰기 요청의 결과는 close에서 확인되므로 완료까지 대기
+            await asyncio.wrap_future(sftp_executor.submit(close_file, pending))
     
-    def download_file(self, remote_path):
+    @sftp_locked
+    def open_download(self, remote_path):
+        """다운로드할 원격 파일을 열어 (파일, 크기) 반환 (블로킹 - sftp_executor에서 호출)"""
         if not self.connected or not self.sftp:
             return None
         
         try:
             # Prevent going above home directory
             full_remote_path = self.sftp.normalize(remote_path)
-            if not full_remote_path.startswith(self.home_dir):
+            if not within_home(full_remote_path, self.home_dir):
                 return None
             
-            file_data = io.BytesIO()
-            with self.sftp.open(full_remote_path, 'rb') as remote_file:
-                file_data.write(remote_file.read())
-            
-            file_data.seek(0)
-            return file_data
+            remote_file = self.sftp.open(full_remote_path, 'rb')
+            return remote_file, remote_file.stat().st_size
         except Exception as e:
-            print(f"파일 다운로드 실패: {e}")
+            log(logging.WARNING, "파일 다운로드 실패", path=remote_path, error=e)
+            return None
+    
+    @sftp_locked
+    def close_file(self, remote_file):
+        remote_file.close()
+    
+    @sftp_locked
+    def file_size(self, remote_path):
+        return self.sftp.stat(remote_path).st_size
+    
+    @sftp_locked
+    def follow_stat(self, remote_path, remote_file):
+        """따라가는 경로의 크기, 열린 핸들의 크기, 경로가 다른 파일로 바뀌었는지 반환 (경로가 없으면 None)
+        
+        SFTP v3 속성에는 inode가 없으므로 (크기, 수정 시각)으로 판단: 같은 파일이면 경로 stat 값이
+        그 앞뒤로 읽은 핸들 fstat 값 사이에 있어야 함 (앞의 값과 같으면 뒤의 fstat은 생략)
+        """
+        before = remote_file.stat()
+        try:
+            current = self.sftp.stat(remote_path)
+        except FileNotFoundError:
+            # 로테이션 중 이름을 바꾼 뒤 새 파일이 아직 생기지 않음
             return None
+        after = before
+        if (current.st_size, current.st_mtime) != (before.st_size, before.st_mtime):
+            after = remote_file.stat()
+        replaced = not (before.st_size <= current.st_size <= after.st_size
+                        and before.st_mtime <= current.st_mtime <= after.st_mtime)
+        return current.st_size, after.st_size, replaced
+    
+    @sftp_locked
+    def read_range(self, remote_file, offset, size):
+        """[offset, offset + size) 구간 읽기 - readv로 32KB 요청을 파이프라인으로 보냄 (블로킹)"""
+        if size <= 0:
+            return b''
+        return b''.join(remote_file.readv([(offset, size)]))
+    
+    def read_view(self, remote_file, file_size, offset=0, length=None, lines=None, tail=None, end=None):
+        """파일 일부를 읽어 (시작 오프셋, 데이터) 반환 (블로킹 - sftp_executor에서 호출)
+        
+        tail: end(기본: 파일 끝) 앞의 마지막 tail줄 - 끝에서부터 블록 단위로 거꾸로 읽음
+        lines: offset부터 lines줄
+        그 외: offset부터 length 바이트
+        어느 경우든 FILE_VIEW_MAX_BYTES까지만 읽으므로 비용은 파일 크기가 아니라 보는 양에 비례
+        """
+        if tail is not None:
+            stop = file_size if end is None else max(0, min(end, file_size))
+            start = stop
+            data = b''
+            while start > 0 and stop - start < FILE_VIEW_MAX_BYTES:
+                size = min(FILE_VIEW_BLOCK, start, FILE_VIEW_MAX_BYTES - (stop - start))
+                start -= size
+                data = self.read_range(remote_file, start, size) + data
+                # 마지막 바이트의 줄바꿈은 마지막 줄의 끝이므로 줄 구분으로 세지 않음
+                if data.count(b'\n', 0, len(data) - 1) >= tail:
+                    break
+            cut = len(data) - 1
+            for _ in range(tail):
+                cut = data.rfind(b'\n', 0, cut)
+                if cut < 0:
+                    break
+            if cut >= 0:
+                start += cut + 1
+                data = data[cut + 1:]
+            return start, data
+        
+        offset = max(0, min(offset, file_size))
+        if lines is None:
+            size = min(length or FILE_VIEW_MAX_BYTES, FILE_VIEW_MAX_BYTES, file_size - offset)
+            return offset, self.read_range(remote_file, offset, size)
+        
+        stop = min(file_size, offset + FILE_VIEW_MAX_BYTES)
+        data = b''
+        while offset + len(data) < stop:
+            position = offset + len(data)
+            data += self.read_range(remote_file, position, min(FILE_VIEW_BLOCK, stop - position))
+            cut = -1
+            for _ in range(lines):
+                cut = data.find(b'\n', cut + 1)
+                if cut < 0:
+                    break
+            if cut >= 0:
+                return offset, data[:cut + 1]
+        return offset, data
+    
+    async def stream_file(self, remote_file, start, stop):
+        """원격 파일의 [start, stop) 구간을 윈도우 단위로 스트리밍
+        
+        윈도우마다 readv로 32KB 읽기 요청을 한꺼번에 보내 파이프라인으로 받고,
+        현재 윈도우를 전송하는 동안 다음 윈도우를 미리 읽어 둠 (메모리는 최대 2개 윈도우)
+        """
+        def read_window(offset):
+            size = min(SFTP_DOWNLOAD_WINDOW, stop - offset)
+            self.last_activity = time.monotonic()
+            with self.lock:
+                return b''.join(remote_file.readv([(offset, size)]))
+        
+        offset = start
+        pending = sftp_executor.submit(read_window, offset) if offset < stop else None
+        try:
+            while pending:
+                data = await asyncio.wrap_future(pending)
+                pending = None
+                if not data:
+                    break
+                offset += len(data)
+                if offset < stop:
+                    pending = sftp_executor.submit(read_window, offset)
+                SFTP_TRANSFER_BYTES.inc(len(data), "download")
+                yield data
+        finally:
+            # 클라이언트가 중간에 끊어도 진행 중인 읽기가 끝난 뒤 파일을 닫음
+            def close_file(in_flight):
+                if in_flight:
+                    concurrent.futures.wait([in_flight])
+                self.close_file(remote_file)
+            sftp_executor.submit(close_file, pending)
     
-    def delete_file(self, remote_path, is_directory=False):
+    @sftp_locked
+    def delete_file(self, remote_path, is_directory=False, recursive=False):
         if not self.connected or not self.sftp:
             return False
         
         try:
             # Prevent going above home directory
             full_remote_path = self.sftp.normalize(remote_path)
-            if not full_remote_path.startswith(self.home_dir):
+            if not within_home(full_remote_path, self.home_dir) or full_remote_path == self.home_dir:
                 return False
+            self.listings.invalidate(full_remote_path)
             
-            if is_directory:
+            if is_directory and recursive:
+                # 원격 셸이 있으면 rm -rf 한 번으로 처리 (파일마다 왕복하지 않음)
+                if run_remote_command(self.client, f"rm -rf -- {shlex.quote(full_remote_path)}")[0] != 0:
+                    self._remove_tree(full_remote_path)
+            elif is_directory:
                 self.sftp.rmdir(full_remote_path)
             else:
                 self.sftp.remove(full_remote_path)
             
             return True
         except Exception as e:
-            print(f"파일 삭제 실패: {e}")
+            log(logging.WARNING, "파일 삭제 실패", path=remote_path, error=e)
             return False
     
-    def create_directory(self, remote_path):
+    def _remove_tree(self, path):
+        """SFTP만으로 디렉토리 트리 삭제 (rm을 쓸 수 없을 때)"""
+        for entry in self.sftp.listdir_attr(path):
+            child = posixpath.join(path, entry.filename)
+            if stat.S_ISDIR(entry.st_mode):
+                self._remove_tree(child)
+            else:
+                self.sftp.remove(child)
+        self.sftp.rmdir(path)
+    
+    @sftp_locked
+    def create_directory(self, remote_path, parents=False):
         if not self.connected or not self.sftp:
             return False
         
         try:
             # Prevent going above home directory
             full_remote_path = self.sftp.normalize(remote_path)
-            if not full_remote_path.startswith(self.home_dir):
+            if not within_home(full_remote_path, self.home_dir):
                 return False
             
-            self.sftp.mkdir(full_remote_path)
+            self.listings.invalidate(full_remote_path, ancestors=parents)
+            if parents:
+                make_remote_dirs(self.sftp, full_remote_path)
+            else:
+                self.sftp.mkdir(full_remote_path)
             return True
         except Exception as e:
-            print(f"디렉토리 생성 실패: {e}")
+            log(logging.WARNING, "디렉토리 생성 실패", path=remote_path, error=e)
+            return False
+    
+    def busy(self):
+        """백그라운드 작업(전송 작업, 색인, 사용량 계산)이 이 세션을 쓰는 중인지"""
+        return (
+            any(job.session is self and job.state in ("pending", "running") for job in transfer_jobs.values())
+            or bool(self.index and self.index.building)
+            or any(job.state in ("pending", "running") for job in self.disk_usage.values())
+        )
+    
+    def resources(self):
+        now = time.monotonic()
+        return {
+            "kind": "sftp",
+            "state": "connected" if self.connected else "closed",
+            "transport_active": bool(self.conn and self.conn.active),
+            "idle": round(now - self.last_activity, 1),
+            "age": round(now - self.created, 1),
+            "busy": self.busy(),
+            "connection_channels": self.conn.refs if self.conn else 0,
+            "open_uploads": len(self.upload_paths),
+            "cached_listings": len(self.listings.entries),
+            "index_entries": len(self.index.snapshot) if self.index and self.index.snapshot else 0,
+            "disk_usage_jobs": len(self.disk_usage),
+        }
+    
+    def disconnect(self):
+        self.connected = False
+        if self.index:
+            self.index.cancel()
+        for job in self.disk_usage.values():
+            job.cancel()
+        if self.sftp:
+            self.sftp.close()
+            self.sftp = None
+        if self.conn:
+            transport_pool.release(self.conn)
+            self.conn = None
+
+# 전송 작업 설정
+TRANSFER_MAX_CHANNELS = int(os.environ.get("TRANSFER_MAX_CHANNELS", "4"))  # 작업당 SFTP 채널 수 상한
+TRANSFER_MAX_ERRORS = 100  # 작업당 보관하는 오류 메시지 수
+
+class TransferCancelled(Exception):
+    pass
+
+def safe_local_path(path):
+    """서버 측 경로를 서버 루트(작업 디렉토리) 안으로 제한 - 벗어나면 None"""
+    safe_path = os.path.abspath(path)
+    server_root = os.path.abspath(".")
+    if safe_path != server_root and not safe_path.startswith(server_root + os.sep):
+        return None
+    return safe_path
+
+# 델타 업로드 (원격 파일과 다른 블록만 전송) 설정
+DELTA_BLOCK_SIZE = int(os.environ.get("DELTA_BLOCK_SIZE", str(128 * 1024)))  # 비교 단위 블록 크기
+DELTA_MIN_SIZE = int(os.environ.get("DELTA_MIN_SIZE", str(256 * 1024)))      # 동기화 작업에서 이보다 작은 파일은 통째로 전송
+DELTA_BLOCK_MIN = 4 * 1024
+DELTA_BLOCK_MAX = 8 * 1024 * 1024
+DELTA_SEARCH_BYTES = int(os.environ.get("DELTA_SEARCH_BYTES", str(1024 * 1024)))  # 파일당 한 바이트씩 굴려 가며 블록을 찾는 최대 바이트 수 (초당 1~2MB 정도)
+DELTA_ABORT_WAIT = 5.0  # 중단할 때 원격 조립 스크립트가 임시 파일을 지우고 끝날 때까지 기다리는 시간 (초)
+
+# 원격에서 블록별 (Adler-32, SHA-1)을 계산해 해시만 돌려받는 스크립트 (python3가 없으면 SFTP로 읽어서 계산)
+DELTA_SIGNATURE_SCRIPT = (
+    "import hashlib,sys,zlib\n"
+    "f=open(sys.argv[1],'rb')\n"
+    "b=int(sys.argv[2])\n"
+    "for d in iter(lambda:f.read(b),b''):sys.stdout.write('%08x'%zlib.adler32(d)+hashlib.sha1(d).hexdigest()+'\\n')\n"
+)
+
+# 표준 입력의 명령(L: 리터럴 바이트, C: 기존 파일 구간 복사, E: 끝 + 전체 SHA-256)으로 임시 파일을 조립하고
+# 해시가 맞으면 원래 이름으로 바꾸는 스크립트 - 입력이 중간에 끊기거나 해시가 다르면 임시 파일만 지움
+DELTA_APPLY_SCRIPT = (
+    "import hashlib,os,signal,stat,struct,sys\n"
+    "signal.signal(signal.SIGHUP,signal.SIG_IGN)\n"
+    "path,tmp=sys.argv[1],sys.argv[2]\n"
+    "r=sys.stdin.buffer\n"
+    "def read(n):\n"
+    " d=r.read(n)\n"
+    " if len(d)!=n:raise EOFError('truncated input')\n"
+    " return d\n"
+    "try:\n"
+    " src=open(path,'rb')\n"
+    " out=open(tmp,'wb')\n"
+    " h=hashlib.sha256()\n"
+    " while True:\n"
+    "  op,a,b=struct.unpack('>cQQ',read(17))\n"
+    "  if op==b'L':\n"
+    "   while a:\n"
+    "    d=read(min(a,1<<20));out.write(d);h.update(d);a-=len(d)\n"
+    "  elif op==b'C':\n"
+    "   src.seek(a)\n"
+    "   while b:\n"
+    "    d=src.read(min(b,1<<20))\n"
+    "    if not d:raise EOFError('source range missing')\n"
+    "    out.write(d);h.update(d);b-=len(d)\n"
+    "  elif op==b'E':\n"
+    "   if h.digest()!=read(32) or out.tell()!=a:raise ValueError('hash mismatch')\n"
+    "   out.flush();os.fsync(out.fileno());out.close()\n"
+    "   os.chmod(tmp,stat.S_IMODE(os.fstat(src.fileno()).st_mode))\n"
+    "   os.replace(tmp,path)\n"
+    "   print('ok',flush=True)\n"
+    "   break\n"
+    "  else:raise ValueError('bad op')\n"
+    "except BaseException as e:\n"
+    " if os.path.exists(tmp):os.unlink(tmp)\n"
+    " print('error',e,flush=True)\n"
+    " sys.exit(1)\n"
+)
+
+def parse_block_signature(line):
+    """'Adler-32(8자리 hex) + SHA-1(hex)' 줄 → (약한 해시, 강한 해시)"""
+    raw = bytes.fromhex(line.decode())
+    if len(raw) != 24:
+        raise ValueError(f"잘못된 블록 해시: {line!r}")
+    return int.from_bytes(raw[:4], "big"), raw[4:]
+
+def block_signature(data):
+    return zlib.adler32(data), hashlib.sha1(data).digest()
+
+def roll_search(data, start, stop, block, a, b, table):
+    """data[start:start + block] 창의 Adler-32 (a, b)에서 시작해 한 바이트씩 밀면서 table에 있는 약한 해시를 찾음
+    
+    찾은 창의 시작 위치와 (a, b) 반환 - 못 찾으면 stop 위치의 값 (stop + block <= len(data))
+    """
+    p = start
+    while p < stop:
+        out = data[p]
+        a = (a - out + data[p + block]) % 65521
+        b = (b - block * out + a - 1) % 65521
+        p += 1
+        if (b << 16 | a) in table:
+            return p, a, b
+    return p, a, b
+
+def remote_command_lines(session, command, cancel):
+    """원격 명령 출력 줄 목록 - 종료 코드가 0이 아니면 None (블로킹)"""
+    reader = RemoteFieldReader(session, command, separator=b"\n")
+    try:
+        lines = list(reader.fields(cancel))
+    finally:
+        status = reader.close()
+    return lines if status == 0 else None
+
+def remote_block_signatures(session, path, size, block_size, cancel):
+    """원격 python3로 계산한 블록별 (Adler-32, SHA-1) 목록 (쓸 수 없으면 None)"""
+    command = f"python3 -c {shlex.quote(DELTA_SIGNATURE_SCRIPT)} {shlex.quote(path)} {block_size}"
+    try:
+        lines = remote_command_lines(session, command, cancel)
+        signatures = [parse_block_signature(line) for line in lines] if lines is not None else None
+    except (paramiko.SSHException, ValueError) as e:
+        log(logging.DEBUG, "원격 블록 해시 계산 실패", path=path, error=e)
+        return None
+    # 계산하는 사이에 파일이 바뀌었으면 믿을 수 없음
+    if signatures is None or len(signatures) != -(-size // block_size):
+        return None
+    return signatures
+
+def remote_sha256(session, path, cancel):
+    """원격 sha256sum 결과 (쓸 수 없으면 None)"""
+    try:
+        lines = remote_command_lines(session, f"sha256sum -- {shlex.quote(path)}", cancel)
+    except paramiko.SSHException as e:
+        log(logging.DEBUG, "원격 전체 해시 계산 실패", path=path, error=e)
+        return None
+    if not lines:
+        return None
+    digest = lines[0].split(b" ", 1)[0].decode(errors="replace").lstrip("\\")
+    return digest if len(digest) == 64 else None
+
+def read_remote_hashes(sftp, path, block_size, cancel, whole=False):
+    """SFTP로 원격 파일을 읽어 (블록별 (Adler-32, SHA-1) 목록, 전체 SHA-256) 계산 (블로킹)
+
+    원격 명령을 쓸 수 없을 때만 사용 - 파일 전체를 내려받으므로 느림
+    """
+    signatures = []
+    digest = hashlib.sha256() if whole else None
+    window = max(block_size, SFTP_DOWNLOAD_WINDOW // block_size * block_size)
+    with sftp.open(path, 'rb') as remote_file:
+        size = remote_file.stat().st_size
+        for offset in range(0, size, window):
+            if cancel.is_set():
+                raise TransferCancelled()
+            data = b''.join(remote_file.readv([(offset, min(window, size - offset))]))
+            SFTP_TRANSFER_BYTES.inc(len(data), "delta_read")
+            if digest:
+                digest.update(data)
+            else:
+                for start in range(0, len(data), block_size):
+                    signatures.append(block_signature(data[start:start + block_size]))
+    return signatures, digest.hexdigest() if digest else None
+
+class DeltaUpload:
+    """rsync처럼 원격 파일에 이미 있는 블록은 위치만 알려주고 나머지 바이트만 보내는 업로드 (블로킹 - 워커 스레드에서 호출)
+
+    1. 기존 원격 파일의 블록별 (Adler-32, SHA-1) 목록을 구함 (원격 python3, 안 되면 SFTP로 읽어서 계산)
+    2. 들어오는 데이터에서 블록 크기 창의 Adler-32를 한 바이트씩 굴려 가며 원격 블록을 찾고(SHA-1로 확인)
+       찾은 블록은 원격 오프셋에서 복사, 그 사이 바이트는 리터럴로 보냄 - 바이트가 끼어들거나 빠져도
+       그 뒤 블록은 다시 찾아 복사됨 (한 바이트씩 찾는 양은 파일당 DELTA_SEARCH_BYTES까지, 넘으면 블록 단위로만 비교)
+    3. 같은 디렉토리의 임시 파일에 조립해서 전체 SHA-256을 확인한 뒤 원래 이름으로 바꿈
+       (중간에 실패/취소되면 임시 파일만 지우므로 원격 파일은 이전 내용 그대로)
+    원격 python3가 있으면 복사/리터럴 명령을 exec 채널로 보내 원격에서 조립하고, 없으면 SFTP로 임시 파일에 쓰면서
+    복사할 구간은 기존 파일에서 읽어 옴. sftp를 주지 않으면 업로드 전용 채널을 세션 연결 위에 따로 엶
+    """
+    def __init__(self, session, path, block_size=DELTA_BLOCK_SIZE, sftp=None, cancel=None, verify=True):
+        self.session = session
+        self.path = path
+        self.temp_path = posixpath.join(posixpath.dirname(path), f".{posixpath.basename(path)}.delta-{secrets.token_hex(4)}")
+        self.block_size = max(DELTA_BLOCK_MIN, min(int(block_size), DELTA_BLOCK_MAX))
+        self.verify = verify
+        self.cancel = cancel or threading.Event()
+        self.sftp = sftp
+        self.own_channel = sftp is None
+        self.conn = None  # own_channel일 때 채널을 연 풀 연결
+        self.file = None     # SFTP로 조립할 때의 임시 파일
+        self.source = None   # SFTP로 조립할 때 복사할 구간을 읽는 기존 파일 (별도 채널)
+        self.source_conn = None
+        self.source_sftp = None
+        self.apply = None    # 원격에서 조립할 때의 exec 채널 (RemoteFieldReader)
+        self.mode = None
+        self.old_size = 0
+        self.committed = False
+        self.signatures = []
+        self.index = {}      # 약한 해시 → 블록 크기가 온전한 원격 블록 번호 목록
+        self.signature_method = None
+        self.apply_method = None
+        self.verify_method = None
+        self.digest = hashlib.sha256()
+        self.buffer = bytearray()
+        self.window = None   # buffer 맨 앞 창의 Adler-32 (a, b) - 굴리는 중일 때만
+        self.literal = bytearray()
+        self.copy = None     # 이어 붙일 복사 구간 (원격 오프셋, 길이)
+        self.searched = 0
+        self.copied_blocks = 0
+        self.size = 0
+        self.sent = 0
+        self.matched = 0
+        self.started = time.monotonic()
+        self.timings = {}
+
+    def open(self):
+        if self.own_channel:
+            self.conn = transport_pool.retain(self.session.conn)
+            try:
+                self.sftp = self.conn.client.open_sftp()
+            except Exception:
+                transport_pool.release(self.conn)
+                raise
+        start = time.monotonic()
+        try:
+            attr = self.sftp.stat(self.path)
+        except IOError:
+            attr = None
+        if attr is not None and not stat.S_ISREG(attr.st_mode or 0):
+            raise ValueError(f"일반 파일이 아닙니다: {self.path}")
+        if attr is not None:
+            self.mode = stat.S_IMODE(attr.st_mode)
+            self.old_size = attr.st_size
+        if attr is not None and attr.st_size:
+            self.signatures = remote_block_signatures(self.session, self.path, attr.st_size, self.block_size, self.cancel)
+            self.signature_method = "exec"
+            if self.signatures is None:
+                self.signatures, _ = read_remote_hashes(self.sftp, self.path, self.block_size, self.cancel)
+                self.signature_method = "sftp"
+            full_blocks = attr.st_size // self.block_size
+            for index, (weak, _) in enumerate(self.signatures[:full_blocks]):
+                self.index.setdefault(weak, []).append(index)
+        self.timings["signature"] = round(time.monotonic() - start, 3)
+        if self.signature_method == "exec":
+            try:
+                self.apply = RemoteFieldReader(
+                    self.session,
+                    f"python3 -c {shlex.quote(DELTA_APPLY_SCRIPT)} {shlex.quote(self.path)} {shlex.quote(self.temp_path)}",
+                    separator=b"\n", keep_stdin=True
+                )
+                self.apply_method = "exec"
+                return
+            except ChannelLimitError as e:
+                log(logging.DEBUG, "원격 조립 채널을 열 수 없어 SFTP로 조립", path=self.path, error=e)
+        self.file = self.sftp.open(self.temp_path, 'wb')
+        self.apply_method = "sftp"
+        pipelined = True
+        if self.signatures:
+            # 파이프라인 쓰기 중인 채널에서 다른 요청의 응답을 읽으면 쓰기 응답이 버려져 멈추므로 채널을 따로 엶
+            try:
+                self.source_conn = transport_pool.retain(self.session.conn)
+            except ChannelLimitError:
+                # 채널 상한이면 같은 채널에서 읽되 쓰기는 응답을 기다리며 하나씩
+                pipelined = False
+            else:
+                try:
+                    self.source_sftp = self.source_conn.client.open_sftp()
+                except Exception:
+                    transport_pool.release(self.source_conn)
+                    self.source_conn = None
+                    raise
+            self.source = (self.source_sftp or self.sftp).open(self.path, 'rb')
+        self.file.set_pipelined(pipelined)
+
+    def write(self, data):
+        self.digest.update(data)
+        self.size += len(data)
+        self.buffer += data
+        self._scan()
+
+    def _scan(self):
+        if not self.index:
+            # 비교할 원격 블록이 없음 - 모두 리터럴
+            self._literal(self.buffer)
+            self.buffer = bytearray()
+            return
+        buffer = self.buffer
+        block = self.block_size
+        position = literal_start = 0
+        while len(buffer) - position >= block:
+            if self.window is None:
+                weak = zlib.adler32(buffer[position:position + block])
+                a, b = weak & 0xffff, weak >> 16
+            else:
+                a, b = self.window
+            index = self._find(buffer, position, b << 16 | a)
+            if index is not None:
+                self._literal(buffer[literal_start:position])
+                self._copy(index)
+                position = literal_start = position + block
+                self.window = None
+                continue
+            if self.searched < DELTA_SEARCH_BYTES:
+                stop = min(len(buffer) - block, position + block, position + DELTA_SEARCH_BYTES - self.searched)
+                if stop <= position:
+                    # 다음 바이트가 아직 도착하지 않음 - 이어서 굴리도록 창 값을 남김
+                    self.window = (a, b)
+                    break
+                found, a, b = roll_search(buffer, position, stop, block, a, b, self.index)
+                self.searched += found - position
+                position = found
+                self.window = (a, b)
+            else:
+                position += block
+                self.window = None
+            if position - literal_start >= SFTP_UPLOAD_CHUNK:
+                self._literal(buffer[literal_start:position])
+                literal_start = position
+        # 리터럴로 보낸 앞부분은 버림
+        self._literal(buffer[literal_start:position])
+        del buffer[:position]
+
+    def _find(self, buffer, position, weak):
+        candidates = self.index.get(weak)
+        if not candidates:
+            return None
+        strong = hashlib.sha1(buffer[position:position + self.block_size]).digest()
+        for index in candidates:
+            if self.signatures[index][1] == strong:
+                return index
+        return None
+
+    def _literal(self, data):
+        if not data:
+            return
+        self._flush_copy()
+        self.literal += data
+        self.sent += len(data)
+        if len(self.literal) >= SFTP_UPLOAD_CHUNK:
+            self._flush_literal()
+
+    def _copy(self, index, length=None):
+        length = length or self.block_size
+        offset = index * self.block_size
+        self.copied_blocks += 1
+        self.matched += length
+        self._flush_literal()
+        if self.copy and self.copy[0] + self.copy[1] == offset:
+            self.copy = (self.copy[0], self.copy[1] + length)
+        else:
+            self._flush_copy()
+            self.copy = (offset, length)
+
+    def _flush_literal(self):
+        if not self.literal:
+            return
+        if self.cancel.is_set():
+            raise TransferCancelled()
+        if self.apply:
+            self.apply.send(struct.pack('>cQQ', b'L', len(self.literal), 0) + self.literal, self.cancel)
+        else:
+            self.file.write(bytes(self.literal))
+        SFTP_TRANSFER_BYTES.inc(len(self.literal), "delta_upload")
+        self.literal = bytearray()
+
+    def _flush_copy(self):
+        if not self.copy:
+            return
+        offset, length = self.copy
+        self.copy = None
+        if self.apply:
+            self.apply.send(struct.pack('>cQQ', b'C', offset, length), self.cancel)
+            return
+        # 원격 조립을 쓸 수 없으면 기존 파일에서 읽어서 임시 파일에 씀 (원격 ↔ 서버 왕복)
+        window = max(self.block_size, SFTP_DOWNLOAD_WINDOW // self.block_size * self.block_size)
+        for start in range(offset, offset + length, window):
+            if self.cancel.is_set():
+                raise TransferCancelled()
+            data = b''.join(self.source.readv([(start, min(window, offset + length - start))]))
+            SFTP_TRANSFER_BYTES.inc(len(data), "delta_read")
+            self.file.write(data)
+
+    def finish(self):
+        """남은 데이터를 보내고 임시 파일을 확인한 뒤 원래 이름으로 바꿈 - 결과 반환"""
+        tail = bytes(self.buffer)
+        self.buffer = bytearray()
+        # 원격 마지막 블록이 블록 크기보다 짧으면 길이까지 같아야 복사
+        if tail and self.old_size % self.block_size == len(tail) and self.signatures[-1] == block_signature(tail):
+            self._copy(len(self.signatures) - 1, len(tail))
+        else:
+            self._literal(tail)
+        self._flush_literal()
+        self._flush_copy()
+        if self.apply:
+            self.apply.send(struct.pack('>cQQ', b'E', self.size, 0) + self.digest.digest(), self.cancel)
+            self.apply.end_input()
+            lines = list(self.apply.fields(self.cancel))
+            status = self.apply.close()
+            self.apply = None
+            if status != 0:
+                raise ValueError(f"원격에서 파일 조립 실패: {b' '.join(lines).decode(errors='replace') or status}")
+            self.verify_method = "exec"
+        else:
+            # 파이프라인 쓰기 결과는 close에서 확인됨
+            self.file.close()
+            self.file = None
+            if self.verify:
+                start = time.monotonic()
+                actual = remote_sha256(self.session, self.temp_path, self.cancel)
+                self.verify_method = "exec"
+                if actual is None:
+                    _, actual = read_remote_hashes(self.sftp, self.temp_path, self.block_size, self.cancel, whole=True)
+                    self.verify_method = "sftp"
+                self.timings["verify"] = round(time.monotonic() - start, 3)
+                if actual != self.digest.hexdigest():
+                    raise ValueError(f"업로드 후 원격 파일 해시가 다릅니다: {self.path}")
+            if self.mode is not None:
+                self.sftp.chmod(self.temp_path, self.mode)
+            try:
+                self.sftp.posix_rename(self.temp_path, self.path)
+            except IOError:
+                # posix-rename 확장이 없는 서버 - SFTP v3 rename은 대상이 있으면 실패하므로 지우고 바꿈
+                if self.mode is not None:
+                    self.sftp.remove(self.path)
+                self.sftp.rename(self.temp_path, self.path)
+        self.committed = True
+        return self.result()
+
+    def close(self):
+        """끝나지 않았으면 임시 파일을 지움 (원격 파일은 그대로)"""
+        if self.apply:
+            # 입력을 끝(E) 없이 닫으면 원격 스크립트가 임시 파일을 지우고 종료
+            try:
+                self.apply.end_input()
+                self.apply.channel.status_event.wait(DELTA_ABORT_WAIT)
+            except Exception as e:
+                log(logging.DEBUG, "델타 업로드 원격 조립 중단 실패", path=self.path, error=e)
+            self.apply.close()
+            self.apply = None
+        for remote_file in (self.file, self.source):
+            if remote_file:
+                try:
+                    remote_file.close()
+                except Exception as e:
+                    log(logging.DEBUG, "델타 업로드 파일 닫기 실패", path=self.path, error=e)
+        self.file = self.source = None
+        if self.source_sftp:
+            self.source_sftp.close()
+            self.source_sftp = None
+        if self.source_conn:
+            transport_pool.release(self.source_conn)
+            self.source_conn = None
+        if not self.committed and self.apply_method == "sftp" and self.sftp:
+            try:
+                self.sftp.remove(self.temp_path)
+            except IOError:
+                pass
+        if self.own_channel and self.sftp:
+            self.sftp.close()
+            self.sftp = None
+            transport_pool.release(self.conn)
+
+    def result(self):
+        self.timings["total"] = round(time.monotonic() - self.started, 3)
+        blocks = -(-self.size // self.block_size)
+        return {
+            "path": self.path,
+            "size": self.size,
+            "block_size": self.block_size,
+            "blocks": blocks,
+            "copied_blocks": self.copied_blocks,
+            "changed_blocks": max(0, blocks - self.copied_blocks),
+            "bytes_sent": self.sent,
+            "bytes_matched": self.matched,
+            "bytes_searched": self.searched,
+            "saved_ratio": round(self.matched / self.size, 4) if self.size else 0,
+            "signature_method": self.signature_method,
+            "apply_method": self.apply_method,
+            "verify_method": self.verify_method,
+            "sha256": self.digest.hexdigest(),
+            "seconds": self.timings,
+        }
+
+class TransferJob:
+    """서버 ↔ 원격 간 디렉토리/다중 파일 전송 작업
+    
+    - 여러 SFTP 채널(같은 Transport 위)에서 동시에 전송
+    - 크기순으로 정렬한 큐의 양 끝에서 꺼내므로 큰 파일과 작은 파일이 함께 진행됨
+      (짝수 번 워커는 가장 큰 파일, 홀수 번 워커는 가장 작은 파일부터)
+    - use_tar: 작은 파일이 아주 많을 때 원격 tar를 exec해서 하나의 스트림으로 전송
+    - sync (업로드): 원격에 크기와 수정 시각이 같은 파일이 있으면 건너뛰고,
+      다르면 DeltaUpload로 바뀐 블록만 전송한 뒤 수정 시각을 맞춤
+      (checksum이면 크기/수정 시각이 같아도 블록 해시로 비교 - 초 단위 수정 시각이 우연히 같을 때 대비)
+    """
+    def __init__(self, job_id, sftp_session, direction, sources, destination,
+                 channels=TRANSFER_MAX_CHANNELS, use_tar=False, sync=False, checksum=False):
+        self.job_id = job_id
+        self.session = sftp_session
+        self.direction = direction
+        self.sources = sources
+        self.destination = destination
+        self.channels = max(1, min(int(channels), TRANSFER_MAX_CHANNELS))
+        self.use_tar = use_tar
+        self.sync = sync
+        self.checksum = checksum
+        self.state = "pending"
+        self.files_total = None
+        self.files_done = 0
+        self.bytes_total = None
+        self.bytes_done = 0
+        self.files_skipped = 0
+        self.bytes_skipped = 0
+        self.errors = []
+        self.started = None
+        self.finished = None
+        self.remote_root = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._channel_conns = {}  # 작업 전용 SFTP 채널 → 그 채널이 열린 풀 연결
+    
+    def start(self):
+        threading.Thread(target=self.run, name=f"transfer-{self.job_id}", daemon=True).start()
+    
+    def cancel(self):
+        self._cancel.set()
+    
+    def snapshot(self):
+        elapsed = ((self.finished or time.monotonic()) - self.started) if self.started else 0
+        return {
+            "id": self.job_id,
+            "direction": self.direction,
+            "state": self.state,
+            "channels": self.channels,
+            "tar": self.use_tar,
+            "sync": self.sync,
+            "files_total": self.files_total,
+            "files_done": self.files_done,
+            "files_skipped": self.files_skipped,
+            "bytes_total": self.bytes_total,
+            "bytes_done": self.bytes_done,
+            "bytes_sent": self.bytes_done - self.bytes_skipped,
+            "bytes_per_sec": round(self.bytes_done / elapsed) if elapsed > 0 else 0,
+            "elapsed": round(elapsed, 2),
+            "errors": self.errors[-10:],
+            "error_count": len(self.errors),
+        }
+    
+    def run(self):
+        self.started = time.monotonic()
+        self.state = "running"
+        try:
+            if self.use_tar:
+                self._run_tar()
+            else:
+                self._run_parallel()
+            self.state = "failed" if self.errors else "done"
+        except TransferCancelled:
+            self.state = "cancelled"
+        except Exception as e:
+            self._error(f"{e}")
+            self.state = "failed"
+        finally:
+            if self.direction == "upload" and self.remote_root:
+                self.session.listings.invalidate(self.remote_root, ancestors=True)
+            self.finished = time.monotonic()
+    
+    def _check_cancel(self):
+        if self._cancel.is_set():
+            raise TransferCancelled()
+    
+    def _error(self, message):
+        with self._lock:
+            if len(self.errors) < TRANSFER_MAX_ERRORS:
+                self.errors.append(message)
+    
+    def _add_bytes(self, size, skipped=False):
+        """진행한 바이트 추가 - skipped는 원격과 같아서 보내지 않은 바이트"""
+        with self._lock:
+            self.bytes_done += size
+            if skipped:
+                self.bytes_skipped += size
+        if size > 0 and not skipped:
+            # 재시도로 되돌린 바이트는 빼지 않음 (카운터는 실제로 오간 바이트)
+            SFTP_TRANSFER_BYTES.inc(size, f"job_{self.direction}")
+    
+    def _remote_path(self, sftp, path):
+        full_path = sftp.normalize(path)
+        if not within_home(full_path, self.session.home_dir):
+            raise ValueError(f"홈 디렉토리 밖의 경로입니다: {path}")
+        return full_path
+    
+    def _local_path(self, path):
+        full_path = safe_local_path(path)
+        if full_path is None:
+            raise ValueError(f"서버 루트 밖의 경로입니다: {path}")
+        return full_path
+    
+    def _open_channel(self):
+        """작업 전용 SFTP 채널 - 세션의 풀 연결(상한이면 같은 계정의 다른 연결) 위에 추가로 염"""
+        conn = transport_pool.retain(self.session.conn)
+        try:
+            sftp = conn.client.open_sftp()
+        except Exception:
+            transport_pool.release(conn)
+            raise
+        self._channel_conns[sftp] = conn
+        return sftp
+    
+    def _close_channel(self, sftp):
+        sftp.close()
+        transport_pool.release(self._channel_conns.pop(sftp))
+    
+    # 병렬 SFTP 전송
+    def _plan_download(self, sftp):
+        dest_root = self._local_path(self.destination)
+        dirs, files = [dest_root], []
+        for source in self.sources:
+            source = self._remote_path(sftp, source)
+            target = os.path.join(dest_root, posixpath.basename(source))
+            attr = sftp.stat(source)
+            if not stat.S_ISDIR(attr.st_mode):
+                files.append((source, target, attr.st_size))
+                continue
+            pending = [(source, target)]
+            while pending:
+                self._check_cancel()
+                remote_dir, local_dir = pending.pop()
+                dirs.append(local_dir)
+                for entry in sftp.listdir_attr(remote_dir):
+                    remote_child = posixpath.join(remote_dir, entry.filename)
+                    local_child = os.path.join(local_dir, entry.filename)
+                    if stat.S_ISDIR(entry.st_mode):
+                        pending.append((remote_child, local_child))
+                    elif stat.S_ISREG(entry.st_mode):
+                        files.append((remote_child, local_child, entry.st_size))
+        for directory in dirs:
+            os.makedirs(directory, exist_ok=True)
+        return files
+    
+    def _plan_upload(self, sftp):
+        dest_root = self.remote_root = self._remote_path(sftp, self.destination)
+        dirs, files = [dest_root], []
+        for source in self.sources:
+            source = self._local_path(source)
+            target = posixpath.join(dest_root, os.path.basename(source))
+            if not os.path.isdir(source):
+                files.append((source, target, os.path.getsize(source)))
+                continue
+            for local_dir, subdirs, filenames in os.walk(source):
+                self._check_cancel()
+                relative = os.path.relpath(local_dir, source)
+                remote_dir = target if relative == '.' else posixpath.join(target, *relative.split(os.sep))
+                dirs.append(remote_dir)
+                for filename in filenames:
+                    local_file = os.path.join(local_dir, filename)
+                    files.append((local_file, posixpath.join(remote_dir, filename), os.path.getsize(local_file)))
+        for directory in dirs:
+            make_remote_dirs(sftp, directory)
+        return files
+    
+    def _run_parallel(self):
+        channels = [self._open_channel()]
+        try:
+            if self.direction == "download":
+                files = self._plan_download(channels[0])
+            else:
+                files = self._plan_upload(channels[0])
+            self.files_total = len(files)
+            self.bytes_total = sum(size for _, _, size in files)
+            
+            # 앞쪽이 큰 파일, 뒤쪽이 작은 파일
+            queue = deque(sorted(files, key=lambda item: item[2], reverse=True))
+            count = min(self.channels, len(files))
+            if self.sync:
+                # 동기화는 파일마다 원격 해시 계산/조립용 exec 채널이 하나 더 필요하므로 그만큼 남겨 둠
+                count = max(1, min(count, (transport_pool.spare(self.session.conn) + 1) // 2))
+            for _ in range(count - 1):
+                try:
+                    channels.append(self._open_channel())
+                except ChannelLimitError as e:
+                    # 채널 상한이면 이미 연 채널만으로 전송
+                    log(logging.DEBUG, "전송 채널 추가 중단", job=self.job_id, channels=len(channels), error=e)
+                    break
+            
+            workers = [
+                threading.Thread(target=self._worker, args=(index, sftp, queue), daemon=True)
+                for index, sftp in enumerate(channels)
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            self._check_cancel()
+        finally:
+            for sftp in channels:
+                self._close_channel(sftp)
+    
+    def _worker(self, index, sftp, queue):
+        while not self._cancel.is_set():
+            with self._lock:
+                if not queue:
+                    return
+                source, target, size = queue.popleft() if index % 2 == 0 else queue.pop()
+            
+            sent = 0
+            def callback(transferred, total):
+                nonlocal sent
+                self._add_bytes(transferred - sent)
+                sent = transferred
+                self._check_cancel()
+            
+            try:
+                # get은 prefetch로 읽기를, put은 파이프라인 쓰기를 사용
+                if self.direction == "download":
+                    sftp.get(source, target, callback=callback)
+                elif self.sync:
+                    self._sync_file(sftp, source, target, size, callback)
+                else:
+                    sftp.put(source, target, callback=callback)
+                with self._lock:
+                    self.files_done += 1
+            except TransferCancelled:
+                return
+            except Exception as e:
+                self._add_bytes(-sent)
+                self._error(f"{source}: {e}")
+    
+    def _sync_file(self, sftp, source, target, size, callback):
+        """원격과 다른 부분만 올리고 수정 시각을 로컬과 맞춤"""
+        local_stat = os.stat(source)
+        try:
+            remote_attr = sftp.stat(target)
+        except IOError:
+            remote_attr = None
+        if (not self.checksum and remote_attr is not None and remote_attr.st_size == size
+                and remote_attr.st_mtime == int(local_stat.st_mtime)):
+            with self._lock:
+                self.files_skipped += 1
+            self._add_bytes(size, skipped=True)
+            return
+        
+        if remote_attr is None or (size < DELTA_MIN_SIZE and not self.checksum):
+            sftp.put(source, target, callback=callback)
+        else:
+            upload = DeltaUpload(self.session, target, sftp=sftp, cancel=self._cancel)
+            sent = matched = 0
+            def account():
+                nonlocal sent, matched
+                self._add_bytes(upload.sent - sent)
+                self._add_bytes(upload.matched - matched, skipped=True)
+                sent, matched = upload.sent, upload.matched
+            try:
+                upload.open()
+                with open(source, 'rb') as local_file:
+                    for data in iter(functools.partial(local_file.read, SFTP_UPLOAD_CHUNK), b''):
+                        self._check_cancel()
+                        upload.write(data)
+                        account()
+                upload.finish()
+                account()
+            except Exception:
+                # 실패한 파일의 진행률은 되돌림
+                self._add_bytes(-sent)
+                self._add_bytes(-matched, skipped=True)
+                raise
+            finally:
+                upload.close()
+        sftp.utime(target, (local_stat.st_atime, local_stat.st_mtime))
+    
+    # tar 스트림 전송
+    def _run_tar(self):
+        sftp = self._open_channel()
+        try:
+            if self.direction == "download":
+                dest_root = self._local_path(self.destination)
+                os.makedirs(dest_root, exist_ok=True)
+                sources = [self._remote_path(sftp, source) for source in self.sources]
+            else:
+                dest_root = self.remote_root = self._remote_path(sftp, self.destination)
+                make_remote_dirs(sftp, dest_root)
+                sources = [self._local_path(source) for source in self.sources]
+        finally:
+            self._close_channel(sftp)
+        
+        # tar exec 채널도 채널 상한에 포함 (한 번에 하나씩 열고 닫음)
+        conn = transport_pool.retain(self.session.conn)
+        try:
+            self._tar_stream(conn.client, dest_root, sources)
+        finally:
+            transport_pool.release(conn)
+    
+    def _tar_stream(self, client, dest_root, sources):
+        if self.direction == "download":
+            for source in sources:
+                parent, name = posixpath.split(source)
+                command = f"tar -cf - -C {shlex.quote(parent)} -- {shlex.quote(name)}"
+                stdin, stdout, stderr = client.exec_command(command)
+                stdin.close()
+                try:
+                    with tarfile.open(fileobj=stdout, mode='r|') as tar:
+                        for member in tar:
+                            self._check_cancel()
+                            # data 필터: 경로 탈출, 장치 파일, 위험한 링크 차단
+                            tar.extract(member, dest_root, filter='data')
+                            if member.isfile():
+                                self.files_done += 1
+                                self._add_bytes(member.size)
+                finally:
+                    stdout.channel.close()
+                status = stdout.channel.recv_exit_status()
+                if status != 0:
+                    self._error(f"{source}: tar 종료 코드 {status} {stderr.read().decode(errors='replace').strip()}")
+        else:
+            command = f"tar -xf - -C {shlex.quote(dest_root)}"
+            stdin, stdout, stderr = client.exec_command(command)
+            try:
+                with tarfile.open(fileobj=stdin, mode='w|') as tar:
+                    for source in sources:
+                        base = os.path.dirname(source)
+                        for local_dir, subdirs, filenames in os.walk(source) if os.path.isdir(source) else [(base, [], [os.path.basename(source)])]:
+                            if local_dir != base:
+                                tar.add(local_dir, arcname=os.path.relpath(local_dir, base), recursive=False)
+                            for filename in filenames:
+                                self._check_cancel()
+                                local_file = os.path.join(local_dir, filename)
+                                tar.add(local_file, arcname=os.path.relpath(local_file, base), recursive=False)
+                                self.files_done += 1
+                                self._add_bytes(os.path.getsize(local_file))
+                stdin.channel.shutdown_write()
+                status = stdout.channel.recv_exit_status()
+                if status != 0:
+                    self._error(f"tar 종료 코드 {status} {stderr.read().decode(errors='replace').strip()}")
+            finally:
+                stdin.channel.close()
+
+# 작업 ID → 전송 작업
+transfer_jobs: Dict[str, TransferJob] = {}
+
+# 원격 디렉토리 색인 설정
+INDEX_MAX_ENTRIES = int(os.environ.get("INDEX_MAX_ENTRIES", "2000000"))  # 색인 하나의 최대 항목 수 (넘으면 거기까지만 색인)
+INDEX_MAX_AGE = float(os.environ.get("INDEX_MAX_AGE", "60"))             # 검색할 때 이보다 오래된 색인은 백그라운드에서 갱신 (초)
+INDEX_SFTP_CHANNELS = int(os.environ.get("INDEX_SFTP_CHANNELS", "4"))    # find를 쓸 수 없을 때 동시에 디렉토리를 읽는 SFTP 채널 수
+INDEX_SEARCH_LIMIT = 200        # 기본 검색 결과 수
+INDEX_SEARCH_MAX = 5000         # 최대 검색 결과 수
+INDEX_FULL_RESCAN_DIRS = 2000   # 바뀐 디렉토리가 이보다 많으면 부분 갱신 대신 전체를 다시 읽음
+# find 출력 형식: 종류, 크기, mtime, 경로를 NUL로 구분 (이름에 줄바꿈/탭이 있어도 안전)
+FIND_ENTRY_FORMAT = "%y\\0%s\\0%T@\\0%p\\0"
+FIND_DIR_FORMAT = "%T@\\0%p\\0"
+
+def mode_kind(mode):
+    """st_mode → find -printf %y 형식의 종류 문자"""
+    if stat.S_ISDIR(mode):
+        return "d"
+    if stat.S_ISLNK(mode):
+        return "l"
+    if stat.S_ISREG(mode):
+        return "f"
+    return "o"
+
+class RemoteFieldReader:
+    """원격 명령의 출력을 구분자(기본 NUL) 단위 필드로 읽음 (블로킹)
+    
+    세션 연결 위에 exec 채널을 따로 열므로 터미널/SFTP 채널을 막지 않음.
+    keep_stdin이면 표준 입력을 열어 두고 send()로 이어서 보낸 뒤 end_input()으로 닫음
+    """
+    def __init__(self, session, command, stdin_data=None, separator=b"\0", keep_stdin=False):
+        self.separator = separator
+        self.conn = transport_pool.retain(session.conn)
+        try:
+            self.channel = self.conn.client.get_transport().open_session()
+            self.channel.exec_command(command)
+            if stdin_data:
+                self.channel.sendall(stdin_data)
+            if not keep_stdin:
+                self.channel.shutdown_write()
+            # 취소 여부를 주기적으로 확인할 수 있도록 읽기 대기에 제한 시간을 둠
+            self.channel.settimeout(1.0)
+        except Exception:
+            transport_pool.release(self.conn)
+            raise
+        self.eof = False
+        self.cancel = None
+    
+    def fields(self, cancel):
+        self.cancel = cancel
+        pending = b""
+        while True:
+            if cancel.is_set():
+                raise TransferCancelled()
+            try:
+                data = self.channel.recv(256 * 1024)
+            except socket.timeout:
+                continue
+            if not data:
+                self.eof = True
+                return
+            parts = (pending + data).split(self.separator)
+            pending = parts.pop()
+            yield from parts
+    
+    def send(self, data, cancel):
+        """표준 입력으로 전송 - 원격이 느려 창이 닫혀 있으면 취소를 확인하며 기다림"""
+        view = memoryview(data)
+        while view:
+            if cancel.is_set():
+                raise TransferCancelled()
+            try:
+                view = view[self.channel.send(bytes(view[:256 * 1024])):]
+            except socket.timeout:
+                continue
+    
+    def end_input(self):
+        self.channel.shutdown_write()
+    
+    def close(self):
+        """채널을 닫고 종료 코드 반환 (출력을 끝까지 읽지 않았거나 기다리는 중 취소되면 -1)
+        
+        sshd는 보통 출력 EOF를 보낸 뒤에 종료 코드를 보내므로 EOF까지 읽었으면 종료 코드가 올 때까지 기다림
+        """
+        status = -1
+        if self.eof:
+            while not self.channel.status_event.wait(0.2):
+                if self.cancel is not None and self.cancel.is_set():
+                    break
+            if self.channel.exit_status_ready():
+                status = self.channel.recv_exit_status()
+        self.channel.close()
+        transport_pool.release(self.conn)
+        return status
+
+def walk_remote_dirs(session, roots, visit, channels, cancel):
+    """디렉토리들을 여러 SFTP 채널에서 동시에 방문 (블로킹)
+    
+    visit(sftp, path, mtime)은 이어서 방문할 (하위 디렉토리, mtime 또는 None) 목록을 반환.
+    채널은 세션 연결 위에 최대 channels개를 미리 추가로 열고(채널 상한이면 연 만큼만) 끝나면 닫음
+    """
+    opened = []  # (풀 연결, SFTP 채널)
+    try:
+        for _ in range(max(1, channels)):
+            conn = transport_pool.retain(session.conn)
+            try:
+                opened.append((conn, conn.client.open_sftp()))
+            except Exception:
+                transport_pool.release(conn)
+                raise
+    except ChannelLimitError as e:
+        if not opened:
+            raise
+        log(logging.DEBUG, "디렉토리 탐색 채널 추가 중단", channels=len(opened), error=e)
+    except Exception:
+        for conn, sftp in opened:
+            sftp.close()
+            transport_pool.release(conn)
+        raise
+    # 워커 수가 채널 수와 같으므로 작업을 시작할 때 쉬는 채널이 항상 하나 이상 있음
+    idle = deque(sftp for _, sftp in opened)
+    
+    def run(path, mtime):
+        if cancel.is_set():
+            raise TransferCancelled()
+        sftp = idle.pop()
+        try:
+            return visit(sftp, path, mtime)
+        finally:
+            idle.append(sftp)
+    
+    executor = ThreadPoolExecutor(max_workers=len(opened), thread_name_prefix="sftp-walk")
+    pending = set()
+    try:
+        pending = {executor.submit(run, path, mtime) for path, mtime in roots}
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                for path, mtime in future.result():
+                    pending.add(executor.submit(run, path, mtime))
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+        for conn, sftp in opened:
+            sftp.close()
+            transport_pool.release(conn)
+
+def fold_name(name):
+    """검색용 소문자 이름 - 원래 이름과 길이가 같아야 하므로 길이가 바뀌는 문자가 있으면 그대로 둠"""
+    folded = name.lower()
+    return folded if len(folded) == len(name) else name
+
+class IndexSnapshot:
+    """색인 한 벌 - 다 만든 뒤에는 바꾸지 않고 갱신 시 통째로 교체하므로 검색할 때 잠금이 필요 없음
+    
+    항목마다 객체를 만들지 않고 이름은 줄바꿈으로 이어 붙인 문자열 하나에, 나머지는 배열에 저장.
+    부분 일치/접두어 검색은 소문자 이름 문자열에 대한 str.find 반복이라 수백만 항목도 수 ms 안에 끝남
+    """
+    def __init__(self):
+        self.dirs = {}               # 디렉토리 경로 → (mtime, 첫 항목 번호, 끝 항목 번호)
+        self.dir_paths = []          # 디렉토리 번호 → 경로
+        self.parents = array("I")    # 항목 번호 → 디렉토리 번호
+        self.kinds = bytearray()     # 항목 번호 → 종류 (d, f, l, o)
+        self.sizes = array("q")
+        self.mtimes = array("q")
+        self.starts = array("Q", [1])  # 항목 번호 → 이름 시작 위치 (마지막 값은 끝 위치)
+        self.names = ""              # "\n이름\n이름\n..."
+        self.folded = ""             # 같은 위치의 소문자 이름
+        self.truncated = False       # INDEX_MAX_ENTRIES에서 끊김 - 디렉토리 목록이 일부만 있을 수 있음
+        self._parts = ["\n"]
+        self._length = 1
+    
+    def __len__(self):
+        return len(self.kinds)
+    
+    def add_directory(self, path, mtime, entries):
+        """디렉토리 하나의 항목 추가 - entries: (이름, 종류, 크기, mtime)"""
+        dir_id = len(self.dir_paths)
+        self.dir_paths.append(path)
+        first = len(self.kinds)
+        for name, kind, size, entry_mtime in entries:
+            name = name.replace("\n", "�") + "\n"
+            self._parts.append(name)
+            self._length += len(name)
+            self.starts.append(self._length)
+            self.parents.append(dir_id)
+            self.kinds.append(ord(kind))
+            self.sizes.append(size)
+            self.mtimes.append(entry_mtime)
+        self.dirs[path] = (mtime, first, len(self.kinds))
+    
+    def copy_directory(self, old, path):
+        """바뀌지 않은 디렉토리의 항목을 이전 색인에서 그대로 복사"""
+        mtime, first, end = old.dirs[path]
+        dir_id = len(self.dir_paths)
+        self.dir_paths.append(path)
+        new_first = len(self.kinds)
+        segment = old.names[old.starts[first]:old.starts[end]]
+        self._parts.append(segment)
+        shift = self._length - old.starts[first]
+        self.starts.extend(start + shift for start in old.starts[first + 1:end + 1])
+        self._length += len(segment)
+        self.parents.extend([dir_id] * (end - first))
+        self.kinds += old.kinds[first:end]
+        self.sizes += old.sizes[first:end]
+        self.mtimes += old.mtimes[first:end]
+        self.dirs[path] = (mtime, new_first, len(self.kinds))
+    
+    def subdirectories(self, path):
+        _, first, end = self.dirs[path]
+        return [
+            posixpath.join(path, self.name(i)) for i in range(first, end) if self.kinds[i] == ord("d")
+        ]
+    
+    def finish(self):
+        self.names = "".join(self._parts)
+        self.folded = "".join(fold_name(part) for part in self._parts)
+        if self.folded == self.names:
+            # 대문자가 없으면 같은 문자열을 공유해서 메모리 절약
+            self.folded = self.names
+        self._parts = None
+        return self
+    
+    def name(self, i):
+        if self._parts is not None:
+            raise RuntimeError("색인을 만드는 중입니다")
+        return self.names[self.starts[i]:self.starts[i + 1] - 1]
+    
+    def entry(self, i):
+        kind = chr(self.kinds[i])
+        return {
+            "name": self.name(i),
+            "path": posixpath.join(self.dir_paths[self.parents[i]], self.name(i)),
+            "type": "directory" if kind == "d" else "file",
+            "symlink": kind == "l",
+            "size": self.sizes[i],
+            "modified": self.mtimes[i],
+        }
+    
+    def search(self, query, prefix=False, kind=None, under=None, limit=INDEX_SEARCH_LIMIT):
+        """이름 부분 일치(prefix=True면 접두어) 검색, 대소문자 무시 - (결과, 더 있는지) 반환"""
+        needle = ("\n" if prefix else "") + fold_name(query)
+        skip = 1 if prefix else 0
+        under = under.rstrip("/") + "/" if under else None
+        results = []
+        position = self.folded.find(needle)
+        while position >= 0:
+            i = bisect.bisect_right(self.starts, position + skip) - 1
+            if ((kind is None or (self.kinds[i] == ord("d")) == (kind == "directory"))
+                    and (under is None or (self.dir_paths[self.parents[i]] + "/").startswith(under))):
+                if len(results) >= limit:
+                    return results, True
+                results.append(self.entry(i))
+            # 같은 이름 안의 다음 일치는 건너뛰고 다음 이름부터
+            position = self.folded.find(needle, self.starts[i + 1] - skip)
+        return results, False
+
+class RemoteIndex:
+    """SFTP 세션의 원격 디렉토리 트리 파일 이름 색인
+    
+    백그라운드 스레드에서 원격 find 한 번(스트리밍)으로 만들고, find -printf를 쓸 수 없으면
+    여러 SFTP 채널로 동시에 디렉토리를 읽음. 갱신할 때는 디렉토리 mtime이 바뀐 디렉토리만 다시 읽음
+    (디렉토리 mtime은 항목 추가/삭제/이름 변경 때만 바뀌므로 바뀌지 않은 디렉토리의 파일 크기/시각은 이전 값)
+    """
+    def __init__(self, session, root):
+        self.session = session
+        self.root = root
+        self.snapshot = None
+        self.state = "pending"
+        self.method = None
+        self.error = None
+        self.truncated = False
+        self.built_at = None
+        self.build_seconds = None
+        self.scanned = 0
+        self.dirs_listed = 0
+        self.dirs_reused = 0
+        self._thread = None
+        self._cancel = threading.Event()
+    
+    def refresh(self):
+        """색인 만들기/갱신 시작 (이미 진행 중이면 무시)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._cancel.clear()
+        self._thread = threading.Thread(target=self._run, name=f"index-{self.root}", daemon=True)
+        self._thread.start()
+    
+    def cancel(self):
+        self._cancel.set()
+    
+    @property
+    def building(self):
+        return bool(self._thread and self._thread.is_alive())
+    
+    def stale(self):
+        return self.built_at is not None and time.monotonic() - self.built_at > INDEX_MAX_AGE
+    
+    def status(self):
+        snapshot = self.snapshot
+        return {
+            "root": self.root,
+            "state": self.state,
+            "building": self.building,
+            "method": self.method,
+            "entries": len(snapshot) if snapshot else 0,
+            "directories": len(snapshot.dirs) if snapshot else 0,
+            "scanned": self.scanned,
+            "dirs_listed": self.dirs_listed,
+            "dirs_reused": self.dirs_reused,
+            "truncated": self.truncated,
+            "age": round(time.monotonic() - self.built_at, 1) if self.built_at else None,
+            "build_seconds": self.build_seconds,
+            "error": self.error,
+        }
+    
+    def _run(self):
+        started = time.monotonic()
+        self.state = "building" if self.snapshot is None else "refreshing"
+        self.scanned = self.dirs_listed = self.dirs_reused = 0
+        self.truncated = False
+        # 상한에서 끊긴 색인은 어느 디렉토리를 다 못 읽었는지 모르는데 mtime은 실제 값으로 남아 있으므로
+        # 재사용하면 덜 읽은 목록이 계속 복사됨 - 이전 색인 없이 전체를 다시 읽음
+        old = self.snapshot if self.snapshot is not None and not self.snapshot.truncated else None
+        try:
+            snapshot = None
+            if self.method != "sftp":
+                snapshot = self._build_with_find(old)
+            if snapshot is None:
+                snapshot = self._build_with_sftp(old)
+            snapshot.truncated = self.truncated
+            self.snapshot = snapshot.finish()
+            self.built_at = time.monotonic()
+            self.build_seconds = round(self.built_at - started, 3)
+            self.state = "ready"
+            self.error = None
+            log(logging.INFO, "원격 색인 완료", root=self.root, method=self.method, entries=len(snapshot),
+                listed=self.dirs_listed, reused=self.dirs_reused, elapsed=self.build_seconds)
+        except TransferCancelled:
+            self.state = "cancelled"
+        except Exception as e:
+            log(logging.WARNING, "원격 색인 실패", root=self.root, error=e)
+            self.error = str(e)
+            self.state = "failed" if self.snapshot is None else "ready"
+    
+    def _count(self, entries):
+        self.scanned += entries
+        if self.scanned > INDEX_MAX_ENTRIES:
+            self.truncated = True
             return False
+        return True
+    
+    # find -printf 한 번으로 읽기
+    def _find(self, paths, fmt, fields, extra="", stdin_paths=None):
+        """find 출력을 fields개씩 묶어서 반환 - -printf를 지원하지 않으면 None"""
+        if stdin_paths is None:
+            command = f"find {' '.join(shlex.quote(path) for path in paths)} {extra} -printf {shlex.quote(fmt)} 2>/dev/null"
+            stdin_data = None
+        else:
+            # 디렉토리가 많아도 명령줄 길이 제한에 걸리지 않도록 표준 입력으로 넘김
+            inner = f"exec find \"$@\" {extra} -printf {shlex.quote(fmt)} 2>/dev/null"
+            command = f"xargs -0 -r sh -c {shlex.quote(inner)} sh"
+            stdin_data = b"".join(path.encode() + b"\0" for path in stdin_paths)
+        reader = RemoteFieldReader(self.session, command, stdin_data)
+        records = []
+        try:
+            record = []
+            for field in reader.fields(self._cancel):
+                record.append(field)
+                if len(record) == fields:
+                    records.append(record)
+                    record = []
+                    if fields == 4 and not self._count(1):
+                        break
+        finally:
+            status = reader.close()
+        # 시작 경로 자체가 항상 출력되므로 출력이 없으면 -printf를 지원하지 않는 find
+        # (권한 없는 하위 디렉토리가 있으면 종료 코드가 1이므로 종료 코드로는 판단하지 않음)
+        if not records and stdin_paths is None:
+            return None
+        return records
+    
+    def _build_with_find(self, old):
+        decode = lambda value: value.decode("utf-8", errors="replace")
+        if old is not None:
+            dirs = self._find([self.root], FIND_DIR_FORMAT, 2, extra="-type d")
+            if dirs is None:
+                return None
+            mtimes = {decode(path): int(float(mtime)) for mtime, path in dirs}
+            changed = [path for path, mtime in mtimes.items() if path not in old.dirs or old.dirs[path][0] != mtime]
+            if len(changed) <= INDEX_FULL_RESCAN_DIRS:
+                records = self._find([], FIND_ENTRY_FORMAT, 4, extra="-mindepth 1 -maxdepth 1",
+                                     stdin_paths=changed) if changed else []
+                if records is None:
+                    return None
+                self.method = "find"
+                return self._assemble(old, mtimes, set(changed), records, decode)
+        
+        records = self._find([self.root], FIND_ENTRY_FORMAT, 4)
+        if records is None:
+            return None
+        self.method = "find"
+        mtimes = {
+            decode(path): int(float(mtime)) for kind, size, mtime, path in records if kind == b"d"
+        }
+        return self._assemble(None, mtimes, set(mtimes), records, decode)
+    
+    def _assemble(self, old, mtimes, changed, records, decode):
+        children = {path: [] for path in changed}
+        for kind, size, mtime, path in records:
+            path = decode(path)
+            if path == self.root:
+                continue
+            parent, _, name = path.rpartition("/")
+            parent = parent or "/"
+            if parent in children:
+                children[parent].append((name, chr(kind[0]) if kind[:1] in (b"d", b"f", b"l") else "o",
+                                         int(size), int(float(mtime))))
+        snapshot = IndexSnapshot()
+        for path, mtime in mtimes.items():
+            if path in changed:
+                snapshot.add_directory(path, mtime, children[path])
+                self.dirs_listed += 1
+            else:
+                snapshot.copy_directory(old, path)
+                self.dirs_reused += 1
+        return snapshot
+    
+    # 여러 SFTP 채널로 동시에 디렉토리 읽기
+    def _build_with_sftp(self, old):
+        self.method = "sftp"
+        listed = {}
+        lock = threading.Lock()
+        
+        def visit(sftp, path, mtime):
+            try:
+                if mtime is None:
+                    mtime = int(sftp.stat(path).st_mtime or 0)
+                if old is not None and old.dirs.get(path, (None,))[0] == mtime:
+                    with lock:
+                        listed[path] = (mtime, None)
+                    return [(child, None) for child in old.subdirectories(path)]
+                # 작은 디렉토리가 대부분이라 READDIR을 미리 여러 개 보내는 listdir_iter보다 listdir_attr가 빠름
+                entries = [
+                    (attr.filename, mode_kind(attr.st_mode or 0), attr.st_size or 0, int(attr.st_mtime or 0))
+                    for attr in sftp.listdir_attr(path)
+                ]
+            except IOError as e:
+                log(logging.DEBUG, "색인 중 디렉토리 읽기 실패", path=path, error=e)
+                return []
+            with lock:
+                if not self._count(len(entries)):
+                    return []
+                listed[path] = (mtime, entries)
+            return [(posixpath.join(path, name), entry_mtime) for name, kind, _, entry_mtime in entries if kind == "d"]
+        
+        walk_remote_dirs(self.session, [(self.root, None)], visit, INDEX_SFTP_CHANNELS, self._cancel)
+        snapshot = IndexSnapshot()
+        for path, (mtime, entries) in listed.items():
+            if entries is None:
+                snapshot.copy_directory(old, path)
+                self.dirs_reused += 1
+            else:
+                snapshot.add_directory(path, mtime, entries)
+                self.dirs_listed += 1
+        return snapshot
+
+# 원격 디스크 사용량 계산 설정
+DU_SFTP_CHANNELS = int(os.environ.get("DU_SFTP_CHANNELS", "4"))  # du를 쓸 수 없을 때 동시에 디렉토리를 읽는 SFTP 채널 수
+DU_CHILDREN_LIMIT = 500  # 하위 디렉토리 목록 기본 개수
+
+class DiskUsageJob:
+    """원격 디렉토리의 하위 디렉토리별 사용량 계산 (백그라운드 스레드)
+    
+    du: 원격 `du -k -x` 출력을 스트리밍으로 읽음 - 하위 디렉토리가 먼저 끝나므로 도착한 크기는 최종 값
+        (디스크 블록 기준, 진행률은 끝난 최상위 하위 디렉토리 비율)
+    sftp: du 출력이 없으면 여러 SFTP 채널로 동시에 디렉토리를 읽어 파일 크기(apparent size)를 합산
+          (읽은 파일 크기를 바로 모든 상위 디렉토리에 더하므로 진행 중에는 지금까지의 합계)
+    끝난 결과는 세션에 남아 있어 하위 디렉토리를 원격에 다시 요청하지 않고 바로 조회
+    """
+    def __init__(self, session, root, method="auto"):
+        self.session = session
+        self.root = root
+        self.requested_method = method
+        self.method = None
+        self.state = "pending"
+        self.error = None
+        self.sizes = {}     # 디렉토리 경로 → 바이트
+        self.children = {}  # 디렉토리 경로 → 하위 디렉토리 경로 목록
+        self.dirs_done = 0
+        self.dirs_found = 1
+        self.top_level = None
+        self.top_done = 0
+        self.current = None
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+    
+    def start(self):
+        threading.Thread(target=self.run, name=f"du-{self.root}", daemon=True).start()
+    
+    def cancel(self):
+        self._cancel.set()
+    
+    def snapshot(self):
+        elapsed = ((self.finished or time.monotonic()) - self.started) if self.started else 0
+        if self.state == "done":
+            progress = 1.0
+        elif self.method == "du":
+            progress = round(self.top_done / self.top_level, 3) if self.top_level else None
+        else:
+            progress = round(self.dirs_done / self.dirs_found, 3)
+        return {
+            "root": self.root,
+            "state": self.state,
+            "method": self.method,
+            "size": self.sizes.get(self.root),
+            "directories": self.dirs_done,
+            "progress": progress,
+            "current": self.current,
+            "elapsed": round(elapsed, 2),
+            "error": self.error,
+        }
+    
+    def view(self, path, limit=DU_CHILDREN_LIMIT):
+        """디렉토리 하나의 크기와 큰 순서로 정렬한 하위 디렉토리 (진행 중이면 지금까지의 값)"""
+        with self._lock:
+            size = self.sizes.get(path)
+            children = [(child, self.sizes.get(child, 0)) for child in self.children.get(path, ())]
+        children.sort(key=lambda item: item[1], reverse=True)
+        return {
+            "path": path,
+            "size": size,
+            "complete": self.state == "done",
+            # 디렉토리 자체와 그 안의 파일이 차지하는 크기 (하위 디렉토리 제외)
+            "files_size": size - sum(child_size for _, child_size in children) if size is not None else None,
+            "children": [
+                {"name": posixpath.basename(child), "path": child, "size": child_size}
+                for child, child_size in children[:limit]
+            ],
+            "children_total": len(children),
+        }
+    
+    def run(self):
+        self.started = time.monotonic()
+        self.state = "running"
+        try:
+            if self.requested_method == "sftp" or not self._run_du():
+                if self.requested_method == "du":
+                    raise RuntimeError("원격에서 du를 실행할 수 없습니다")
+                self._run_sftp()
+            self.state = "done"
+            log(logging.INFO, "디스크 사용량 계산 완료", root=self.root, method=self.method,
+                size=self.sizes.get(self.root), directories=self.dirs_done)
+        except TransferCancelled:
+            self.state = "cancelled"
+        except Exception as e:
+            log(logging.WARNING, "디스크 사용량 계산 실패", root=self.root, error=e)
+            self.error = str(e)
+            self.state = "failed"
+        finally:
+            self.finished = time.monotonic()
+    
+    def _add_child(self, path):
+        if path != self.root:
+            self.children.setdefault(posixpath.dirname(path), []).append(path)
+    
+    def _run_du(self):
+        """du 출력("KB\t경로" 줄)으로 계산 - 출력이 없으면 False"""
+        # 진행률 계산용 최상위 하위 디렉토리 수
+        conn = transport_pool.retain(self.session.conn)
+        try:
+            sftp = conn.client.open_sftp()
+            try:
+                self.top_level = sum(1 for attr in sftp.listdir_attr(self.root) if stat.S_ISDIR(attr.st_mode or 0))
+            finally:
+                sftp.close()
+        except IOError as e:
+            log(logging.DEBUG, "최상위 디렉토리 목록 실패", path=self.root, error=e)
+        finally:
+            transport_pool.release(conn)
+        
+        reader = RemoteFieldReader(self.session, f"du -k -x -- {shlex.quote(self.root)} 2>/dev/null", separator=b"\n")
+        try:
+            for line in reader.fields(self._cancel):
+                size, _, path = line.partition(b"\t")
+                if not path or not size.isdigit():
+                    continue
+                path = path.decode("utf-8", errors="replace")
+                with self._lock:
+                    self.method = "du"
+                    self.sizes[path] = int(size) * 1024
+                    self._add_child(path)
+                    self.dirs_done += 1
+                    self.current = path
+                    if posixpath.dirname(path) == self.root and path != self.root:
+                        self.top_done += 1
+        finally:
+            reader.close()
+        return self.method == "du"
+    
+    def _run_sftp(self):
+        self.method = "sftp"
+        self.sizes = {self.root: 0}
+        self.children = {}
+        
+        def visit(sftp, path, mtime):
+            try:
+                attrs = sftp.listdir_attr(path)
+            except IOError as e:
+                log(logging.DEBUG, "사용량 계산 중 디렉토리 읽기 실패", path=path, error=e)
+                attrs = []
+            own = sum(attr.st_size or 0 for attr in attrs if not stat.S_ISDIR(attr.st_mode or 0))
+            subdirs = [posixpath.join(path, attr.filename) for attr in attrs if stat.S_ISDIR(attr.st_mode or 0)]
+            with self._lock:
+                for subdir in subdirs:
+                    self.sizes[subdir] = 0
+                    self._add_child(subdir)
+                # 파일 크기를 바로 모든 상위 디렉토리에 더해서 진행 중에도 합계를 볼 수 있게 함
+                ancestor = path
+                while True:
+                    self.sizes[ancestor] += own
+                    if ancestor == self.root:
+                        break
+                    ancestor = posixpath.dirname(ancestor)
+                self.dirs_done += 1
+                self.dirs_found += len(subdirs)
+                self.current = path
+            return [(subdir, None) for subdir in subdirs]
+        
+        walk_remote_dirs(self.session, [(self.root, None)], visit, DU_SFTP_CHANNELS, self._cancel)
+
+# 세션 관리
+sessions = {}
+sftp_sessions = {}
+
+# 세션 레지스트리 - 여러 워커(uvicorn --workers)에서 세션을 소유한 워커로 요청 전달
+# memory: 단일 워커 (전달 없음), local: 같은 호스트의 워커들이 유닉스 소켓으로 요청 전달
+SESSION_REGISTRY = os.environ.get("SESSION_REGISTRY", "memory")
+# local: 소유 기록/워커 소켓 디렉토리 (워커 간 공유) - 기본은 사용자 전용 런타임 디렉토리
+REGISTRY_DIR = os.environ.get("REGISTRY_DIR") or os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), f"term-registry-{os.getuid()}"
+)
+WORKERS = int(os.environ.get("WORKERS", "1"))               # python main.py 실행 시 워커 프로세스 수
+REGISTRY_SCOPE_KEYS = (
+    "type", "asgi", "http_version", "method", "scheme", "path", "raw_path", "query_string",
+    "root_path", "headers", "client", "server", "subprotocols"
+)
+
+class MemoryRegistry:
+    """단일 워커용 - 모든 세션을 이 프로세스가 소유하므로 전달할 곳이 없음"""
+    backend = "memory"
+    
+    def __init__(self):
+        self.owned = set()
+        self.forwarded_in = 0
+        self.forwarded_out = 0
+    
+    def claim(self, key):
+        self.owned.add(key)
+    
+    def release(self, key):
+        self.owned.discard(key)
+    
+    def owner(self, key):
+        """다른 워커가 소유한 키면 그 워커의 주소, 아니면 None"""
+        return None
+    
+    def forget(self, key, address):
+        pass
+    
+    async def start(self, handler):
+        pass
+    
+    async def stop(self):
+        self.owned.clear()
+    
+    def stats(self):
+        return {
+            "backend": self.backend,
+            "worker": os.getpid(),
+            "owned": len(self.owned),
+            "forwarded_in": self.forwarded_in,
+            "forwarded_out": self.forwarded_out,
+        }
+
+class LocalSocketRegistry(MemoryRegistry):
+    """같은 호스트의 여러 워커 - 공유 디렉토리에 키별 소유 워커의 소켓 주소를 기록
+    
+    owners/<키 해시>: 소유 워커의 유닉스 소켓 경로 (임시 파일 + rename으로 교체)
+    workers/<pid>.sock: 워커마다 전달받은 요청을 처리하는 유닉스 소켓
+    소켓에 연결되지 않는 기록은 죽은 워커의 것으로 보고 지움.
+    """
+    backend = "local"
+    
+    def __init__(self, directory):
+        super().__init__()
+        self.owners_dir = os.path.join(directory, "owners")
+        self.address = os.path.join(directory, "workers", f"{os.getpid()}.sock")
+        self._private_dir(directory)
+        self._private_dir(self.owners_dir)
+        self._private_dir(os.path.dirname(self.address))
+        self.server = None
+    
+    @staticmethod
+    def _private_dir(path):
+        """이 사용자만 접근할 수 있는 디렉토리 (0700) - 다른 사용자가 만들어 둔 디렉토리면 거부
+        
+        소켓 파일은 만들어진 뒤에 권한을 바꾸므로 디렉토리 권한으로 그 사이의 접근을 막음
+        """
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.lstat(path)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+            raise RuntimeError(f"레지스트리 디렉토리를 쓸 수 없습니다 (다른 사용자 소유이거나 디렉토리가 아님): {path}")
+        if stat.S_IMODE(info.st_mode) != 0o700:
+            os.chmod(path, 0o700)
+    
+    def _record_path(self, key):
+        return os.path.join(self.owners_dir, hashlib.sha1(key.encode()).hexdigest())
+    
+    def _read(self, key):
+        try:
+            with open(self._record_path(key)) as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    def claim(self, key):
+        super().claim(key)
+        path = self._record_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.address)
+        os.replace(tmp_path, path)
+    
+    def release(self, key):
+        super().release(key)
+        if self._read(key) == self.address:
+            self._unlink(key)
+    
+    def _unlink(self, key):
+        try:
+            os.unlink(self._record_path(key))
+        except OSError:
+            pass
+    
+    def owner(self, key):
+        address = self._read(key)
+        return address if address and address != self.address else None
+    
+    def forget(self, key, address):
+        """연결되지 않는 워커의 소유 기록 삭제 - 그 사이 다른 워커가 가져갔으면 유지"""
+        if self._read(key) == address:
+            self._unlink(key)
+        try:
+            # 종료된 워커가 남긴 소켓 파일
+            os.unlink(address)
+        except OSError:
+            pass
+    
+    async def start(self, handler):
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        self.server = await asyncio.start_unix_server(handler, path=self.address)
+        os.chmod(self.address, 0o600)
+    
+    async def stop(self):
+        for key in list(self.owned):
+            self.release(key)
+        if self.server:
+            self.server.close()
+            self.server = None
+        try:
+            os.unlink(self.address)
+        except OSError:
+            pass
+
+def create_registry():
+    if SESSION_REGISTRY == "local":
+        return LocalSocketRegistry(REGISTRY_DIR)
+    return MemoryRegistry()
+
+session_registry = create_registry()
+
+def release_session_id(session_id):
+    """터미널/SFTP 세션이 모두 없어진 ID의 소유 기록 해제"""
+    if session_id not in sessions and session_id not in sftp_sessions:
+        session_registry.release(session_id)
+
+def registry_key(scope):
+    """요청 경로 → 소유 워커를 찾을 레지스트리 키 (세션과 무관한 요청은 None)"""
+    parts = scope["path"].strip("/").split("/")
+    if parts[0] == "ws" and len(parts) == 2:
+        return parts[1]
+    if parts[:2] == ["ws", "sftp"] and len(parts) >= 3:
+        return parts[2]
+    if parts[:2] == ["api", "sessions"] and len(parts) >= 3:
+        return parts[2]
+    if parts[:2] == ["api", "sftp"] and len(parts) >= 4:
+        if parts[2] == "jobs":
+            return f"job:{parts[3]}"
+        if parts[2] == "transfers":
+            # 업로드 진행 상황은 업로드를 처리하는 세션의 워커에 있음
+            query = dict(urllib.parse.parse_qsl(scope.get("query_string", b"").decode()))
+            return query.get("session_id")
+        if parts[2] != "local":
+            return parts[2]
+    return None
+
+def _registry_default(value):
+    # ASGI 메시지의 bytes 값 (본문, 헤더, WebSocket 바이너리 프레임)
+    if isinstance(value, (bytes, bytearray)):
+        return {"$bytes": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"전달할 수 없는 값: {type(value).__name__}")
+
+def _registry_object(obj):
+    if len(obj) == 1 and "$bytes" in obj:
+        return base64.b64decode(obj["$bytes"])
+    return obj
+
+async def read_registry_message(reader):
+    """워커 간 메시지: !I 길이 + JSON (ASGI 메시지 dict, bytes는 base64) - 실행 가능한 데이터는 받지 않음"""
+    try:
+        size = struct.unpack('!I', await reader.readexactly(4))[0]
+        return json.loads(await reader.readexactly(size), object_hook=_registry_object)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    except ValueError as e:
+        log(logging.WARNING, "잘못된 워커 간 메시지", error=e)
+        return None
+
+def write_registry_message(writer, message):
+    data = json.dumps(message, default=_registry_default, separators=(",", ":")).encode()
+    writer.write(struct.pack('!I', len(data)) + data)
+
+async def forward_to_owner(scope, receive, send, reader, writer):
+    """요청(HTTP/WebSocket)의 ASGI 메시지를 소유 워커와 그대로 주고받음"""
+    session_registry.forwarded_out += 1
+    write_registry_message(writer, {key: scope[key] for key in REGISTRY_SCOPE_KEYS if key in scope})
+    
+    async def upstream():
+        try:
+            while True:
+                message = await receive()
+                write_registry_message(writer, message)
+                await writer.drain()
+                if message["type"] in ("http.disconnect", "websocket.disconnect"):
+                    break
+        except (ConnectionError, RuntimeError):
+            pass
+    
+    upstream_task = asyncio.create_task(upstream())
+    try:
+        while (message := await read_registry_message(reader)) is not None:
+            await send(message)
+    finally:
+        upstream_task.cancel()
+        writer.close()
+
+async def serve_forwarded(reader, writer):
+    """다른 워커가 전달한 요청을 이 워커의 앱으로 처리"""
+    session_registry.forwarded_in += 1
+    scope = await read_registry_message(reader)
+    if scope is None:
+        writer.close()
+        return
+    scope["registry_forwarded"] = True
+    disconnect = {"type": "websocket.disconnect", "code": 1006} if scope["type"] == "websocket" else {"type": "http.disconnect"}
+    
+    async def receive():
+        message = await read_registry_message(reader)
+        return disconnect if message is None else message
+    
+    async def send(message):
+        write_registry_message(writer, message)
+        await writer.drain()
+    
+    try:
+        await app(scope, receive, send)
+    except ConnectionError:
+        pass
+    except Exception as e:
+        log(logging.ERROR, "전달된 요청 처리 오류", path=scope["path"], error=e)
+    finally:
+        # 응답 끝은 EOF로 알리고 요청 워커가 먼저 닫을 때까지 남은 메시지를 버림
+        # (바로 닫으면 요청 워커가 보낸 disconnect 때문에 RST가 나가 아직 읽지 않은 응답이 유실됨)
+        try:
+            writer.write_eof()
+            while await reader.read(65536):
+                pass
+        except (ConnectionError, OSError):
+            pass
+        writer.close()
+
+class SessionRoutingMiddleware:
+    """다른 워커가 소유한 세션에 대한 요청을 그 워커로 전달 (소유 워커가 없으면 이 워커가 처리)"""
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket") and not scope.get("registry_forwarded"):
+            key = registry_key(scope)
+            address = session_registry.owner(key) if key else None
+            if address is not None:
+                try:
+                    reader, writer = await asyncio.open_unix_connection(address)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    session_registry.forget(key, address)
+                else:
+                    await forward_to_owner(scope, receive, send, reader, writer)
+                    return
+        await self.app(scope, receive, send)
+
+app.add_middleware(SessionRoutingMiddleware)
+
+# 터미널 WebSocket 수신 메시지 스케줄러 설정
+RESIZE_THROTTLE = float(os.environ.get("RESIZE_THROTTLE", "0.1"))  # 크기 조정을 원격에 적용하는 최소 간격 (초), 0이면 요청마다 적용
+
+class ControlScheduler:
+    """터미널 WebSocket 수신 메시지 처리 순서 조정 (WebSocket 하나당 하나, 이벤트 루프에서만 사용)
+    
+    - 입력(command)은 받는 즉시 채널로 보냄 - 크기 조정 적용이나 응답 전송을 기다리지 않음
+    - 크기 조정은 RESIZE_THROTTLE 간격에 한 번만 원격에 적용 (첫 요청은 바로, 그 사이 요청은 마지막 크기만
+      간격이 끝날 때 적용) - 창 크기를 끄는 동안 SIGWINCH와 전체 화면 다시 그리기가 반복되지 않게 함
+    - 이미 적용한 크기와 같으면 원격에 보내지 않고, 응답은 적용 결과가 이전 응답과 다를 때만 보냄
+    """
+    def __init__(self, ssh_session, send_ack, interval=None):
+        self.session = ssh_session
+        self.send_ack = send_ack  # async (success, cols, rows)
+        self.interval = RESIZE_THROTTLE if interval is None else interval
+        self.pending = None
+        self.timer = None
+        self.applied_at = None
+        self.last_ack = None
+        self.ack_tasks = set()
+    
+    def attach(self, ssh_session):
+        """다른 세션에 다시 연결됨 - 새 클라이언트이므로 응답 기록을 지움"""
+        self.session = ssh_session
+        self.last_ack = None
+    
+    def input(self, data):
+        return self.session.send_command(data)
+    
+    def resize(self, cols, rows):
+        if self.pending is not None:
+            RESIZE_REQUESTS.inc(1, "coalesced")
+        self.pending = (cols, rows)
+        if self.timer is not None:
+            return
+        loop = asyncio.get_running_loop()
+        delay = self.applied_at + self.interval - loop.time() if self.applied_at is not None else 0
+        if delay > 0:
+            self.timer = loop.call_later(delay, self._apply)
+        else:
+            self._apply()
+    
+    def _apply(self):
+        self.timer = None
+        cols, rows = self.pending
+        self.pending = None
+        session = self.session
+        if self.last_ack == (True, cols, rows) and (session.terminal_width, session.terminal_height) == (cols, rows):
+            RESIZE_REQUESTS.inc(1, "unchanged")
+            return
+        self.applied_at = asyncio.get_running_loop().time()
+        success = session.resize_terminal(cols, rows)
+        RESIZE_REQUESTS.inc(1, "applied")
+        result = (success, cols, rows)
+        if result != self.last_ack:
+            self.last_ack = result
+            task = asyncio.create_task(self.send_ack(*result))
+            self.ack_tasks.add(task)
+            task.add_done_callback(self.ack_tasks.discard)
+    
+    def close(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+@app.websocket("/ws/{session_id}")
+async def websocket_endpoint(websocket: WebSocket, session_id: str):
+    await websocket.accept()
+    
+    # 새 SSH 세션 생성 - connect 시 등록 (attach 요청이면 유지 중인 세션으로 교체)
+    ssh_session = SSHSession()
+    # connect 시 클라이언트가 "protocol": "binary"를 요청하면 바이너리 프레임 사용
+    binary = False
+    connect_task = None
+    detach_on_close = False
+    
+    async def send_resize_result(success, cols, rows):
+        try:
+            if binary:
+                await websocket.send_bytes(bytes([OP_RESIZE]) + struct.pack('!BHH', success, cols, rows))
+            else:
+                await websocket.send_text(json.dumps({
+                    "type": "resize_result",
+                    "success": success,
+                    "cols": cols,
+                    "rows": rows
+                }))
+        except Exception as e:
+            log(logging.DEBUG, "크기 조정 응답 전송 실패", session=session_id, error=e)
+    
+    scheduler = ControlScheduler(ssh_session, send_resize_result)
+    
+    async def establish(message):
+        nonlocal binary, detach_on_close
+        success = await ssh_session.connect_async(
+            hostname=message["hostname"],
+            username=message["username"],
+            password=message["password"],
+            port=message.get("port", 22)
+        )
+        
+        binary = success and message.get("protocol") == "binary"
+        ssh_session.compressor = OutputCompressor() if binary and message.get("compression") == "deflate" else None
+        recording = None
+        if success and (RECORD_SESSIONS or message.get("record")):
+            try:
+                recording = ssh_session.start_recording(session_id, RECORD_INPUT or bool(message.get("record_input")))
+            except Exception as e:
+                log(logging.ERROR, "녹화 시작 실패", session=session_id, error=e)
+        await websocket.send_text(json.dumps({
+            "type": "connection_result",
+            "success": success,
+            "protocol": "binary" if binary else "json",
+            "compression": "deflate" if ssh_session.compressor else None,
+            "recording": recording,
+            "attach_token": ssh_session.attach_token if success else None
+        }))
+        
+        if success:
+            # 연결 성공 시 출력 모니터링 시작
+            ssh_session.websocket = websocket
+            ssh_session.start_reading(asyncio.get_running_loop())
+            ssh_session.monitor_task = asyncio.create_task(monitor_output(websocket, ssh_session, binary))
+            detach_on_close = True
+    
+    async def reattach(message):
+        """유지 중인 세션에 다시 연결 - 클라이언트가 받은 오프셋 이후 출력을 재전송한 뒤 실시간 전송"""
+        nonlocal ssh_session, binary, detach_on_close
+        existing = sessions.get(session_id)
+        if existing is None or not existing.channel or existing.closing:
+            await websocket.send_text(json.dumps({"type": "attach_result", "success": False}))
+            return
+        if not existing.check_attach_token(message.get("token")):
+            # 세션 ID는 추측할 수 있으므로 연결할 때 받은 토큰이 있어야 기존 연결을 끊고 스크롤백을 받을 수 있음
+            log(logging.WARNING, "잘못된 토큰으로 재연결 시도", session=session_id)
+            await websocket.send_text(json.dumps({"type": "attach_result", "success": False}))
+            return
+        
+        ssh_session = existing
+        scheduler.attach(ssh_session)
+        binary = message.get("protocol") == "binary"
+        offset, replay = ssh_session.attach(websocket, max(0, int(message.get("offset", 0))))
+        # 클라이언트의 압축 해제 스트림도 새로 시작하므로 압축 컨텍스트를 새로 만듦
+        ssh_session.compressor = OutputCompressor() if binary and message.get("compression") == "deflate" else None
+        await websocket.send_text(json.dumps({
+            "type": "attach_result",
+            "success": True,
+            "protocol": "binary" if binary else "json",
+            "compression": "deflate" if ssh_session.compressor else None,
+            "offset": offset,
+            "connected": ssh_session.connected
+        }))
+        ssh_session.monitor_task = asyncio.create_task(monitor_output(websocket, ssh_session, binary, replay))
+        detach_on_close = True
+    
+    try:
+        while True:
+            # 클라이언트로부터 메시지 받기
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            if frame.get("bytes") is not None:
+                message = decode_binary_frame(frame["bytes"])
+                if message is None:
+                    continue
+            else:
+                message = json.loads(frame["text"])
+            
+            if message["type"] == "connect":
+                # SSH 연결 - 워커 풀에서 진행되는 동안에도 메시지를 계속 받아 WebSocket 종료를 감지
+                if detach_on_close:
+                    # 이미 연결(또는 attach)한 세션이 있음 - 같은 세션에 다시 establish()하면
+                    # 이전 채널, 풀 참조, 읽기 스레드가 정리되지 않고 남으므로 거부
+                    await websocket.send_text(json.dumps({
+                        "type": "connection_result", "success": False, "message": "이미 연결된 세션입니다"
+                    }))
+                    continue
+                if connect_task is None or connect_task.done():
+                    if session_id not in sessions:
+                        try:
+                            supervisor.admit()
+                        except SessionLimitError as e:
+                            await websocket.send_text(json.dumps({
+                                "type": "connection_result", "success": False, "message": str(e)
+                            }))
+                            continue
+                    # 같은 ID로 유지 중인 이전 세션은 종료
+                    previous = sessions.get(session_id)
+                    if previous is not None and previous is not ssh_session:
+                        previous.disconnect()
+                    sessions[session_id] = ssh_session
+                    session_registry.claim(session_id)
+                    connect_task = asyncio.create_task(establish(message))
+            
+            elif message["type"] == "attach":
+                if connect_task is None:
+                    await reattach(message)
+            
+            elif message["type"] == "command":
+                # 명령어 전송
+                scheduler.input(message["data"])
+            
+            elif message["type"] == "resize":
+                # 터미널 크기 조정 - 짧은 간격 안의 요청은 마지막 크기만 적용
+                scheduler.resize(message.get("cols", 80), message.get("rows", 24))
+            
+            elif message["type"] == "disconnect":
+                # 연결 종료 요청
+                log(logging.INFO, "클라이언트 요청으로 세션 종료", session=session_id)
+                ssh_session.disconnect()
+                detach_on_close = False
+                break
+    
+    except WebSocketDisconnect:
+        log(logging.INFO, "WebSocket 연결 종료", session=session_id)
+    except Exception as e:
+        log(logging.ERROR, "WebSocket 오류", session=session_id, error=e)
+    finally:
+        scheduler.close()
+        # 연결 진행 중이면 취소 (소켓을 닫아 워커 스레드 반환)
+        if connect_task and not connect_task.done():
+            connect_task.cancel()
+            detach_on_close = False
+        
+        if ssh_session.websocket is not None and ssh_session.websocket is not websocket:
+            # 다른 WebSocket이 이미 이 세션을 가져감
+            pass
+        elif detach_on_close and DETACH_GRACE_PERIOD > 0 and ssh_session.connected:
+            # 세션은 유지하고 재연결(attach)을 기다림
+            detach_session(session_id, ssh_session)
+        elif sessions.get(session_id) is ssh_session or session_id not in sessions:
+            # 세션 정리
+            ssh_session.disconnect()
+            sessions.pop(session_id, None)
+            release_session_id(session_id)
+
+def detach_session(session_id, ssh_session):
+    """WebSocket이 끊긴 세션을 유예 기간 동안 유지 - 상한을 넘으면 가장 오래된 detach 세션부터 종료"""
+    def expire():
+        if sessions.get(session_id) is ssh_session and ssh_session.detached_at is not None:
+            log(logging.INFO, "재연결 유예 시간 만료로 세션 종료", session=session_id)
+            ssh_session.disconnect()
+            del sessions[session_id]
+            release_session_id(session_id)
+    
+    ssh_session.detach(expire)
+    log(logging.INFO, "WebSocket 없이 세션 유지", session=session_id, grace_seconds=DETACH_GRACE_PERIOD)
+    
+    detached = sorted(
+        (session.detached_at, sid) for sid, session in sessions.items() if session.detached_at is not None
+    )
+    for _, sid in detached[:max(0, len(detached) - DETACHED_SESSIONS_MAX)]:
+        log(logging.WARNING, "detach 세션 수 상한 초과로 세션 종료", session=sid)
+        sessions.pop(sid).disconnect()
+        release_session_id(sid)
+
+async def close_websocket(websocket):
+    try:
+        await websocket.close(code=4000)
+    except Exception:
+        pass
+
+async def close_evicted_websocket(websocket, reason):
+    """세션 점검에서 정리한 터미널의 WebSocket에 이유를 알리고 닫음 (클라이언트는 재연결하지 않음)"""
+    try:
+        await websocket.send_text(json.dumps({"type": "session_evicted", "reason": reason}))
+        await websocket.close(code=SESSION_EVICTED_CLOSE_CODE, reason=reason)
+    except Exception as e:
+        log(logging.DEBUG, "정리 알림 전송 실패", error=e)
+
+# 세션 점검(정리) 설정 - 0이면 해당 정책을 끔
+SUPERVISOR_INTERVAL = float(os.environ.get("SUPERVISOR_INTERVAL", "30"))  # 점검 주기 (초)
+SSH_IDLE_TIMEOUT = float(os.environ.get("SSH_IDLE_TIMEOUT", "0"))         # 입출력이 없는 터미널 세션 종료 (초, 연결된 탭 포함)
+SFTP_IDLE_TIMEOUT = float(os.environ.get("SFTP_IDLE_TIMEOUT", "1800"))    # 요청이 없는 SFTP 세션 종료 (초, 백그라운드 작업 중이면 유지)
+SESSIONS_MAX = int(os.environ.get("SESSIONS_MAX", "500"))                 # 터미널 + SFTP 세션 수 상한
+SESSIONS_MAX_BUFFERED = int(os.environ.get("SESSIONS_MAX_BUFFERED", str(512 * 1024 * 1024)))  # 전체 터미널 출력 버퍼 상한 (바이트)
+SESSION_CAP_MIN_IDLE = float(os.environ.get("SESSION_CAP_MIN_IDLE", "300"))  # 상한 때문에 정리할 수 있는 SFTP 세션의 최소 유휴 시간 (초)
+SESSION_EVICTED_CLOSE_CODE = 4001  # 정리된 터미널의 WebSocket 종료 코드 (4000은 다른 창이 세션을 가져감)
+EVICTION_LOG_SIZE = 200  # 보관하는 최근 정리 기록 수
+
+class SessionLimitError(Exception):
+    """세션 수 상한에 도달했고 정리할 수 있는 세션도 없음"""
+
+class SessionSupervisor:
+    """터미널/SFTP 세션을 주기적으로 점검해서 유휴/고아 세션을 정리하고 전체 상한을 적용
+    
+    정리 순서는 plan()이 결정하고 /api/supervisor에서 실행 전에 미리 볼 수 있음.
+    연결된(attached) 터미널은 SSH_IDLE_TIMEOUT을 켠 경우에만 정리하고 (WebSocket에 알리고 SESSION_EVICTED_CLOSE_CODE로 닫음)
+    상한 때문에 정리하지는 않음
+    """
+    def __init__(self):
+        self.evictions = deque(maxlen=EVICTION_LOG_SIZE)
+        self.runs = 0
+        self.last_run = None
+    
+    def plan(self):
+        """정리할 세션 목록 [(종류, 세션 ID, 이유, 세부 정보)]"""
+        now = time.monotonic()
+        decisions = []
+        chosen = set()
+        
+        def decide(kind, session_id, reason, **details):
+            chosen.add((kind, session_id))
+            decisions.append((kind, session_id, reason, details))
+        
+        for session_id, ssh_session in sessions.items():
+            websocket = ssh_session.websocket
+            idle = now - ssh_session.last_activity
+            if ssh_session.detached_at is not None and not ssh_session.connected:
+                # detach 중에 원격 셸이 끝남 - 다시 붙어도 쓸 수 없음
+                decide("ssh", session_id, "closed_while_detached", idle=round(idle, 1))
+            elif websocket is not None and WebSocketState.DISCONNECTED in (websocket.client_state, websocket.application_state):
+                # WebSocket은 끝났는데 정리되지 않은 세션
+                decide("ssh", session_id, "orphaned", idle=round(idle, 1))
+            elif SSH_IDLE_TIMEOUT and idle > SSH_IDLE_TIMEOUT and ssh_session.connected:
+                decide("ssh", session_id, "idle", idle=round(idle, 1))
+        
+        for session_id, sftp_session in sftp_sessions.items():
+            idle = now - sftp_session.last_activity
+            if not sftp_session.connected or not (sftp_session.conn and sftp_session.conn.active):
+                decide("sftp", session_id, "orphaned", idle=round(idle, 1))
+            elif SFTP_IDLE_TIMEOUT and idle > SFTP_IDLE_TIMEOUT and not sftp_session.busy():
+                decide("sftp", session_id, "idle", idle=round(idle, 1))
+        
+        # 전체 버퍼 상한: detach 세션부터 오래된 순으로 정리
+        buffered = sum(
+            ssh_session.buffered_bytes() for session_id, ssh_session in sessions.items()
+            if ("ssh", session_id) not in chosen
+        )
+        for session_id, ssh_session in self._detached():
+            if buffered <= SESSIONS_MAX_BUFFERED:
+                break
+            if ("ssh", session_id) not in chosen:
+                buffered -= ssh_session.buffered_bytes()
+                decide("ssh", session_id, "buffer_cap", buffered_total=buffered)
+        
+        # 세션 수 상한
+        excess = len(sessions) + len(sftp_sessions) - len(chosen) - SESSIONS_MAX
+        for kind, session_id in self._evictable():
+            if excess <= 0:
+                break
+            if (kind, session_id) not in chosen:
+                excess -= 1
+                decide(kind, session_id, "session_cap")
+        return decisions
+    
+    def _detached(self):
+        return sorted(
+            ((session_id, ssh_session) for session_id, ssh_session in sessions.items()
+             if ssh_session.detached_at is not None),
+            key=lambda item: item[1].detached_at
+        )
+    
+    def _evictable(self):
+        """상한 때문에 정리할 수 있는 세션 - detach 세션(오래된 순) 다음 작업 없이 SESSION_CAP_MIN_IDLE 넘게 쉰
+        SFTP 세션(오래 쉰 순). 방금까지 쓰던 SFTP 세션은 다른 사용자의 새 연결 때문에 끊지 않음
+        """
+        now = time.monotonic()
+        candidates = [("ssh", session_id) for session_id, _ in self._detached()]
+        idle_sftp = sorted(
+            ((session_id, sftp_session) for session_id, sftp_session in sftp_sessions.items()
+             if not sftp_session.busy() and now - sftp_session.last_activity >= SESSION_CAP_MIN_IDLE),
+            key=lambda item: item[1].last_activity
+        )
+        return candidates + [("sftp", session_id) for session_id, _ in idle_sftp]
+    
+    def evict(self, kind, session_id, reason, **details):
+        if kind == "ssh":
+            session = sessions.pop(session_id, None)
+            if session is None:
+                return
+            websocket = session.websocket
+            session.disconnect()
+            if websocket is not None:
+                # 연결된 탭(SSH_IDLE_TIMEOUT 등) - 출력이 끊긴 채 열려 있지 않도록 알리고 닫음
+                asyncio.create_task(close_evicted_websocket(websocket, reason))
+        else:
+            session = sftp_sessions.pop(session_id, None)
+            if session is None:
+                return
+            # SFTP 채널 닫기는 네트워크 I/O이므로 이벤트 루프 밖에서
+            sftp_executor.submit(session.disconnect)
+        release_session_id(session_id)
+        self.evictions.append({"time": time.time(), "kind": kind, "session": session_id, "reason": reason, **details})
+        SESSION_EVICTIONS.inc(1, kind, reason)
+        log(logging.INFO, "세션 정리", kind=kind, session=session_id, reason=reason, **details)
+    
+    def reap(self):
+        decisions = self.plan()
+        for kind, session_id, reason, details in decisions:
+            self.evict(kind, session_id, reason, **details)
+        self.runs += 1
+        self.last_run = time.time()
+        return decisions
+    
+    def admit(self):
+        """새 세션을 등록하기 전에 호출 - 상한이면 정리할 수 있는 세션 하나를 정리하고, 없으면 SessionLimitError"""
+        if len(sessions) + len(sftp_sessions) < SESSIONS_MAX:
+            return
+        for kind, session_id in self._evictable():
+            self.evict(kind, session_id, "session_cap")
+            return
+        raise SessionLimitError(f"세션 수 상한({SESSIONS_MAX})에 도달했습니다")
+    
+    def report(self):
+        """세션별 자원 사용량, 프로세스 자원, 다음 점검에서 정리될 세션, 최근 정리 기록"""
+        threads = {}
+        for thread in threading.enumerate():
+            # 이름의 번호 부분을 빼고 종류별로 묶음 (sftp-io_3 → sftp-io)
+            group = re.sub(r"[-_]?\d+(\s.*)?$", "", thread.name) or thread.name
+            threads[group] = threads.get(group, 0) + 1
+        try:
+            open_fds = len(os.listdir("/proc/self/fd"))
+        except OSError:
+            open_fds = None
+        pools = transport_pool.stats()
+        return {
+            "policy": {
+                "interval": SUPERVISOR_INTERVAL,
+                "ssh_idle_timeout": SSH_IDLE_TIMEOUT,
+                "sftp_idle_timeout": SFTP_IDLE_TIMEOUT,
+                "detach_grace_period": DETACH_GRACE_PERIOD,
+                "sessions_max": SESSIONS_MAX,
+                "sessions_max_buffered": SESSIONS_MAX_BUFFERED,
+                "session_cap_min_idle": SESSION_CAP_MIN_IDLE,
+            },
+            "totals": {
+                "ssh_sessions": len(sessions),
+                "sftp_sessions": len(sftp_sessions),
+                "buffered_bytes": sum(ssh_session.buffered_bytes() for ssh_session in sessions.values()),
+                "ssh_connections": sum(pool["connections"] for pool in pools),
+                "threads": threading.active_count(),
+                "threads_by_name": threads,
+                "open_fds": open_fds,
+            },
+            "sessions": (
+                [{"id": session_id, **ssh_session.resources()} for session_id, ssh_session in sessions.items()]
+                + [{"id": session_id, **sftp_session.resources()} for session_id, sftp_session in sftp_sessions.items()]
+            ),
+            "pending_evictions": [
+                {"kind": kind, "session": session_id, "reason": reason, **details}
+                for kind, session_id, reason, details in self.plan()
+            ],
+            "evictions": list(self.evictions),
+            "runs": self.runs,
+            "last_run": self.last_run,
+        }
+
+supervisor = SessionSupervisor()
+
+async def monitor_output(websocket: WebSocket, ssh_session: SSHSession, binary: bool = False, replay: bytes = b""):
+    """SSH 출력을 모니터링하고 WebSocket으로 전송 (replay: 재연결 시 먼저 보낼 스크롤백)"""
+    # 청크 경계에서 잘린 멀티바이트 문자(한글, 이모지 등)는 다음 청크까지 보류
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    replay = memoryview(replay)
+    while True:
+        try:
+            if replay:
+                output = bytes(replay[:OUTPUT_FRAME_MAX])
+                replay = replay[OUTPUT_FRAME_MAX:]
+            else:
+                output = await ssh_session.get_output()
+            if output is None:
+                break
+            if binary:
+                # 바이너리 모드: 원본 바이트 그대로 전달 (UTF-8 디코딩은 xterm.js가 처리)
+                if ssh_session.compressor:
+                    await websocket.send_bytes(ssh_session.compressor.encode(output))
+                else:
+                    await websocket.send_bytes(bytes([OP_DATA]) + output)
+                continue
+            text = decoder.decode(output)
+            if not text:
+                continue
+            await websocket.send_text(json.dumps({
+                "type": "output",
+                "data": text
+            }))
+        except Exception as e:
+            log(logging.WARNING, "출력 모니터링 오류", error=e)
+            break
+
+def read_recording(path):
+    """녹화 파일의 (헤더, 이벤트 이터레이터) - 한 줄씩 읽으므로 파일 전체를 메모리에 올리지 않음"""
+    f = gzip.open(path, 'rt', encoding='utf-8') if path.endswith('.gz') else open(path, encoding='utf-8')
+    header = json.loads(f.readline())
     
-    def disconnect(self):
-        self.connected = False
-        if self.sftp:
-            self.sftp.close()
-        if self.client:
-            self.client.close()
+    def events():
+        with f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    return header, events()
 
-# 세션 관리
-sessions = {}
-sftp_sessions = {}
+class RecordingPlayer:
+    """녹화 재생 - 출력 이벤트를 기록된 시간 간격대로 WebSocket에 전송
+    
+    seek: 파일을 처음부터 다시 읽으며 목표 시각 이전 출력은 대기 없이 큰 프레임으로 몰아서 보내
+    (터미널 화면 상태 재구성) 목표 시각부터 시간에 맞춰 재생.
+    idle_limit: 이벤트 사이 대기 시간 상한 (초) - 긴 공백은 줄여서 재생
+    """
+    def __init__(self, websocket, path, binary=False, speed=1.0, idle_limit=None):
+        self.websocket = websocket
+        self.path = path
+        self.binary = binary
+        self.speed = speed
+        self.idle_limit = idle_limit
+        self.paused = False
+        self.task = None
+        self._clock = None       # (기준 벽시계, 기준 재생 시각) - 일시 정지/속도 변경 시 다시 잡음
+        self._changed = asyncio.Event()
+    
+    def start(self, position=0.0):
+        self.stop()
+        self._clock = None
+        self.task = asyncio.create_task(self._play(position))
+    
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+            self.task = None
+    
+    def _position(self):
+        wall, position = self._clock
+        if self.paused:
+            return position
+        return position + (asyncio.get_running_loop().time() - wall) * self.speed
+    
+    def _rebase(self):
+        if self._clock is not None:
+            self._clock = (asyncio.get_running_loop().time(), self._position())
+    
+    def pause(self):
+        self._rebase()
+        self.paused = True
+        self._changed.set()
+    
+    def resume(self):
+        if self.paused and self._clock is not None:
+            # 멈춘 위치에서 다시 시작
+            self._clock = (asyncio.get_running_loop().time(), self._clock[1])
+        self.paused = False
+        self._changed.set()
+    
+    def set_speed(self, speed):
+        self._rebase()
+        self.speed = speed
+        self._changed.set()
+    
+    async def _wait_until(self, position):
+        """재생 시각이 position에 도달할 때까지 대기 (일시 정지/속도 변경 반영)"""
+        loop = asyncio.get_running_loop()
+        if self._clock is None:
+            self._clock = (loop.time(), position)
+        while True:
+            self._changed.clear()
+            if self.paused:
+                await self._changed.wait()
+                continue
+            delay = (position - self._position()) / self.speed
+            if delay <= 0:
+                return
+            try:
+                await asyncio.wait_for(self._changed.wait(), delay)
+            except asyncio.TimeoutError:
+                return
+    
+    async def _send_output(self, data):
+        if self.binary:
+            await self.websocket.send_bytes(bytes([OP_DATA]) + data.encode())
+        else:
+            await self.websocket.send_text(json.dumps({"type": "output", "data": data}))
+    
+    async def _send_resize(self, size):
+        cols, _, rows = size.partition("x")
+        await self.websocket.send_text(json.dumps({"type": "resize", "cols": int(cols), "rows": int(rows)}))
+    
+    async def _play(self, position):
+        loop = asyncio.get_running_loop()
+        header, events = await loop.run_in_executor(sftp_executor, read_recording, self.path)
+        await self.websocket.send_text(json.dumps({
+            "type": "replay_start", "position": position,
+            "width": header.get("width"), "height": header.get("height")
+        }))
+        
+        def next_batch():
+            """파일 읽기는 워커 스레드에서 - 한 번에 최대 256개 이벤트"""
+            return [event for _, event in zip(range(256), events)]
+        
+        backlog = []      # seek 위치 이전 출력 (합쳐서 전송)
+        backlog_size = 0
+        previous = position
+        skipped = 0.0     # idle_limit로 줄인 시간 누적
+        try:
+            while True:
+                batch = await loop.run_in_executor(sftp_executor, next_batch)
+                if not batch:
+                    break
+                for timestamp, kind, data in batch:
+                    if timestamp < position:
+                        if kind == "o":
+                            backlog.append(data)
+                            backlog_size += len(data)
+                            if backlog_size >= OUTPUT_FRAME_MAX:
+                                await self._send_output("".join(backlog))
+                                backlog, backlog_size = [], 0
+                        elif kind == "r":
+                            await self._send_resize(data)
+                        continue
+                    if backlog:
+                        await self._send_output("".join(backlog))
+                        backlog, backlog_size = [], 0
+                    
+                    if self.idle_limit and timestamp - previous > self.idle_limit:
+                        skipped += timestamp - previous - self.idle_limit
+                    previous = timestamp
+                    await self._wait_until(timestamp - skipped)
+                    
+                    if kind == "o":
+                        await self._send_output(data)
+                    elif kind == "r":
+                        await self._send_resize(data)
+            if backlog:
+                await self._send_output("".join(backlog))
+            await self.websocket.send_text(json.dumps({"type": "replay_end"}))
+        finally:
+            def close_events():
+                try:
+                    events.close()
+                except ValueError:
+                    # 취소 시점에 워커 스레드가 아직 읽는 중 - 파일은 제너레이터 정리 시 닫힘
+                    pass
+            await loop.run_in_executor(sftp_executor, close_events)
 
-@app.websocket("/ws/{session_id}")
-async def websocket_endpoint(websocket: WebSocket, session_id: str):
-    await websocket.accept()
+@app.get("/api/recordings")
+async def list_recordings():
+    """녹화 파일 목록"""
+    if not os.path.isdir(RECORDINGS_DIR):
+        return {"recordings": []}
+    recordings = []
+    for entry in os.scandir(RECORDINGS_DIR):
+        if entry.is_file() and recording_path(entry.name):
+            info = entry.stat()
+            recordings.append({"id": entry.name, "size": info.st_size, "modified": info.st_mtime})
+    recordings.sort(key=lambda r: r["modified"], reverse=True)
+    return {"recordings": recordings}
+
+@app.get("/api/recordings/{recording_id}")
+async def download_recording(recording_id: str):
+    """녹화 파일 원본 (asciinema 등 외부 플레이어용)"""
+    path = recording_path(recording_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="녹화를 찾을 수 없습니다")
+    return FileResponse(path, filename=recording_id, media_type="application/x-asciicast")
+
+@app.websocket("/ws/replay/{recording_id}")
+async def replay_endpoint(websocket: WebSocket, recording_id: str):
+    """녹화 재생 - 터미널과 같은 프로토콜(바이너리/JSON 출력 프레임)로 전송
     
-    # 새 SSH 세션 생성
-    ssh_session = SSHSession()
-    sessions[session_id] = ssh_session
+    클라이언트 메시지:
+      {"type": "play", "protocol": "binary", "speed": 1.0, "idle_limit": 2.0, "position": 0}
+      {"type": "seek", "position": 초}  {"type": "pause"}  {"type": "resume"}  {"type": "speed", "speed": 2.0}
+    """
+    await websocket.accept()
+    path = recording_path(recording_id)
+    if path is None:
+        await websocket.send_text(json.dumps({"type": "replay_error", "message": "녹화를 찾을 수 없습니다"}))
+        await websocket.close()
+        return
     
+    player = None
     try:
         while True:
-            # 클라이언트로부터 메시지 받기
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            
-            if message["type"] == "connect":
-                # SSH 연결
-                success = ssh_session.connect(
-                    hostname=message["hostname"],
-                    username=message["username"],
-                    password=message["password"],
-                    port=message.get("port", 22)
+            message = json.loads(await websocket.receive_text())
+            if message["type"] == "play":
+                if player:
+                    player.stop()
+                player = RecordingPlayer(
+                    websocket, path,
+                    binary=message.get("protocol") == "binary",
+                    speed=max(0.1, float(message.get("speed", 1.0))),
+                    idle_limit=message.get("idle_limit")
                 )
-                
-                await websocket.send_text(json.dumps({
-                    "type": "connection_result",
-                    "success": success
-                }))
-                
-                if success:
-                    # 연결 성공 시 출력 모니터링 시작
-                    asyncio.create_task(monitor_output(websocket, ssh_session))
-            
-            elif message["type"] == "command":
-                # 명령어 전송
-                ssh_session.send_command(message["data"])
-            
-            elif message["type"] == "resize":
-                # 터미널 크기 조정
-                cols = message.get("cols", 80)
-                rows = message.get("rows", 24)
-                success = ssh_session.resize_terminal(cols, rows)
-                
-                await websocket.send_text(json.dumps({
-                    "type": "resize_result",
-                    "success": success,
-                    "cols": cols,
-                    "rows": rows
-                }))
-            
-            elif message["type"] == "disconnect":
-                # 연결 종료 요청
-                print(f"클라이언트 요청으로 세션 종료: {session_id}")
-                ssh_session.disconnect()
-                break
-    
+                player.start(float(message.get("position", 0)))
+            elif player is None:
+                continue
+            elif message["type"] == "seek":
+                player.start(max(0.0, float(message.get("position", 0))))
+            elif message["type"] == "pause":
+                player.pause()
+            elif message["type"] == "resume":
+                player.resume()
+            elif message["type"] == "speed":
+                player.set_speed(max(0.1, float(message.get("speed", 1.0))))
     except WebSocketDisconnect:
-        print(f"WebSocket 연결 종료: {session_id}")
+        pass
     except Exception as e:
-        print(f"WebSocket 오류: {e}")
+        log(logging.ERROR, "재생 오류", recording=recording_id, error=e)
     finally:
-        # 세션 정리
-        if session_id in sessions:
-            sessions[session_id].disconnect()
-            del sessions[session_id]
+        if player:
+            player.stop()
 
-async def monitor_output(websocket: WebSocket, ssh_session: SSHSession):
-    """SSH 출력을 모니터링하고 WebSocket으로 전송"""
-    while ssh_session.connected:
-        try:
-            output = ssh_session.get_output()
-            if output:
-                await websocket.send_text(json.dumps({
-                    "type": "output",
-                    "data": output
-                }))
-            await asyncio.sleep(0.01)
-        except Exception as e:
-            print(f"출력 모니터링 오류: {e}")
-            break
+@app.on_event("startup")
+async def start_pool_eviction():
+    """유휴 SSH 연결 정리 작업 시작"""
+    async def evict_loop():
+        while True:
+            await asyncio.sleep(max(1.0, SSH_POOL_IDLE_TIMEOUT / 4))
+            transport_pool.evict_idle()
+    asyncio.create_task(evict_loop())
+
+@app.on_event("shutdown")
+async def stop_recordings():
+    """녹화 파일을 닫고 writer 프로세스 종료"""
+    await asyncio.get_running_loop().run_in_executor(None, recording_writer.shutdown)
+
+@app.on_event("startup")
+async def start_supervisor():
+    """유휴/고아 세션 정리 작업 시작"""
+    async def supervise():
+        while True:
+            await asyncio.sleep(SUPERVISOR_INTERVAL)
+            try:
+                supervisor.reap()
+            except Exception as e:
+                log(logging.ERROR, "세션 점검 실패", error=e)
+    if SUPERVISOR_INTERVAL > 0:
+        asyncio.create_task(supervise())
+
+@app.on_event("startup")
+async def start_registry():
+    """다른 워커가 전달하는 요청 수신 시작"""
+    await session_registry.start(serve_forwarded)
+
+@app.on_event("shutdown")
+async def stop_registry():
+    """이 워커의 소유 기록과 소켓 정리"""
+    await session_registry.stop()
+
+@app.get("/api/registry")
+async def registry_stats():
+    """요청을 처리한 워커와 세션 소유/전달 현황"""
+    return session_registry.stats()
+
+@app.on_event("startup")
+async def start_loop_lag_monitor():
+    """이벤트 루프 지연 측정 - 예약한 시각보다 얼마나 늦게 깨어나는지 기록"""
+    async def lag_loop():
+        global event_loop_lag
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + METRICS_LOOP_LAG_INTERVAL
+            await asyncio.sleep(METRICS_LOOP_LAG_INTERVAL)
+            event_loop_lag = max(0.0, loop.time() - scheduled)
+            EVENT_LOOP_LAG_SECONDS.observe(event_loop_lag)
+    asyncio.create_task(lag_loop())
+
+def collected(name, help, samples, labels=(), kind="gauge"):
+    """스크레이프 시점에 계산하는 메트릭 - samples: [(라벨 값 튜플, 값)]
+    
+    kind="counter": 세션 객체 등에 이미 누적되어 있는 값을 그대로 노출
+    """
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{metric_labels(labels, values)} {value}" for values, value in samples)
+    return lines
+
+def session_state(ssh_session):
+    if ssh_session.detached_at is not None:
+        return "detached"
+    return "attached" if ssh_session.connected else "connecting"
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 텍스트 형식 메트릭
+    
+    세션/스레드 수와 세션별 바이트·프레임·큐 깊이는 요청 시점에 계산하고,
+    연결 단계별 시간/SFTP 작업 시간/이벤트 루프 지연은 누적 히스토그램으로 노출
+    """
+    states = {"attached": 0, "detached": 0, "connecting": 0}
+    for ssh_session in sessions.values():
+        states[session_state(ssh_session)] += 1
+    jobs = {}
+    for job in transfer_jobs.values():
+        jobs[job.state] = jobs.get(job.state, 0) + 1
+    pools = transport_pool.stats()
+    per_session = [(session_id, ssh_session) for session_id, ssh_session in sessions.items()]
+    registry = session_registry.stats()
+    
+    lines = []
+    lines += collected("term_sessions", "터미널 세션 수 (상태별)", [((state,), count) for state, count in states.items()], ("state",))
+    lines += collected("term_sftp_sessions", "SFTP 세션 수", [((), len(sftp_sessions))])
+    lines += collected("term_transfer_jobs", "전송 작업 수 (상태별)", [((state,), count) for state, count in jobs.items()], ("state",))
+    lines += collected("term_threads", "프로세스 스레드 수", [((), threading.active_count())])
+    lines += collected("term_pool_connections", "트랜스포트 풀의 SSH 연결 수", [((), sum(pool["connections"] for pool in pools))])
+    lines += collected("term_pool_channels", "트랜스포트 풀에서 사용 중인 채널 수", [((), sum(sum(pool["channels"]) for pool in pools))])
+    lines += collected("term_event_loop_lag_last_seconds", "마지막으로 측정한 이벤트 루프 지연", [((), event_loop_lag)])
+    lines += collected("term_registry_forwarded_requests_total", "다른 워커와 주고받은 요청 수",
+                   [(("in",), registry["forwarded_in"]), (("out",), registry["forwarded_out"])], ("direction",), "counter")
+    lines += collected("term_session_input_bytes_total", "세션별 클라이언트 입력 바이트",
+                   [((sid,), ssh_session.input_bytes) for sid, ssh_session in per_session], ("session",), "counter")
+    lines += collected("term_session_output_bytes_total", "세션별 SSH 출력 바이트",
+                   [((sid,), ssh_session.scrollback.total) for sid, ssh_session in per_session], ("session",), "counter")
+    lines += collected("term_session_sent_bytes_total", "세션별 WebSocket으로 보낸 출력 바이트 (압축 후)",
+                   [((sid,), ssh_session.compressor.bytes_out if ssh_session.compressor else ssh_session.output.bytes_out)
+                    for sid, ssh_session in per_session], ("session",), "counter")
+    lines += collected("term_session_frames_total", "세션별 출력 프레임 수",
+                   [((sid,), ssh_session.output.frames_out) for sid, ssh_session in per_session], ("session",), "counter")
+    lines += collected("term_session_queue_bytes", "세션별 전송 대기 중인 출력 바이트",
+                   [((sid,), len(ssh_session.output.buffer)) for sid, ssh_session in per_session], ("session",))
+    for metric in (SSH_CONNECT_SECONDS, SSH_CONNECT_FAILURES, SFTP_OPERATION_SECONDS, SFTP_TRANSFER_BYTES, EXEC_RESULTS,
+                   SESSION_EVICTIONS, RESIZE_REQUESTS, EVENT_LOOP_LAG_SECONDS):
+        lines += metric.render()
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+@app.get("/api/supervisor")
+async def supervisor_report():
+    """세션별 자원 사용량, 정리 정책, 다음 점검에서 정리될 세션, 최근 정리 기록"""
+    return supervisor.report()
+
+@app.post("/api/supervisor/reap")
+async def supervisor_reap():
+    """세션 점검을 바로 실행"""
+    return {
+        "evicted": [
+            {"kind": kind, "session": session_id, "reason": reason, **details}
+            for kind, session_id, reason, details in supervisor.reap()
+        ]
+    }
+
+@app.get("/api/pool/stats")
+async def pool_stats():
+    """트랜스포트 풀 상태 (호스트별 연결 수와 연결별 사용 중인 채널 수)"""
+    return {"pools": transport_pool.stats()}
+
+@app.get("/api/sessions/{session_id}/stats")
+async def session_stats(session_id: str):
+    """터미널 세션 출력 파이프라인 통계 (버퍼 깊이, 초당 프레임, 병합된 바이트 등)"""
+    if session_id not in sessions:
+        raise HTTPException(status_code=404, detail="세션을 찾을 수 없습니다")
+    
+    ssh_session = sessions[session_id]
+    return {
+        "connected": ssh_session.connected,
+        "reading_paused": ssh_session.reading_paused,
+        "detached_seconds": round(time.monotonic() - ssh_session.detached_at, 1) if ssh_session.detached_at else None,
+        "scrollback_bytes": len(ssh_session.scrollback.buffer),
+        "output_offset": ssh_session.scrollback.total,
+        "compression": ssh_session.compressor.stats() if ssh_session.compressor else None,
+        **ssh_session.output.stats()
+    }
 
 # SFTP API 엔드포인트들
 @app.post("/api/sftp/{session_id}/connect")
 async def connect_sftp(session_id: str, connection_data: dict):
     """SFTP 연결 생성"""
+    if session_id not in sftp_sessions:
+        try:
+            supervisor.admit()
+        except SessionLimitError as e:
+            raise HTTPException(status_code=503, detail=str(e))
     try:
         sftp_session = SFTPSession()
-        success = sftp_session.connect(
-            hostname=connection_data["hostname"],
-            username=connection_data["username"],
-            password=connection_data["password"],
-            port=connection_data.get("port", 22)
+        success = await asyncio.get_running_loop().run_in_executor(
+            connect_executor,
+            sftp_session.connect,
+            connection_data["hostname"],
+            connection_data["username"],
+            connection_data["password"],
+            connection_data.get("port", 22)
         )
         
         if success:
+            previous = sftp_sessions.get(session_id)
+            if previous is not None:
+                # 같은 ID로 다시 연결하면 이전 연결은 닫음
+                sftp_executor.submit(previous.disconnect)
             sftp_sessions[session_id] = sftp_session
+            session_registry.claim(session_id)
             return {"success": True, "message": "SFTP 연결 성공"}
         else:
             return {"success": False, "message": "SFTP 연결 실패"}
     except Exception as e:
         return {"success": False, "message": f"SFTP 연결 오류: {str(e)}"}
 
+@app.post("/api/sftp/{session_id}/disconnect")
+async def disconnect_sftp(session_id: str):
+    """SFTP 연결 종료 (진행 중인 색인/사용량 계산도 취소)"""
+    sftp_session = sftp_sessions.pop(session_id, None)
+    if sftp_session is None:
+        raise HTTPException(status_code=404, detail="SFTP 세션을 찾을 수 없습니다")
+    release_session_id(session_id)
+    await asyncio.get_running_loop().run_in_executor(sftp_executor, sftp_session.disconnect)
+    return {"success": True}
+
 @app.get("/api/sftp/{session_id}/remote/files")
-async def list_remote_files(session_id: str, path: str = "/"):
-    """원격 파일 목록 조회"""
+async def list_remote_files(session_id: str, path: str = "/", sort: str = "name", order: str = "asc",
+                            filter: Optional[str] = None, type: Optional[str] = None, hidden: bool = False,
+                            cursor: Optional[str] = None, limit: int = LISTING_PAGE_SIZE, format: str = "json"):
+    """원격 파일 목록 조회
+    
+    sort: name/size/modified/type (디렉토리가 항상 먼저), order: asc/desc
+    filter: 이름 부분 일치, type: file/directory, hidden: 숨김 파일 포함
+    cursor/limit: 페이지 - 응답의 next_cursor로 다음 페이지 요청
+    format=ndjson: 정렬 없이 원격에서 읽는 대로 한 줄에 한 항목씩 스트리밍
+                   (첫 줄은 {"path": ...}, 아주 큰 디렉토리도 첫 항목이 바로 도착)
+    """
     if session_id not in sftp_sessions:
         # SSH 세션에서 SFTP 세션 생성 시도
         if session_id in sessions:
             ssh_session = sessions[session_id]
             if ssh_session.connected:
+                try:
+                    supervisor.admit()
+                except SessionLimitError as e:
+                    raise HTTPException(status_code=503, detail=str(e))
                 try:
                     sftp_session = SFTPSession()
-                    sftp_session.client = ssh_session.client
-                    sftp_session.sftp = ssh_session.client.open_sftp()
+                    sftp_session.conn = transport_pool.retain(ssh_session.conn)
+                    sftp_session.client = sftp_session.conn.client
+                    sftp_session.sftp = sftp_session.client.open_sftp()
                     sftp_session.connected = True
                     
                     # Get home directory using pwd command
                     try:
-                        stdin, stdout, stderr = ssh_session.client.exec_command('pwd')
+                        stdin, stdout, stderr = sftp_session.client.exec_command('pwd')
                         sftp_session.home_dir = stdout.read().decode().strip()
-                        print(f"SFTP Home directory set to: {sftp_session.home_dir}")
+                        log(logging.DEBUG, "SFTP 홈 디렉토리", session=session_id, path=sftp_session.home_dir)
                     except Exception as e:
-                        print(f"Failed to get home directory via pwd: {e}")
+                        log(logging.WARNING, "pwd로 홈 디렉토리 조회 실패", session=session_id, error=e)
                         # Fallback to sftp normalize
                         try:
                             sftp_session.home_dir = sftp_session.sftp.normalize('.')
@@ -398,9 +4593,14 @@ async def list_remote_files(session_id: str, path: str = "/"):
                             sftp_session.home_dir = '/home'
                     
                     sftp_sessions[session_id] = sftp_session
-                    print(f"SFTP 세션 생성 성공: {session_id}")
+                    session_registry.claim(session_id)
+                    log(logging.INFO, "SFTP 세션 생성 성공", session=session_id)
+                except ChannelLimitError as e:
+                    sftp_session.disconnect()
+                    raise HTTPException(status_code=503, detail=str(e))
                 except Exception as e:
-                    print(f"SFTP 세션 생성 실패: {e}")
+                    sftp_session.disconnect()
+                    log(logging.ERROR, "SFTP 세션 생성 실패", session=session_id, error=e)
                     raise HTTPException(status_code=500, detail=f"SFTP 세션 생성 실패: {str(e)}")
             else:
                 raise HTTPException(status_code=404, detail="SSH 연결이 필요합니다")
@@ -413,51 +4613,428 @@ async def list_remote_files(session_id: str, path: str = "/"):
     if path == "/":
         path = sftp_session.home_dir
     
-    result = sftp_session.list_files(path)
-    print(f"파일 목록 조회 결과: {result}")
-    return result
+    if sort not in LISTING_SORT_KEYS or order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="지원하지 않는 정렬 방식입니다")
+    if cursor is not None and not cursor.isdigit():
+        raise HTTPException(status_code=400, detail="잘못된 cursor입니다")
+    
+    if format == "ndjson":
+        return StreamingResponse(
+            stream_listing(functools.partial(sftp_session.scan_files, path, query=filter, kind=type, hidden=hidden), path),
+            media_type="application/x-ndjson"
+        )
+    
+    return await asyncio.get_running_loop().run_in_executor(
+        sftp_executor,
+        functools.partial(sftp_session.list_files, path, sort=sort, order=order, query=filter,
+                          kind=type, hidden=hidden, cursor=cursor, limit=limit)
+    )
+
+async def stream_listing(scan_files, path, executor=sftp_executor):
+    """scan_files(on_batch)가 워커 스레드에서 넘기는 항목 묶음을 NDJSON 줄로 전송
+    
+    on_batch는 먼저 디렉토리 경로 하나로 호출된 뒤 항목 리스트로 호출됨
+    """
+    loop = asyncio.get_running_loop()
+    batches = asyncio.Queue()
+    
+    def on_batch(batch):
+        loop.call_soon_threadsafe(batches.put_nowait, batch)
+    
+    def scan():
+        try:
+            scan_files(on_batch)
+        except Exception as e:
+            log(logging.WARNING, "파일 목록 조회 실패", path=path, error=e)
+            on_batch({"error": str(e)})
+        finally:
+            on_batch(None)
+    
+    loop.run_in_executor(executor, scan)
+    while True:
+        batch = await batches.get()
+        if batch is None:
+            break
+        if isinstance(batch, str):
+            yield json.dumps({"path": batch}) + "\n"
+        elif isinstance(batch, dict):
+            yield json.dumps(batch, ensure_ascii=False) + "\n"
+        elif batch:
+            yield "".join(json.dumps(f, ensure_ascii=False) + "\n" for f in batch)
+
+async def run_upload(sftp_session, chunks, remote_path, filename, offset, progress):
+    """원격 파일을 열고 청크를 기록 - 성공 여부 반환"""
+    loop = asyncio.get_running_loop()
+    try:
+        remote_file = await loop.run_in_executor(
+            sftp_executor, sftp_session.open_upload, remote_path, filename, offset
+        )
+        if remote_file is None:
+            progress.finish("SFTP 연결이 없습니다")
+            return False
+        await sftp_session.upload_stream(chunks, remote_file, progress)
+        progress.finish()
+        return True
+    except Exception as e:
+        log(logging.ERROR, "파일 업로드 실패", path=remote_path, filename=filename, error=e)
+        progress.finish(str(e))
+        return False
 
 @app.post("/api/sftp/{session_id}/upload")
-async def upload_file(session_id: str, file: UploadFile = File(...), remote_path: str = Form("/")):
-    """파일 업로드"""
+async def upload_file(session_id: str, file: UploadFile = File(...), remote_path: str = Form("/"),
+                      offset: int = Form(0), upload_id: Optional[str] = Form(None)):
+    """파일 업로드 (multipart) - offset을 주면 해당 위치부터 이어서 기록"""
     if session_id not in sftp_sessions:
         raise HTTPException(status_code=404, detail="SFTP 세션을 찾을 수 없습니다")
     
     sftp_session = sftp_sessions[session_id]
-    success = sftp_session.upload_file(file, remote_path)
+    progress = track_transfer(upload_id, file.filename, getattr(file, "size", None), offset)
+    
+    async def chunks():
+        while True:
+            data = await file.read(SFTP_UPLOAD_CHUNK)
+            if not data:
+                break
+            yield data
     
+    success = await run_upload(sftp_session, chunks(), remote_path, file.filename, offset, progress)
     if success:
-        return {"success": True, "message": "파일 업로드 성공"}
+        return {"success": True, "message": "파일 업로드 성공", "size": offset + progress.transferred}
     else:
         raise HTTPException(status_code=500, detail="파일 업로드 실패")
 
-@app.get("/api/sftp/{session_id}/download")
-async def download_file(session_id: str, remote_path: str):
-    """파일 다운로드"""
+@app.put("/api/sftp/{session_id}/upload/stream")
+async def upload_file_stream(session_id: str, request: Request, filename: str, remote_path: str = "/",
+                             offset: int = 0, upload_id: Optional[str] = None):
+    """요청 본문을 그대로 원격 파일로 스트리밍 업로드 (multipart 파싱/임시 파일 없이 일정한 메모리 사용)
+    
+    이어 올리기: upload/status로 원격 부분 파일 크기를 조회한 뒤 offset=크기로 나머지 바이트만 전송
+    """
     if session_id not in sftp_sessions:
         raise HTTPException(status_code=404, detail="SFTP 세션을 찾을 수 없습니다")
     
     sftp_session = sftp_sessions[session_id]
-    file_data = sftp_session.download_file(remote_path)
+    content_length = request.headers.get("content-length")
+    total = offset + int(content_length) if content_length else None
+    progress = track_transfer(upload_id, filename, total, offset)
     
-    if file_data:
-        filename = os.path.basename(remote_path)
-        return StreamingResponse(
-            io.BytesIO(file_data.read()),
-            media_type='application/octet-stream',
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
+    success = await run_upload(sftp_session, request.stream(), remote_path, filename, offset, progress)
+    if success:
+        return {"success": True, "message": "파일 업로드 성공", "size": offset + progress.transferred}
     else:
+        raise HTTPException(status_code=500, detail=f"파일 업로드 실패: {progress.error}")
+
+@app.put("/api/sftp/{session_id}/upload/delta")
+async def upload_file_delta(session_id: str, request: Request, filename: str, remote_path: str = "/",
+                            block_size: int = DELTA_BLOCK_SIZE, verify: bool = True,
+                            upload_id: Optional[str] = None):
+    """요청 본문을 기존 원격 파일과 블록 단위로 비교해 다른 블록만 기록 (원격 파일이 없으면 통째로 기록)
+    
+    응답의 delta: 블록 수/바뀐 블록 수, 실제로 보낸 바이트(bytes_sent)와 같아서 건너뛴 바이트(bytes_matched),
+    단계별 소요 시간 (통째 업로드와의 시간 비교는 benchmarks/bench_delta.py)
+    """
+    if session_id not in sftp_sessions:
+        raise HTTPException(status_code=404, detail="SFTP 세션을 찾을 수 없습니다")
+    
+    sftp_session = sftp_sessions[session_id]
+    loop = asyncio.get_running_loop()
+    status = await loop.run_in_executor(sftp_executor, sftp_session.upload_status, remote_path, filename)
+    if status is None:
+        raise HTTPException(status_code=500, detail="SFTP 연결이 없습니다")
+    content_length = request.headers.get("content-length")
+    progress = track_transfer(upload_id, filename, int(content_length) if content_length else None)
+    upload = DeltaUpload(sftp_session, status["path"], block_size=block_size, verify=verify)
+    pending = None
+    
+    try:
+        await loop.run_in_executor(sftp_executor, upload.open)
+        # 워커 스레드가 블록을 비교/기록하는 동안 다음 청크를 받아 둠
+        buffer = bytearray()
+        async for data in request.stream():
+            buffer += data
+            if len(buffer) < SFTP_UPLOAD_CHUNK:
+                continue
+            if pending:
+                await asyncio.wrap_future(pending)
+            progress.transferred = upload.size
+            pending = sftp_executor.submit(upload.write, bytes(buffer))
+            buffer = bytearray()
+        if pending:
+            await asyncio.wrap_future(pending)
+            pending = None
+        await loop.run_in_executor(sftp_executor, upload.write, bytes(buffer))
+        result = await loop.run_in_executor(sftp_executor, upload.finish)
+        progress.transferred = upload.size
+        progress.finish()
+    except Exception as e:
+        upload.cancel.set()
+        log(logging.ERROR, "델타 업로드 실패", path=status["path"], error=e)
+        progress.finish(str(e))
+        raise HTTPException(status_code=500, detail=f"파일 업로드 실패: {e}")
+    finally:
+        def close(in_flight):
+            if in_flight:
+                concurrent.futures.wait([in_flight])
+            upload.close()
+        await loop.run_in_executor(sftp_executor, close, pending)
+        sftp_session.listings.invalidate(posixpath.dirname(status["path"]))
+    log(logging.INFO, "델타 업로드 완료", path=status["path"], size=result["size"],
+        sent=result["bytes_sent"], matched=result["bytes_matched"])
+    return {"success": True, "message": "파일 업로드 성공", "size": result["size"], "delta": result}
+
+@app.get("/api/sftp/{session_id}/upload/status")
+async def upload_status(session_id: str, filename: str, remote_path: str = "/"):
+    """이어 올리기 전 원격 부분 파일 크기 조회"""
+    if session_id not in sftp_sessions:
+        raise HTTPException(status_code=404, detail="SFTP 세션을 찾을 수 없습니다")
+    
+    sftp_session = sftp_sessions[session_id]
+    status = await asyncio.get_running_loop().run_in_executor(
+        sftp_executor, sftp_session.upload_status, remote_path, filename
+    )
+    if status is None:
+        raise HTTPException(status_code=500, detail="SFTP 연결이 없습니다")
+    return status
+
+@app.get("/api/sftp/transfers/{upload_id}/progress")
+async def transfer_progress_events(upload_id: str, session_id: Optional[str] = None):
+    """업로드 진행 상황을 Server-Sent Events로 전송 (완료/실패 시 종료)
+    
+    session_id: 업로드를 보내는 세션 - 여러 워커에서 실행 중이면 그 세션의 워커로 전달됨
+    """
+    async def events():
+        while True:
+            progress = transfer_progress.get(upload_id)
+            snapshot = progress.snapshot() if progress else {"id": upload_id, "pending": True}
+            yield f"data: {json.dumps(snapshot)}\n\n"
+            if progress and progress.done:
+                break
+            await asyncio.sleep(0.5)
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/api/sftp/{session_id}/download")
+async def download_file(session_id: str, remote_path: str, request: Request):
+    """파일 다운로드 (스트리밍, Range 요청으로 이어받기 지원)"""
+    if session_id not in sftp_sessions:
+        raise HTTPException(status_code=404, detail="SFTP 세션을 찾을 수 없습니다")
+    
+    sftp_session = sftp_sessions[session_id]
+    opened = await asyncio.get_running_loop().run_in_executor(
+        sftp_executor, sftp_session.open_download, remote_path
+    )
+    if not opened:
         raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+    
+    remote_file, file_size = opened
+    filename = os.path.basename(remote_path)
+    headers = {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "Accept-Ranges": "bytes"
+    }
+    start, end = 0, file_size - 1
+    status_code = 200
+    
+    range_header = request.headers.get("range")
+    byte_range = parse_range_header(range_header, file_size) if range_header else None
+    if byte_range:
+        start, end = byte_range
+        if start >= file_size:
+            sftp_executor.submit(sftp_session.close_file, remote_file)
+            raise HTTPException(
+                status_code=416,
+                detail="요청한 범위가 파일 크기를 벗어났습니다",
+                headers={"Content-Range": f"bytes */{file_size}"}
+            )
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+    
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        sftp_session.stream_file(remote_file, start, end + 1),
+        status_code=status_code,
+        media_type='application/octet-stream',
+        headers=headers
+    )
+
+def decode_view(data, at_eof):
+    """보기용 텍스트로 변환 - 끝에서 잘린 UTF-8 문자는 다음 요청에서 읽도록 남기고 그 길이 반환"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    text = decoder.decode(data, final=at_eof)
+    return text, len(decoder.getstate()[0])
+
+@app.get("/api/sftp/{session_id}/view")
+async def view_file(session_id: str, path: str, offset: int = 0, length: Optional[int] = None,
+                    lines: Optional[int] = None, tail: Optional[int] = None, end: Optional[int] = None):
+    """원격 파일 일부 보기 (전체를 내려받지 않고 필요한 구간만 SFTP로 읽음)
+    
+    offset/length: 바이트 구간, lines: offset부터 N줄, tail: 파일 끝(또는 end) 앞의 마지막 N줄
+    응답의 end를 다음 요청의 offset으로, offset을 이전 줄을 읽을 tail 요청의 end로 사용
+    한 번에 최대 FILE_VIEW_MAX_BYTES까지 반환
+    """
+    if session_id not in sftp_sessions:
+        raise HTTPException(status_code=404, detail="SFTP 세션을 찾을 수 없습니다")
+    if any(value is not None and value < 1 for value in (length, lines, tail)) or offset < 0:
+        raise HTTPException(status_code=400, detail="잘못된 범위입니다")
+    
+    sftp_session = sftp_sessions[session_id]
+    loop = asyncio.get_running_loop()
+    opened = await loop.run_in_executor(sftp_executor, sftp_session.open_download, path)
+    if opened is None:
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+    
+    remote_file, file_size = opened
+    try:
+        start, data = await loop.run_in_executor(
+            sftp_executor,
+            functools.partial(sftp_session.read_view, remote_file, file_size, offset=offset,
+                              length=length, lines=lines, tail=tail, end=end)
+        )
+    except Exception as e:
+        log(logging.WARNING, "파일 읽기 실패", path=path, error=e)
+        raise HTTPException(status_code=500, detail=f"파일 읽기 실패: {str(e)}")
+    finally:
+        sftp_executor.submit(sftp_session.close_file, remote_file)
+    
+    SFTP_TRANSFER_BYTES.inc(len(data), "view")
+    text, pending = decode_view(data, start + len(data) >= file_size)
+    return {
+        "path": path,
+        "size": file_size,
+        "offset": start,
+        "end": start + len(data) - pending,
+        "eof": start + len(data) >= file_size,
+        "binary": b"\0" in data,
+        "data": text,
+    }
+
+async def follow_remote_file(websocket, sftp_session, path, offset=None, tail=None):
+    """tail -F처럼 파일 크기를 주기적으로 확인해서 늘어난 부분만 전송
+    
+    파일이 줄어들거나(truncate) 경로가 다른 파일로 바뀌면(로그 로테이션) 다시 열어 처음부터 전송.
+    로테이션이면 이전 파일에 남은 부분을 먼저 마저 보내고, 경로가 잠시 없으면 생길 때까지 기다림.
+    한 번에 FILE_FOLLOW_CHUNK까지만 읽고 WebSocket 전송을 기다린 뒤 다음 구간을 읽으므로
+    메모리 사용량은 파일 크기나 추가되는 속도와 무관하게 일정함
+    """
+    loop = asyncio.get_running_loop()
+    opened = await loop.run_in_executor(sftp_executor, sftp_session.open_download, path)
+    if opened is None:
+        await websocket.send_text(json.dumps({"type": "follow_error", "message": "파일을 찾을 수 없습니다"}))
+        return
+    remote_file, size = opened
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    
+    async def send_data(position, data):
+        SFTP_TRANSFER_BYTES.inc(len(data), "view")
+        text = decoder.decode(data)
+        if text:
+            await websocket.send_text(json.dumps({"type": "data", "offset": position, "data": text}, ensure_ascii=False))
+    
+    try:
+        if tail:
+            position, data = await loop.run_in_executor(
+                sftp_executor, functools.partial(sftp_session.read_view, remote_file, size, tail=tail)
+            )
+        else:
+            position = size if offset is None else max(0, min(offset, size))
+            data = b''
+        await websocket.send_text(json.dumps({"type": "follow_start", "path": path, "size": size, "offset": position}))
+        if data:
+            await send_data(position, data)
+            position += len(data)
+        
+        while True:
+            if position >= size:
+                await asyncio.sleep(FILE_FOLLOW_INTERVAL)
+            state = await loop.run_in_executor(sftp_executor, sftp_session.follow_stat, path, remote_file)
+            if state is None:
+                size = position
+                continue
+            size, handle_size, rotated = state
+            if rotated and handle_size > position:
+                # 로테이션 전 파일에 남은 부분부터 보냄
+                size = handle_size
+            elif rotated or size < position:
+                # 잘렸거나 로테이션으로 새 파일이 생김 - 다시 열어서 처음부터
+                await loop.run_in_executor(sftp_executor, sftp_session.close_file, remote_file)
+                remote_file = None
+                opened = await loop.run_in_executor(sftp_executor, sftp_session.open_download, path)
+                if opened is None:
+                    await websocket.send_text(json.dumps({"type": "follow_error", "message": "파일을 찾을 수 없습니다"}))
+                    return
+                remote_file, size = opened
+                position = 0
+                decoder.reset()
+                await websocket.send_text(json.dumps({"type": "truncated", "size": size, "rotated": rotated}))
+            if size > position:
+                data = await loop.run_in_executor(
+                    sftp_executor, sftp_session.read_range, remote_file, position, min(size - position, FILE_FOLLOW_CHUNK)
+                )
+                await send_data(position, data)
+                position += len(data)
+    except (OSError, EOFError, paramiko.SSHException) as e:
+        log(logging.WARNING, "파일 따라가기 실패", path=path, error=e)
+        await websocket.send_text(json.dumps({"type": "follow_error", "message": str(e) or type(e).__name__}))
+    except Exception as e:
+        # 작업 안의 예외는 아무도 기다리지 않으므로 여기서 기록하고 알림
+        log(logging.ERROR, "파일 따라가기 오류", path=path, error=e)
+        await websocket.send_text(json.dumps({"type": "follow_error", "message": "파일 따라가기 오류"}))
+    finally:
+        if remote_file is not None:
+            sftp_executor.submit(sftp_session.close_file, remote_file)
+
+@app.websocket("/ws/sftp/{session_id}/follow")
+async def follow_endpoint(websocket: WebSocket, session_id: str):
+    """원격 파일 따라가기 (tail -f)
+    
+    클라이언트 메시지: {"type": "follow", "path": 경로, "offset": 시작 바이트(기본: 파일 끝), "tail": 먼저 보낼 마지막 줄 수}
+                       {"type": "stop"}
+    서버 메시지: follow_start → data({"offset", "data"}) 반복, 파일이 줄어들거나 바뀌면 truncated({"size", "rotated"}), 오류 시 follow_error
+    """
+    await websocket.accept()
+    if session_id not in sftp_sessions:
+        await websocket.send_text(json.dumps({"type": "follow_error", "message": "SFTP 세션을 찾을 수 없습니다"}))
+        await websocket.close()
+        return
+    
+    sftp_session = sftp_sessions[session_id]
+    follower = None
+    try:
+        while True:
+            message = json.loads(await websocket.receive_text())
+            if follower:
+                follower.cancel()
+                follower = None
+            if message["type"] == "follow":
+                # /view와 같은 범위 검사 - offset은 0 이상, tail은 1 이상의 정수
+                offset, tail = message.get("offset"), message.get("tail")
+                if (not isinstance(message.get("path"), str)
+                        or any(value is not None and (type(value) is not int or value < minimum)
+                               for value, minimum in ((offset, 0), (tail, 1)))):
+                    await websocket.send_text(json.dumps({"type": "follow_error", "message": "잘못된 범위입니다"}))
+                    continue
+                follower = asyncio.create_task(follow_remote_file(
+                    websocket, sftp_session, message["path"], offset=offset, tail=tail
+                ))
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        log(logging.ERROR, "파일 따라가기 오류", session=session_id, error=e)
+    finally:
+        if follower:
+            follower.cancel()
 
 @app.delete("/api/sftp/{session_id}/delete")
-async def delete_file(session_id: str, path: str, is_directory: bool = False):
-    """파일/디렉토리 삭제"""
+async def delete_file(session_id: str, path: str, is_directory: bool = False, recursive: bool = False):
+    """파일/디렉토리 삭제 (recursive=true면 하위 항목까지 삭제)"""
     if session_id not in sftp_sessions:
         raise HTTPException(status_code=404, detail="SFTP 세션을 찾을 수 없습니다")
     
     sftp_session = sftp_sessions[session_id]
-    success = sftp_session.delete_file(path, is_directory)
+    success = await asyncio.get_running_loop().run_in_executor(
+        sftp_executor, sftp_session.delete_file, path, is_directory, recursive
+    )
     
     if success:
         return {"success": True, "message": "삭제 성공"}
@@ -465,55 +5042,465 @@ async def delete_file(session_id: str, path: str, is_directory: bool = False):
         raise HTTPException(status_code=500, detail="삭제 실패")
 
 @app.post("/api/sftp/{session_id}/mkdir")
-async def create_directory(session_id: str, path: str):
-    """디렉토리 생성"""
+async def create_directory(session_id: str, path: str, parents: bool = False):
+    """디렉토리 생성 (parents=true면 없는 상위 디렉토리도 생성)"""
     if session_id not in sftp_sessions:
         raise HTTPException(status_code=404, detail="SFTP 세션을 찾을 수 없습니다")
     
     sftp_session = sftp_sessions[session_id]
-    success = sftp_session.create_directory(path)
+    success = await asyncio.get_running_loop().run_in_executor(
+        sftp_executor, sftp_session.create_directory, path, parents
+    )
     
     if success:
         return {"success": True, "message": "디렉토리 생성 성공"}
     else:
         raise HTTPException(status_code=500, detail="디렉토리 생성 실패")
 
+@app.post("/api/sftp/{session_id}/jobs")
+async def create_transfer_job(session_id: str, job_data: dict):
+    """디렉토리/다중 파일 전송 작업 시작
+    
+    job_data: direction("download": 원격→서버, "upload": 서버→원격), sources(경로 목록),
+              destination(대상 디렉토리), channels(동시 SFTP 채널 수), tar(tar 스트림 사용 여부),
+              sync(업로드에서 같은 파일은 건너뛰고 바뀐 파일은 다른 블록만 전송),
+              checksum(sync에서 크기/수정 시각 대신 항상 블록 해시로 비교)
+    """
+    if session_id not in sftp_sessions:
+        raise HTTPException(status_code=404, detail="SFTP 세션을 찾을 수 없습니다")
+    if job_data.get("direction") not in ("download", "upload") or not job_data.get("sources"):
+        raise HTTPException(status_code=400, detail="direction과 sources가 필요합니다")
+    if job_data.get("sync") and (job_data["direction"] != "upload" or job_data.get("tar")):
+        raise HTTPException(status_code=400, detail="sync는 tar를 쓰지 않는 upload 작업에서만 쓸 수 있습니다")
+    
+    job = TransferJob(
+        uuid.uuid4().hex,
+        sftp_sessions[session_id],
+        job_data["direction"],
+        list(job_data["sources"]),
+        job_data.get("destination", "."),
+        channels=job_data.get("channels", TRANSFER_MAX_CHANNELS),
+        use_tar=bool(job_data.get("tar", False)),
+        sync=bool(job_data.get("sync", False)),
+        checksum=bool(job_data.get("checksum", False))
+    )
+    transfer_jobs[job.job_id] = job
+    session_registry.claim(f"job:{job.job_id}")
+    job.start()
+    return job.snapshot()
+
+@app.get("/api/sftp/jobs/{job_id}")
+async def get_transfer_job(job_id: str):
+    """전송 작업 진행 상황 (파일/바이트 수, 처리량, 오류)"""
+    if job_id not in transfer_jobs:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+    return transfer_jobs[job_id].snapshot()
+
+@app.delete("/api/sftp/jobs/{job_id}")
+async def cancel_transfer_job(job_id: str):
+    """전송 작업 취소"""
+    if job_id not in transfer_jobs:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다")
+    job = transfer_jobs[job_id]
+    job.cancel()
+    return job.snapshot()
+
+@app.post("/api/exec")
+async def exec_on_hosts(exec_data: dict):
+    """여러 호스트에서 같은 명령을 동시에 실행하고 결과를 NDJSON으로 스트리밍
+
+    exec_data: command, hosts(호스트 목록), username/password/port(호스트 항목의 기본값),
+               timeout(호스트별 제한 시간, 초), parallel(동시 실행 호스트 수)
+    응답 줄: {"type": "start"} → 호스트별 {"type": "output", "stream": "stdout"|"stderr", "data"}와
+             {"type": "result", "exit_status", "error", "timed_out", "truncated", "elapsed"} → {"type": "done"}
+    같은 호스트/계정의 인증된 연결이 풀에 있으면 채널만 새로 열어 재사용
+    """
+    command = exec_data.get("command")
+    if not command:
+        raise HTTPException(status_code=400, detail="command가 필요합니다")
+    targets = parse_exec_targets(exec_data)
+    if not targets:
+        raise HTTPException(status_code=400, detail="hosts가 필요합니다")
+    if len(targets) > EXEC_MAX_HOSTS:
+        raise HTTPException(status_code=400, detail=f"호스트는 최대 {EXEC_MAX_HOSTS}개까지 지정할 수 있습니다")
+    timeout = float(exec_data.get("timeout", EXEC_TIMEOUT))
+    parallel = max(1, min(int(exec_data.get("parallel", EXEC_MAX_PARALLEL)), EXEC_MAX_PARALLEL))
+    return StreamingResponse(
+        stream_exec_batch(targets, command, timeout, parallel),
+        media_type="application/x-ndjson"
+    )
+
+def get_index(session_id):
+    if session_id not in sftp_sessions:
+        raise HTTPException(status_code=404, detail="SFTP 세션을 찾을 수 없습니다")
+    index = sftp_sessions[session_id].index
+    if index is None:
+        raise HTTPException(status_code=404, detail="색인이 없습니다")
+    return index
+
+@app.post("/api/sftp/{session_id}/index")
+async def start_index(session_id: str, index_data: dict):
+    """원격 디렉토리 트리 색인 만들기 (이미 같은 경로의 색인이 있으면 바뀐 디렉토리만 갱신)
+    
+    index_data: path(색인할 디렉토리)
+    """
+    if session_id not in sftp_sessions:
+        raise HTTPException(status_code=404, detail="SFTP 세션을 찾을 수 없습니다")
+    sftp_session = sftp_sessions[session_id]
+    root = await asyncio.get_running_loop().run_in_executor(
+        sftp_executor, sftp_session._listing_path, index_data.get("path") or "."
+    )
+    if sftp_session.index is None or sftp_session.index.root != root:
+        if sftp_session.index:
+            sftp_session.index.cancel()
+        sftp_session.index = RemoteIndex(sftp_session, root)
+    sftp_session.index.refresh()
+    return sftp_session.index.status()
+
+@app.get("/api/sftp/{session_id}/index")
+async def index_status(session_id: str):
+    """색인 상태 (진행 중이면 지금까지 읽은 항목 수)"""
+    return get_index(session_id).status()
+
+@app.get("/api/sftp/{session_id}/index/search")
+async def search_index(session_id: str, q: str, prefix: bool = False, type: Optional[str] = None,
+                       under: Optional[str] = None, limit: int = INDEX_SEARCH_LIMIT):
+    """색인에서 파일 이름 검색 (원격에 요청하지 않음)
+    
+    q: 검색어 (대소문자 무시 부분 일치, prefix=true면 접두어), type: file/directory, under: 이 디렉토리 아래만
+    색인이 INDEX_MAX_AGE보다 오래되었으면 현재 색인으로 응답하고 백그라운드에서 갱신
+    """
+    index = get_index(session_id)
+    if not q:
+        raise HTTPException(status_code=400, detail="검색어가 필요합니다")
+    if index.stale():
+        index.refresh()
+    snapshot = index.snapshot
+    if snapshot is None:
+        return {"results": [], "more": False, "elapsed_ms": 0, "index": index.status()}
+    started = time.perf_counter()
+    # 필터로 대부분 걸러지는 검색은 많은 일치 항목을 훑으므로 이벤트 루프 밖에서 실행
+    results, more = await asyncio.get_running_loop().run_in_executor(
+        None, functools.partial(snapshot.search, q, prefix=prefix, kind=type, under=under,
+                                limit=max(1, min(limit, INDEX_SEARCH_MAX)))
+    )
+    return {
+        "results": results,
+        "more": more,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        "index": index.status(),
+    }
+
+@app.delete("/api/sftp/{session_id}/index")
+async def drop_index(session_id: str):
+    """색인 삭제 (진행 중인 색인 작업 취소)"""
+    index = get_index(session_id)
+    index.cancel()
+    sftp_sessions[session_id].index = None
+    return {"success": True}
+
+def find_disk_usage(sftp_session, path):
+    """path를 포함하는 가장 깊은 사용량 계산 작업"""
+    jobs = [
+        job for root, job in sftp_session.disk_usage.items()
+        if path == root or path.startswith(root.rstrip("/") + "/")
+    ]
+    return max(jobs, key=lambda job: len(job.root)) if jobs else None
+
+@app.post("/api/sftp/{session_id}/du")
+async def start_disk_usage(session_id: str, du_data: dict):
+    """원격 디렉토리 사용량 계산 시작 (같은 디렉토리의 결과가 있으면 refresh=true일 때만 다시 계산)
+    
+    du_data: path, method(auto: du 후 안 되면 SFTP, du, sftp), refresh
+    """
+    if session_id not in sftp_sessions:
+        raise HTTPException(status_code=404, detail="SFTP 세션을 찾을 수 없습니다")
+    method = du_data.get("method", "auto")
+    if method not in ("auto", "du", "sftp"):
+        raise HTTPException(status_code=400, detail="지원하지 않는 방식입니다")
+    sftp_session = sftp_sessions[session_id]
+    root = await asyncio.get_running_loop().run_in_executor(
+        sftp_executor, sftp_session._listing_path, du_data.get("path") or "."
+    )
+    job = sftp_session.disk_usage.get(root)
+    if job and job.state in ("running", "done") and not du_data.get("refresh"):
+        return job.snapshot()
+    if job:
+        job.cancel()
+    job = sftp_session.disk_usage[root] = DiskUsageJob(sftp_session, root, method)
+    job.start()
+    return job.snapshot()
+
+@app.get("/api/sftp/{session_id}/du")
+async def get_disk_usage(session_id: str, path: str, limit: int = DU_CHILDREN_LIMIT):
+    """사용량 계산 진행 상황과 디렉토리 하나의 결과 (하위 디렉토리는 큰 순서)
+    
+    path: 계산을 시작한 디렉토리 또는 그 하위 디렉토리 (원격에 다시 요청하지 않음)
+    """
+    if session_id not in sftp_sessions:
+        raise HTTPException(status_code=404, detail="SFTP 세션을 찾을 수 없습니다")
+    job = find_disk_usage(sftp_sessions[session_id], path.rstrip("/") or "/")
+    if job is None:
+        raise HTTPException(status_code=404, detail="사용량 계산 결과가 없습니다")
+    return {**job.snapshot(), **job.view(path.rstrip("/") or "/", max(1, limit))}
+
+@app.delete("/api/sftp/{session_id}/du")
+async def drop_disk_usage(session_id: str, path: str):
+    """사용량 계산 취소 / 결과 삭제"""
+    if session_id not in sftp_sessions:
+        raise HTTPException(status_code=404, detail="SFTP 세션을 찾을 수 없습니다")
+    job = sftp_sessions[session_id].disk_usage.pop(path.rstrip("/") or "/", None)
+    if job is None:
+        raise HTTPException(status_code=404, detail="사용량 계산 결과가 없습니다")
+    job.cancel()
+    return {"success": True}
+
 # 로컬 파일 시스템 API (브라우저에서는 제한적)
+LOCAL_LISTING_WATCH = os.environ.get("LOCAL_LISTING_WATCH", "1") == "1"        # inotify로 변경을 감시하며 목록 캐시 (Linux)
+LOCAL_LISTING_CACHE_TTL = float(os.environ.get("LOCAL_LISTING_CACHE_TTL", "300"))  # 변경 알림이 없어도 이 시간이 지나면 다시 읽음 (초)
+LOCAL_LISTING_CACHE_SIZE = int(os.environ.get("LOCAL_LISTING_CACHE_SIZE", "64"))   # 캐시(감시)하는 디렉토리 수 (LRU)
+
+# inotify 이벤트 (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+LOCAL_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+                    | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (뒤에 len 바이트 이름)
+
+def local_entry(entry):
+    """os.DirEntry → 목록 항목 (파일/디렉토리만, 깨진 링크 등은 None)
+    
+    DirEntry.stat()은 항목마다 stat 한 번만 하고 결과를 캐시함 (링크는 따라감)
+    """
+    try:
+        st = entry.stat()
+    except OSError:
+        return None
+    if stat.S_ISDIR(st.st_mode):
+        kind = 'directory'
+    elif stat.S_ISREG(st.st_mode):
+        kind = 'file'
+    else:
+        return None
+    return {
+        'name': entry.name,
+        'type': kind,
+        'size': st.st_size if kind == 'file' else 0,
+        'modified': st.st_mtime,
+        'permissions': oct(st.st_mode)[-3:]
+    }
+
+def scan_local_dir(path, on_batch=None):
+    """os.scandir로 디렉토리 읽기 (블로킹) - on_batch가 있으면 LISTING_PAGE_SIZE개씩 넘김"""
+    files = []
+    batch = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            item = local_entry(entry)
+            if item is None:
+                continue
+            batch.append(item)
+            if on_batch and len(batch) >= LISTING_PAGE_SIZE:
+                on_batch(batch)
+                files.extend(batch)
+                batch = []
+    if on_batch and batch:
+        on_batch(batch)
+    files.extend(batch)
+    return files
+
+class LocalDirectoryWatcher:
+    """inotify로 캐시한 로컬 디렉토리를 감시해 바뀌면 캐시에서 뺌 (ctypes, 이벤트 루프에서 읽음)
+    
+    디렉토리 자체의 항목 추가/삭제/이름 변경과 바로 아래 파일의 내용/속성 변경을 감지함
+    (하위 디렉토리 안의 변경으로 바뀌는 하위 디렉토리 수정 시각은 TTL이 지나야 반영).
+    목록을 읽는 사이에 이벤트가 오면 그 결과는 캐시하지 않도록 디렉토리마다 변경 횟수를 셈
+    """
+    def __init__(self, cache, max_watches=LOCAL_LISTING_CACHE_SIZE):
+        self.cache = cache
+        self.max_watches = max_watches
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 실패")
+        self.paths = OrderedDict()  # 경로 → wd (LRU)
+        self.watches = {}           # wd → 경로 집합 (링크로 같은 디렉토리를 다른 경로로 볼 수 있음)
+        self.generations = {}       # 경로 → 변경 횟수
+        self.lock = threading.Lock()
+        self.events = 0
+    
+    def start(self, loop):
+        loop.add_reader(self.fd, self._read)
+    
+    def watch(self, path):
+        """감시 시작(이미 감시 중이면 LRU 갱신) - 현재 변경 횟수 반환, 감시할 수 없으면 None"""
+        with self.lock:
+            if path in self.paths:
+                self.paths.move_to_end(path)
+                return self.generations.get(path, 0)
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), LOCAL_WATCH_MASK)
+            if wd < 0:
+                log(logging.DEBUG, "inotify 감시 실패", path=path, errno=ctypes.get_errno())
+                return None
+            self.paths[path] = wd
+            self.watches.setdefault(wd, set()).add(path)
+            while len(self.paths) > self.max_watches:
+                oldest, old_wd = self.paths.popitem(last=False)
+                self._forget(oldest, old_wd, remove=True)
+            return self.generations.get(path, 0)
+    
+    def store(self, path, generation, files):
+        """watch() 이후 바뀐 적이 없을 때만 캐시에 넣음 - 캐시 항목 반환"""
+        with self.lock:
+            if path in self.paths and self.generations.get(path, 0) == generation:
+                return self.cache.put(path, files)
+        return (time.monotonic(), files, OrderedDict())
+    
+    def _forget(self, path, wd, remove=False):
+        """경로 감시를 그만두고 캐시에서 뺌 (lock 안에서 호출)"""
+        self.paths.pop(path, None)
+        self.generations.pop(path, None)
+        paths = self.watches.get(wd)
+        if paths is not None:
+            paths.discard(path)
+            if not paths:
+                del self.watches[wd]
+                if remove:
+                    self.libc.inotify_rm_watch(self.fd, wd)
+        self.cache.discard(path)
+    
+    def _read(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        changed = set()
+        offset = 0
+        with self.lock:
+            while offset + INOTIFY_EVENT.size <= len(data):
+                wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size + length
+                self.events += 1
+                if mask & IN_Q_OVERFLOW:
+                    # 이벤트를 놓쳤으므로 모두 다시 읽게 함
+                    changed.update(self.paths)
+                    continue
+                if mask & IN_IGNORED:
+                    # 디렉토리가 지워졌거나 다른 파일시스템으로 옮겨져 감시가 끝남
+                    for path in list(self.watches.get(wd, ())):
+                        self._forget(path, wd)
+                    continue
+                changed.update(self.watches.get(wd, ()))
+            for path in changed:
+                self.generations[path] = self.generations.get(path, 0) + 1
+                self.cache.discard(path)
+    
+    def stats(self):
+        with self.lock:
+            return {"watches": len(self.paths), "events": self.events}
+
+local_listings = ListingCache(ttl=LOCAL_LISTING_CACHE_TTL, max_entries=LOCAL_LISTING_CACHE_SIZE)
+local_watcher: Optional[LocalDirectoryWatcher] = None
+
+def local_listing_path(path):
+    """서버 루트 안으로 제한한 경로 (벗어나면 서버 루트)"""
+    return safe_local_path(path) or os.path.abspath(".")
+
+def load_local_listing(path, on_batch=None):
+    """로컬 디렉토리 읽기 - 감시 중인 캐시에 있으면 캐시 사용 (블로킹)
+    
+    캐시는 inotify 감시가 켜져 있을 때만 사용 (감시 없이 캐시하면 바뀐 내용을 알 수 없음)
+    """
+    watcher = local_watcher
+    if watcher is not None:
+        entry = local_listings.get(path)
+        if entry is not None:
+            if on_batch:
+                on_batch(entry[1])
+            return entry, True
+        generation = watcher.watch(path)
+        files = scan_local_dir(path, on_batch)
+        if generation is not None:
+            return watcher.store(path, generation, files), False
+    else:
+        files = scan_local_dir(path, on_batch)
+    return (time.monotonic(), files, OrderedDict()), False
+
+def list_local_page(path, sort, order, query, kind, hidden, cursor, limit):
+    """정렬/필터된 로컬 파일 목록의 한 페이지 (블로킹 - 기본 executor에서 호출)"""
+    full_path = local_listing_path(path)
+    try:
+        entry, cached = load_local_listing(full_path)
+    except FileNotFoundError:
+        return {'files': [], 'path': full_path, 'total': 0, 'next_cursor': None, 'cached': False}
+    files = local_listings.view(entry, sort, order, query, kind, hidden)
+    start = max(0, int(cursor)) if cursor else 0
+    end = start + max(1, min(limit, LISTING_PAGE_MAX))
+    return {
+        'files': files[start:end],
+        'path': full_path,
+        'total': len(files),
+        'next_cursor': str(end) if end < len(files) else None,
+        'cached': cached
+    }
+
+def scan_local_files(path, on_batch, query=None, kind=None, hidden=False):
+    """로컬 디렉토리를 읽으면서 항목 묶음을 on_batch로 넘김 (scandir 순서, 블로킹)"""
+    full_path = local_listing_path(path)
+    on_batch(full_path)
+    load_local_listing(full_path, on_batch=lambda batch: on_batch(filter_entries(batch, query, kind, hidden)))
+
+@app.on_event("startup")
+async def start_local_watcher():
+    global local_watcher
+    if not LOCAL_LISTING_WATCH or not sys.platform.startswith("linux"):
+        return
+    try:
+        watcher = LocalDirectoryWatcher(local_listings)
+    except (OSError, AttributeError) as e:
+        log(logging.WARNING, "inotify를 쓸 수 없어 로컬 목록을 캐시하지 않음", error=e)
+        return
+    watcher.start(asyncio.get_running_loop())
+    local_watcher = watcher
+
 @app.get("/api/sftp/local/files")
-async def list_local_files(path: str = "."):
-    """로컬 파일 목록 조회 (서버 측 파일시스템)"""
+async def list_local_files(path: str = ".", sort: str = "name", order: str = "asc",
+                           filter: Optional[str] = None, type: Optional[str] = None, hidden: bool = True,
+                           cursor: Optional[str] = None, limit: int = LISTING_PAGE_SIZE, format: str = "json"):
+    """로컬 파일 목록 조회 (서버 측 파일시스템)
+    
+    매개변수는 원격 목록(/api/sftp/{id}/remote/files)과 같음 - sort/order, filter/type/hidden, cursor/limit,
+    format=ndjson(정렬 없이 읽는 대로 스트리밍). 단 숨김 파일은 예전 로컬 목록처럼 기본으로 포함 (hidden=false면 제외).
+    디렉토리는 scandir로 이벤트 루프 밖에서 읽고, inotify 감시가 켜져 있으면 바뀌지 않은 디렉토리는 캐시에서 바로 응답
+    """
+    if sort not in LISTING_SORT_KEYS or order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="지원하지 않는 정렬 방식입니다")
+    if cursor is not None and not cursor.isdigit():
+        raise HTTPException(status_code=400, detail="잘못된 cursor입니다")
+    
+    if format == "ndjson":
+        return StreamingResponse(
+            stream_listing(functools.partial(scan_local_files, path, query=filter, kind=type, hidden=hidden),
+                           path, executor=None),
+            media_type="application/x-ndjson"
+        )
+    
     try:
-        # 보안상 특정 디렉토리로 제한
-        safe_path = os.path.abspath(path)
-        server_root = os.path.abspath(".")
-        
-        if not safe_path.startswith(server_root):
-            safe_path = server_root
-        
-        files = []
-        if os.path.exists(safe_path):
-            for item in os.listdir(safe_path):
-                item_path = os.path.join(safe_path, item)
-                if os.path.isfile(item_path):
-                    stat_info = os.stat(item_path)
-                    files.append({
-                        'name': item,
-                        'type': 'file',
-                        'size': stat_info.st_size,
-                        'modified': stat_info.st_mtime
-                    })
-                elif os.path.isdir(item_path):
-                    stat_info = os.stat(item_path)
-                    files.append({
-                        'name': item,
-                        'type': 'directory',
-                        'size': 0,
-                        'modified': stat_info.st_mtime
-                    })
-        
-        return {'files': files, 'path': safe_path}
+        return await asyncio.get_running_loop().run_in_executor(
+            None, list_local_page, path, sort, order, filter, type, hidden, cursor, limit
+        )
     except Exception as e:
-        return {'files': [], 'path': path, 'error': str(e)}
+        log(logging.WARNING, "로컬 파일 목록 조회 실패", path=path, error=e)
+        return {'files': [], 'path': path, 'total': 0, 'next_cursor': None, 'cached': False, 'error': str(e)}
 
 @app.get("/")
 async def root():
@@ -521,4 +5508,10 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if WORKERS > 1:
+        # 워커 프로세스들은 모듈을 새로 import하므로 레지스트리 설정은 환경 변수로 전달
+        os.environ.setdefault("SESSION_REGISTRY", "local")
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=WORKERS,
+                    app_dir=os.path.dirname(os.path.abspath(__file__)))
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
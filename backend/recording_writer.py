@@ -0,0 +1,125 @@
+"""세션 녹화 writer 프로세스
+
+main.py의 RecordingWriter가 `python -m recording_writer`로 띄우고 stdin 파이프로
+(명령, 경로, 데이터) 메시지를 보냄. 백엔드 앱을 import하지 않으므로 표준 라이브러리만 사용.
+"""
+import codecs
+import gzip
+import logging
+import os
+import pickle
+import sys
+import zlib
+
+logger = logging.getLogger("recording_writer")
+
+RECORDING_MERGE_WINDOW = 0.005   # 이 간격 안에 연속된 출력은 이벤트 하나로 합침 (초)
+
+# JSON 문자열 이스케이프 - 터미널 출력은 ESC/CR/LF가 많아 json.dumps보다 bytes.replace가 몇 배 빠름
+_JSON_ESCAPES = [(b'\\', b'\\\\'), (b'"', b'\\"')] + [
+    (bytes([c]), {0x08: b'\\b', 0x09: b'\\t', 0x0a: b'\\n', 0x0c: b'\\f', 0x0d: b'\\r'}.get(c, b'\\u%04x' % c))
+    for c in range(0x20)
+]
+
+def json_escape(data):
+    """UTF-8 바이트 → JSON 문자열 내용 (따옴표 제외)"""
+    for char, escaped in _JSON_ESCAPES:
+        if char in data:
+            data = data.replace(char, escaped)
+    return data
+
+class RecordingFile:
+    """녹화 writer 프로세스 쪽: 이벤트를 asciicast 줄로 인코딩해서 파일에 기록"""
+    def __init__(self, path, header, compress):
+        self.raw = open(path, 'wb')
+        self.file = gzip.GzipFile(fileobj=self.raw, mode='wb', compresslevel=1) if compress else self.raw
+        self.file.write(header + b"\n")
+        # 청크 경계에서 잘린 멀티바이트 문자는 다음 이벤트로 넘김
+        self.decoders = {kind: codecs.getincrementaldecoder('utf-8')(errors='replace') for kind in ("o", "i")}
+        self.dirty = True
+    
+    def _text(self, kind, data):
+        """잘못된 UTF-8은 U+FFFD로 바꾼 UTF-8 바이트 (ASCII면 디코딩 생략)"""
+        if isinstance(data, str):
+            return data.encode()
+        decoder = self.decoders[kind]
+        if data.isascii() and not decoder.getstate()[0]:
+            return data
+        return decoder.decode(data).encode()
+    
+    def write(self, events):
+        # 짧은 간격으로 이어진 출력은 한 이벤트로 합침 - 청크별로 이스케이프해서 이어 쓰므로 합치는 복사가 없음
+        pieces = []
+        merged_time = None
+        for timestamp, kind, data in events:
+            if kind == "o" and merged_time is not None and timestamp - merged_time <= RECORDING_MERGE_WINDOW:
+                pieces.append(json_escape(self._text(kind, data)))
+                continue
+            if merged_time is not None:
+                pieces.append(b'"]\n')
+                merged_time = None
+            pieces.append(b'[%.6f, "%s", "' % (timestamp, kind.encode()))
+            pieces.append(json_escape(self._text(kind, data)))
+            if kind == "o":
+                merged_time = timestamp
+            else:
+                pieces.append(b'"]\n')
+        if merged_time is not None:
+            pieces.append(b'"]\n')
+        if pieces:
+            self.file.writelines(pieces)
+            self.dirty = True
+    
+    def sync(self):
+        if self.dirty:
+            if self.file is not self.raw:
+                self.file.flush(zlib.Z_SYNC_FLUSH)
+            self.raw.flush()
+            os.fsync(self.raw.fileno())
+            self.dirty = False
+    
+    def close(self):
+        if self.file is not self.raw:
+            self.file.close()
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+        self.raw.close()
+
+def run_recording_writer(stream):
+    """녹화 writer 프로세스 본체 - stdin으로 받은 (명령, 경로, 데이터) 메시지 처리
+    
+    JSON 인코딩/압축은 바이트당 비용이 커서 같은 프로세스에서 하면 GIL을 두고 출력 경로와 경쟁하므로
+    별도 프로세스(다른 코어)에서 처리. 부모가 종료되면(EOF) 열린 파일을 모두 닫고 종료.
+    """
+    files = {}
+    try:
+        while True:
+            try:
+                command, path, payload = pickle.load(stream)
+            except (EOFError, pickle.UnpicklingError):
+                # 부모 프로세스 종료
+                break
+            try:
+                if command == "open":
+                    header, compress = payload
+                    files[path] = RecordingFile(path, header, compress)
+                elif command == "events" and path in files:
+                    files[path].write(payload)
+                elif command == "close" and path in files:
+                    files.pop(path).close()
+                elif command == "sync":
+                    for recording in files.values():
+                        recording.sync()
+            except Exception as e:
+                logger.error("녹화 기록 실패 path=%s error=%s", path, e)
+                files.pop(path, None)
+    finally:
+        for recording in files.values():
+            try:
+                recording.close()
+            except Exception:
+                pass
+
+if __name__ == "__main__":
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(message)s")
+    run_recording_writer(sys.stdin.buffer)
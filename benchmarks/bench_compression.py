@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""출력 프레임 압축 벤치마크: 압축률과 프레임당 CPU 비용
+
+htop 형태의 전체 화면 갱신과 빌드 로그 출력을 흉내 낸 트레이스(또는 --trace 로 지정한
+asciicast 녹화 파일)를 실제 출력 프레임 단위로 OutputCompressor에 넣어
+레벨별 / 세션 공유 컨텍스트 vs 프레임별 독립 압축 / 최소 크기 임계값별로 비교한다.
+
+    python benchmarks/bench_compression.py
+    python benchmarks/bench_compression.py --trace recordings/<id>.cast.gz
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from main import OutputCompressor, read_recording  # noqa: E402
+
+
+def htop_trace(frames=600, width=160, height=48, seed=1):
+    """1초마다 전체 화면을 다시 그리는 htop 비슷한 출력 - 숫자만 조금씩 바뀜"""
+    rng = random.Random(seed)
+    procs = [(rng.randint(1, 65535), rng.choice(['root', 'www-data', 'postgres', 'app']),
+              rng.choice(['python3 worker.py', 'postgres: writer', 'nginx: worker process', '/usr/bin/node server.js']))
+             for _ in range(height)]
+    trace = []
+    for tick in range(frames):
+        out = ['\x1b[H\x1b[2J']
+        for cpu in range(4):
+            used = rng.randint(0, 40)
+            out.append(f'\x1b[{cpu + 1};1H  {cpu} \x1b[1m[\x1b[0;32m{"|" * used}\x1b[0m{" " * (40 - used)}'
+                       f'\x1b[1m{rng.uniform(0, 100):5.1f}%]\x1b[0m')
+        out.append(f'\x1b[6;1H  Tasks: \x1b[1m{len(procs)}\x1b[0m, load average: {rng.uniform(0, 4):.2f}')
+        out.append('\x1b[8;1H\x1b[30;42m    PID USER      PRI  NI  VIRT   RES   SHR S CPU% MEM%   TIME+  Command'
+                   + ' ' * (width - 76) + '\x1b[0m')
+        for row, (pid, user, command) in enumerate(procs[:height - 10]):
+            out.append(f'\x1b[{row + 9};1H{pid:7d} {user:<9} 20   0 {rng.randint(1, 999):4d}M '
+                       f'{rng.randint(1, 999):4d}M {rng.randint(1, 99):4d}M S {rng.uniform(0, 100):4.1f} '
+                       f'{rng.uniform(0, 10):4.1f} {tick // 60:3d}:{tick % 60:02d}.00 \x1b[1m{command}\x1b[0m')
+        trace.append(''.join(out).encode())
+    return trace
+
+
+def build_log_trace(lines=20000, seed=2):
+    """컴파일러/빌드 도구 로그 - 줄 단위로 조금씩, 가끔 몰아서 출력"""
+    rng = random.Random(seed)
+    modules = [f'src/{d}/{f}.c' for d in ('core', 'net', 'fs', 'util') for f in ('alloc', 'buffer', 'hash', 'io', 'list')]
+    trace, pending = [], []
+    for i in range(lines):
+        module = rng.choice(modules)
+        if rng.random() < 0.05:
+            line = (f'\x1b[1m{module}:{rng.randint(1, 900)}:{rng.randint(1, 80)}: \x1b[35mwarning: \x1b[0m'
+                    f'unused variable ‘tmp{rng.randint(0, 99)}’ [-Wunused-variable]\r\n')
+        else:
+            line = f'[{i * 100 // lines:3d}%] \x1b[32mBuilding C object CMakeFiles/app.dir/{module}.o\x1b[0m\r\n'
+        pending.append(line)
+        if rng.random() < 0.3:
+            trace.append(''.join(pending).encode())
+            pending = []
+    if pending:
+        trace.append(''.join(pending).encode())
+    return trace
+
+
+def cast_trace(path):
+    _, events = read_recording(path)
+    return [data.encode('utf-8', errors='surrogateescape') for _, kind, data in events if kind == 'o']
+
+
+def echo_trace(keys=2000):
+    """키 입력 에코 - 1~3바이트 프레임"""
+    return [b'x', b'\x08\x1b[K', b'ls'] * (keys // 3)
+
+
+def measure(trace, level, shared, min_size, rounds):
+    raw = sum(len(frame) for frame in trace)
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        if shared:
+            compressor = OutputCompressor(level=level, min_size=min_size)
+            sent = sum(len(compressor.encode(frame)) for frame in trace)
+        else:
+            # 프레임마다 새 컨텍스트 - 이전 프레임을 참조하지 못함
+            sent = 0
+            for frame in trace:
+                sent += len(OutputCompressor(level=level, min_size=min_size).encode(frame))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        'level': level,
+        'context': 'session' if shared else 'per-frame',
+        'min_size': min_size,
+        'frames': len(trace),
+        'raw_kb': round(raw / 1024, 1),
+        'sent_kb': round(sent / 1024, 1),
+        'ratio': round(raw / sent, 2),
+        'us_per_frame': round(best / len(trace) * 1e6, 2),
+        'mb_s': round(raw / best / (1024 * 1024), 1),
+    }
+
+
+def verify(trace):
+    """세션 컨텍스트로 압축한 프레임이 순서대로 원본과 같게 풀리는지 확인"""
+    compressor = OutputCompressor()
+    inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+    for frame in trace:
+        encoded = compressor.encode(frame)
+        decoded = inflater.decompress(encoded[5:]) if encoded[0] == 0x03 else encoded[1:]
+        assert decoded == frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trace', action='append', help='asciicast 녹화 파일 (.cast / .cast.gz)')
+    parser.add_argument('--levels', default='1,3,6,9')
+    parser.add_argument('--min-sizes', default='0,64,256,1024')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    traces = {'htop': htop_trace(), 'build-log': build_log_trace(), 'echo': echo_trace()}
+    for path in args.trace or []:
+        traces[os.path.basename(path)] = cast_trace(path)
+
+    for name, trace in traces.items():
+        verify(trace)
+        for level in (int(level) for level in args.levels.split(',')):
+            for shared in (True, False):
+                print(json.dumps({'trace': name, **measure(trace, level, shared, 0, args.rounds)}), flush=True)
+        for min_size in (int(size) for size in args.min_sizes.split(',')):
+            print(json.dumps({'trace': name, **measure(trace, 3, True, min_size, args.rounds)}), flush=True)
+
+
+if __name__ == '__main__':
+    main()
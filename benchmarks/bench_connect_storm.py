@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""연결 폭주 테스트: 응답 없는 포트로 향하는 SSH 연결이 다른 세션의 출력을 막지 않는지 확인
+
+1. 정상 세션 하나에서 20ms 간격으로 키 입력 에코 지연시간을 측정
+2. 그 동안 WebSocket 50개가 블랙홀 포트(접속은 받지만 SSH 배너를 보내지 않음)로 connect 요청
+3. 연결 중인 WebSocket들을 닫은 뒤 새 연결이 바로 성공하는지 (워커 반환 여부) 확인
+
+    python benchmarks/bench_connect_storm.py --hanging 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+import uvicorn  # noqa: E402
+import websockets  # noqa: E402
+
+import main  # noqa: E402
+from sshserver import BenchSSHServer  # noqa: E402
+
+
+def start_black_hole():
+    """접속은 받아 두기만 하고 아무것도 보내지 않는 포트"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(1024)
+    held = []
+
+    def accept_loop():
+        while True:
+            try:
+                held.append(sock.accept()[0])
+            except OSError:
+                break
+
+    threading.Thread(target=accept_loop, daemon=True).start()
+    return sock, sock.getsockname()[1]
+
+
+def start_app():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    server = uvicorn.Server(uvicorn.Config(main.app, host='127.0.0.1', port=port, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, port
+
+
+async def open_terminal(app_port, session_id, ssh_port):
+    ws = await websockets.connect(f'ws://127.0.0.1:{app_port}/ws/{session_id}')
+    await ws.send(json.dumps({
+        'type': 'connect', 'hostname': '127.0.0.1', 'username': 'bench', 'password': 'bench',
+        'port': ssh_port, 'protocol': 'binary'
+    }))
+    return ws
+
+
+async def measure_echo(ws, duration):
+    latencies = []
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        await ws.send(b'\x00x')
+        await ws.recv()
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.02)
+    latencies.sort()
+    return {
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99)], 3),
+        'max_ms': round(latencies[-1], 3),
+    }
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as root:
+        ssh_server = BenchSSHServer(root)
+        ssh_port = ssh_server.start()
+        black_hole, black_hole_port = start_black_hole()
+        app_server, app_port = start_app()
+
+        live = await open_terminal(app_port, 'live', ssh_port)
+        assert json.loads(await live.recv())['success']
+        baseline = await measure_echo(live, args.seconds)
+
+        hanging = [await open_terminal(app_port, f'hang-{i}', black_hole_port) for i in range(args.hanging)]
+        during = await measure_echo(live, args.seconds)
+
+        # 연결 도중 WebSocket 종료 → 진행 중인 연결 취소
+        for ws in hanging:
+            await ws.close()
+        start = time.perf_counter()
+        fresh = await open_terminal(app_port, 'fresh', ssh_port)
+        fresh_ok = json.loads(await asyncio.wait_for(fresh.recv(), 30))['success']
+        fresh_ms = (time.perf_counter() - start) * 1000
+
+        result = {
+            'hanging_connects': args.hanging,
+            'connect_workers': main.SSH_CONNECT_WORKERS,
+            'echo_baseline': baseline,
+            'echo_during_storm': during,
+            'fresh_connect_ok': fresh_ok,
+            'fresh_connect_ms': round(fresh_ms, 1),
+        }
+        print(json.dumps(result))
+
+        await live.close()
+        await fresh.close()
+        app_server.should_exit = True
+        black_hole.close()
+        ssh_server.stop()
+
+        ok = fresh_ok and during['max_ms'] < args.max_stall_ms and fresh_ms < args.max_stall_ms * 20
+        return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hanging', type=int, default=50)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--max-stall-ms', type=float, default=250.0)
+    sys.exit(asyncio.run(run(parser.parse_args())))
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""델타 업로드 벤치마크: 일부만 바뀐 큰 파일/디렉토리를 다시 올릴 때 통째 전송과 비교
+
+1. 파일 하나를 통째로 올린 뒤 흩어진 몇 블록을 고치고 끝에 조금 덧붙여서
+   /upload/stream(통째)과 /upload/delta(바뀐 블록만)로 각각 다시 올려 보낸 바이트와 시간 비교
+2. 디렉토리를 작업(jobs)으로 올린 뒤 일부 파일만 고쳐서 sync 작업과 일반 작업으로 다시 올려 비교
+올린 결과는 BenchSSHServer 루트에서 원본과 같은지 확인한다 (루프백이므로 네트워크가 느릴수록 차이가 커짐).
+
+    python benchmarks/bench_delta.py --size-mb 512 --changes 16
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+import main  # noqa: E402
+from sshserver import BenchSSHServer  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def write_random(path, size, seed):
+    rng = random.Random(seed)
+    with open(path, 'wb') as f:
+        for _ in range(0, size, MB):
+            f.write(rng.randbytes(min(MB, size - f.tell())))
+
+
+def modify(path, changes, append, seed):
+    """흩어진 위치 changes곳을 4KB씩 바꾸고 끝에 append 바이트 덧붙임"""
+    rng = random.Random(seed)
+    size = os.path.getsize(path)
+    with open(path, 'r+b') as f:
+        for _ in range(changes):
+            f.seek(rng.randrange(0, size - 4096))
+            f.write(rng.randbytes(4096))
+        f.seek(0, os.SEEK_END)
+        f.write(rng.randbytes(append))
+
+
+def same_file(a, b):
+    if os.path.getsize(a) != os.path.getsize(b):
+        return False
+    with open(a, 'rb') as fa, open(b, 'rb') as fb:
+        while True:
+            x, y = fa.read(MB), fb.read(MB)
+            if x != y:
+                return False
+            if not x:
+                return True
+
+
+def put(client, endpoint, path, remote_dir, **params):
+    def body():
+        with open(path, 'rb') as f:
+            while chunk := f.read(MB):
+                yield chunk
+    start = time.perf_counter()
+    response = client.put(f'/api/sftp/bench/upload/{endpoint}', content=body(), headers={
+        'content-length': str(os.path.getsize(path))
+    }, params={'filename': os.path.basename(path), 'remote_path': remote_dir, **params})
+    response.raise_for_status()
+    return time.perf_counter() - start, response.json()
+
+
+def run_job(client, source, destination, sync):
+    job = client.post('/api/sftp/bench/jobs', json={
+        'direction': 'upload', 'sources': [source], 'destination': destination, 'sync': sync
+    }).json()
+    while job['state'] in ('pending', 'running'):
+        time.sleep(0.05)
+        job = client.get(f"/api/sftp/jobs/{job['id']}").json()
+    if job['state'] != 'done':
+        raise RuntimeError(f'작업 실패: {job}')
+    return {key: job[key] for key in ('elapsed', 'files_total', 'files_skipped', 'bytes_total', 'bytes_sent')}
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=256)
+    parser.add_argument('--changes', type=int, default=16)
+    parser.add_argument('--append-kb', type=int, default=64)
+    parser.add_argument('--block-kb', type=int, default=main.DELTA_BLOCK_SIZE // 1024)
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--file-kb', type=int, default=1024)
+    args = parser.parse_args()
+    main.logger.setLevel('WARNING')
+
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory(dir='.') as local:
+        ssh_server = BenchSSHServer(root)
+        ssh_port = ssh_server.start()
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        server = uvicorn.Server(uvicorn.Config(main.app, host='127.0.0.1', port=port, log_level='warning'))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+
+        try:
+            with httpx.Client(base_url=f'http://127.0.0.1:{port}', timeout=None) as client:
+                client.post('/api/sftp/bench/connect', json={
+                    'hostname': '127.0.0.1', 'username': 'bench', 'password': 'bench', 'port': ssh_port
+                }).raise_for_status()
+
+                # 1. 파일 하나
+                path = os.path.join(local, 'artifact.bin')
+                write_random(path, args.size_mb * MB, 1)
+                put(client, 'stream', path, root)
+                modify(path, args.changes, args.append_kb * 1024, 2)
+                full_time, _ = put(client, 'stream', path, root)
+                modify(path, args.changes, args.append_kb * 1024, 3)
+                delta_time, result = put(client, 'delta', path, root, block_size=args.block_kb * 1024)
+                if not same_file(path, os.path.join(root, 'artifact.bin')):
+                    raise RuntimeError('델타 업로드 결과가 원본과 다릅니다')
+                delta = result['delta']
+                print(json.dumps({
+                    'case': 'file',
+                    'size_mb': args.size_mb,
+                    'changes': args.changes,
+                    'block_kb': args.block_kb,
+                    'full': {'seconds': round(full_time, 2), 'bytes_sent': os.path.getsize(path)},
+                    'delta': {'seconds': round(delta_time, 2), 'bytes_sent': delta['bytes_sent'],
+                              'changed_blocks': delta['changed_blocks'], 'blocks': delta['blocks'],
+                              'signature': delta['signature_method'], 'phases': delta['seconds']},
+                    'cpus': os.cpu_count(),
+                }), flush=True)
+
+                # 2. 디렉토리
+                tree = os.path.join(local, 'tree')
+                for i in range(args.files):
+                    os.makedirs(os.path.join(tree, f'd{i % 10}'), exist_ok=True)
+                    write_random(os.path.join(tree, f'd{i % 10}', f'f{i}.bin'), args.file_kb * 1024, 100 + i)
+                run_job(client, tree, root, sync=False)
+                # 원격 수정 시각(업로드 시각)과 초 단위로 겹치지 않게 한 뒤 고침
+                time.sleep(1.1)
+                changed = args.files // 10
+                for i in range(changed):
+                    modify(os.path.join(tree, f'd{i % 10}', f'f{i}.bin'), 1, 0, 200 + i)
+                full = run_job(client, tree, root, sync=False)
+                time.sleep(1.1)
+                for i in range(changed):
+                    modify(os.path.join(tree, f'd{i % 10}', f'f{i}.bin'), 1, 0, 300 + i)
+                synced = run_job(client, tree, root, sync=True)
+                for i in range(args.files):
+                    relative = os.path.join(f'd{i % 10}', f'f{i}.bin')
+                    if not same_file(os.path.join(tree, relative), os.path.join(root, 'tree', relative)):
+                        raise RuntimeError(f'동기화 결과가 원본과 다릅니다: {relative}')
+                unchanged = run_job(client, tree, root, sync=True)
+                print(json.dumps({
+                    'case': 'directory',
+                    'files': args.files,
+                    'changed_files': changed,
+                    'file_kb': args.file_kb,
+                    'full': full,
+                    'sync': synced,
+                    'sync_unchanged': unchanged,
+                    'cpus': os.cpu_count(),
+                }), flush=True)
+                shutil.rmtree(tree)
+        finally:
+            server.should_exit = True
+            ssh_server.stop()
+
+
+if __name__ == '__main__':
+    main_()
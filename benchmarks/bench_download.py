@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""SFTP 다운로드 벤치마크: 최대 RSS와 첫 바이트까지의 시간(TTFB)
+
+현재 스트리밍 엔드포인트(/api/sftp/{id}/download)와 이전 방식(원격 파일 전체를 BytesIO로 읽은 뒤
+다시 BytesIO로 복사해서 응답)을 각각 별도 프로세스에서 실행해 비교한다.
+
+    python benchmarks/bench_download.py --size-mb 128
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+
+def run_child(mode, root, size):
+    import httpx
+    import uvicorn
+    from fastapi.responses import StreamingResponse
+
+    import main
+    from sshserver import BenchSSHServer
+
+    @main.app.get("/bench/legacy-download")
+    async def legacy_download(session_id: str, remote_path: str):
+        sftp_session = main.sftp_sessions[session_id]
+        file_data = io.BytesIO()
+        with sftp_session.sftp.open(remote_path, 'rb') as remote_file:
+            file_data.write(remote_file.read())
+        file_data.seek(0)
+        return StreamingResponse(io.BytesIO(file_data.read()), media_type='application/octet-stream')
+
+    ssh_server = BenchSSHServer(root)
+    ssh_port = ssh_server.start()
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    server = uvicorn.Server(uvicorn.Config(main.app, host='127.0.0.1', port=port, log_level='warning'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    with httpx.Client(base_url=f'http://127.0.0.1:{port}', timeout=None) as client:
+        client.post('/api/sftp/bench/connect', json={
+            'hostname': '127.0.0.1', 'username': 'bench', 'password': 'bench', 'port': ssh_port
+        })
+        url = '/api/sftp/bench/download' if mode == 'stream' else '/bench/legacy-download'
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        ttfb = None
+        received = 0
+        with client.stream('GET', url, params={'session_id': 'bench', 'remote_path': os.path.join(root, 'blob.bin')}) as response:
+            for chunk in response.iter_raw():
+                if ttfb is None:
+                    ttfb = time.perf_counter() - start
+                received += len(chunk)
+        elapsed = time.perf_counter() - start
+
+    assert received == size, (received, size)
+    print(json.dumps({
+        'mode': mode,
+        'size_mb': size // (1024 * 1024),
+        'ttfb_ms': round(ttfb * 1000, 1),
+        'total_s': round(elapsed, 2),
+        'throughput_mb_s': round(size / elapsed / (1024 * 1024), 1),
+        # ru_maxrss는 KB 단위 (Linux)
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'rss_growth_mb': round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024, 1),
+    }))
+    server.should_exit = True
+    ssh_server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=128)
+    parser.add_argument('--modes', default='stream,legacy')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--root', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    size = args.size_mb * 1024 * 1024
+
+    if args.child:
+        run_child(args.child, args.root, size)
+        return
+
+    with tempfile.TemporaryDirectory() as root:
+        with open(os.path.join(root, 'blob.bin'), 'wb') as f:
+            block = os.urandom(1024 * 1024)
+            for _ in range(args.size_mb):
+                f.write(block)
+        for mode in args.modes.split(','):
+            subprocess.run(
+                [sys.executable, __file__, '--child', mode, '--root', root, '--size-mb', str(args.size_mb)],
+                check=True
+            )
+
+
+if __name__ == '__main__':
+    main()
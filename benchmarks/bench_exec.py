@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""다중 호스트 명령 실행 벤치마크: /api/exec 동시 실행 수에 따른 전체 소요 시간
+
+BenchSSHServer 하나에 사용자 이름을 호스트마다 다르게 주어 호스트 N개를 흉내 낸다
+(사용자 이름이 다르면 풀에서 연결을 공유하지 않으므로 호스트마다 핸드셰이크를 따로 함).
+parallel 값별로 처음 실행(연결 포함)과 바로 이어서 다시 실행(풀의 인증된 연결 재사용)을 비교한다.
+기본 명령은 원격 명령 실행 시간을 흉내 내기 위해 잠깐 쉬었다가 출력한다.
+
+    python benchmarks/bench_exec.py --hosts 200 --parallel 1,16,64
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+import main  # noqa: E402
+from sshserver import BenchSSHServer  # noqa: E402
+
+
+def run_batch(client, hosts, command, parallel):
+    start = time.perf_counter()
+    first_result = None
+    results = []
+    with client.stream('POST', '/api/exec', json={
+        'command': command, 'hosts': hosts, 'password': 'bench', 'parallel': parallel
+    }) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            event = json.loads(line)
+            if event['type'] == 'result':
+                if first_result is None:
+                    first_result = time.perf_counter() - start
+                results.append(event)
+    elapsed = time.perf_counter() - start
+    failed = [event for event in results if event['exit_status'] != 0]
+    if failed:
+        raise RuntimeError(f'실패한 호스트 {len(failed)}개: {failed[0]}')
+    return {
+        'total_s': round(elapsed, 2),
+        'first_result_ms': round(first_result * 1000, 1),
+        'hosts_per_s': round(len(hosts) / elapsed, 1),
+    }
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=200)
+    parser.add_argument('--parallel', default='1,16,64')
+    parser.add_argument('--command', default='sleep 0.2; echo ok')
+    args = parser.parse_args()
+    main.logger.setLevel('WARNING')
+
+    with tempfile.TemporaryDirectory() as root:
+        ssh_server = BenchSSHServer(root)
+        ssh_port = ssh_server.start()
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        server = uvicorn.Server(uvicorn.Config(main.app, host='127.0.0.1', port=port, log_level='warning'))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+
+        try:
+            with httpx.Client(base_url=f'http://127.0.0.1:{port}', timeout=None) as client:
+                for run, parallel in enumerate(int(p) for p in args.parallel.split(',')):
+                    # 실행마다 사용자 이름을 바꿔 이전 실행의 연결을 재사용하지 않게 함
+                    hosts = [f'bench{run}-{i}@127.0.0.1:{ssh_port}' for i in range(args.hosts)]
+                    cold = run_batch(client, hosts, args.command, parallel)
+                    warm = run_batch(client, hosts, args.command, parallel)
+                    print(json.dumps({
+                        'hosts': args.hosts,
+                        'parallel': min(parallel, main.EXEC_MAX_PARALLEL),
+                        'cold': cold,
+                        'warm_pooled': warm,
+                        'cpus': os.cpu_count(),
+                    }), flush=True)
+        finally:
+            server.should_exit = True
+            ssh_server.stop()
+
+
+if __name__ == '__main__':
+    main_()
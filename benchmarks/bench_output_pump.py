@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""SSH 출력 펌프 벤치마크: 유휴 CPU 사용량과 키 입력 에코 지연시간
+
+이벤트 기반 리더(현재 SSHSession)와 이전 방식(세션당 스레드 + queue.Queue + 10ms 폴링)을
+1, 100, 1000 세션에서 비교한다.
+
+    python benchmarks/bench_output_pump.py --sessions 1,100,1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import queue
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+from main import SSHSession  # noqa: E402
+from sshserver import BenchSSHServer  # noqa: E402
+
+
+class LegacyPump:
+    """이전 구현: 세션마다 recv_ready()를 10ms 간격으로 폴링하는 스레드"""
+
+    def __init__(self, session):
+        self.session = session
+        self.queue = queue.Queue()
+        self.running = True
+        self.thread = threading.Thread(target=self._read, daemon=True)
+        self.thread.start()
+
+    def _read(self):
+        channel = self.session.channel
+        while self.running:
+            try:
+                if channel.recv_ready():
+                    self.queue.put(channel.recv(1024).decode('utf-8', errors='ignore'))
+                time.sleep(0.01)
+            except Exception:
+                break
+
+    async def get_output(self):
+        while True:
+            output = ""
+            while not self.queue.empty():
+                output += self.queue.get_nowait()
+            if output:
+                return output
+            await asyncio.sleep(0.01)
+
+    def stop(self):
+        self.running = False
+
+
+async def run_scenario(port, count, mode, idle_seconds, samples):
+    loop = asyncio.get_running_loop()
+    sessions = []
+    for _ in range(count):
+        session = SSHSession()
+        if not await loop.run_in_executor(None, session.connect, '127.0.0.1', 'bench', 'bench', port):
+            raise RuntimeError('연결 실패')
+        if mode == 'event':
+            session.start_reading(loop)
+            pump = session
+        else:
+            pump = LegacyPump(session)
+        sessions.append((session, pump))
+
+    # 연결 직후 배너/프롬프트 등이 가라앉을 때까지 대기
+    await asyncio.sleep(1.0)
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    await asyncio.sleep(idle_seconds)
+    idle_cpu = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start) * 100
+
+    latencies = []
+    for i in range(samples):
+        session, pump = sessions[i % len(sessions)]
+        start = time.perf_counter()
+        session.send_command('x')
+        await pump.get_output()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    threads = threading.active_count()
+    for session, pump in sessions:
+        if mode == 'legacy':
+            pump.stop()
+        session.disconnect()
+
+    latencies.sort()
+    return {
+        'mode': mode,
+        'sessions': count,
+        'threads': threads,
+        'idle_cpu_percent': round(idle_cpu, 2),
+        'echo_p50_ms': round(statistics.median(latencies), 3),
+        'echo_p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 3),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', default='1,100,1000')
+    parser.add_argument('--modes', default='event,legacy')
+    parser.add_argument('--idle-seconds', type=float, default=5.0)
+    parser.add_argument('--samples', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        server = BenchSSHServer(root)
+        port = server.start()
+        try:
+            for count in (int(c) for c in args.sessions.split(',')):
+                for mode in args.modes.split(','):
+                    result = await run_scenario(port, count, mode, args.idle_seconds, args.samples)
+                    print(json.dumps(result), flush=True)
+        finally:
+            server.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
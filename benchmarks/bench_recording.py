@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""세션 녹화 오버헤드 벤치마크: 대량 출력(cat) 처리량과 이벤트 루프 쪽 기록 비용
+
+같은 세션에서 `bulk N` 출력을 녹화 없이 / 녹화 / gzip 녹화로 각각 받아 처리량을 비교하고,
+SessionRecorder.record() 한 번의 비용(이벤트 루프에서 실행되는 부분)을 따로 측정한다.
+인코딩/압축은 녹화 writer 프로세스에서 하므로 백엔드 프로세스 CPU와 writer CPU를 나눠서 보고한다.
+(코어가 하나뿐인 환경에서는 writer가 같은 코어를 쓰므로 처리량 차이에 writer CPU가 그대로 드러남)
+
+    python benchmarks/bench_recording.py --size-mb 200 --rounds 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+from main import SSHSession, SessionRecorder, recording_writer  # noqa: E402
+from sshserver import BenchSSHServer  # noqa: E402
+
+
+async def drain(session, size):
+    """bulk 출력을 size 바이트 이상 받을 때까지 소비 - 소요 시간 반환"""
+    session.send_command(f'\rbulk {size}\r')
+    start = time.perf_counter()
+    received = 0
+    while received < size:
+        output = await session.get_output()
+        if output is None:
+            raise RuntimeError('세션 종료')
+        received += len(output)
+    return time.perf_counter() - start
+
+
+async def measure_throughput(port, size, mode, rounds, recordings):
+    loop = asyncio.get_running_loop()
+    session = SSHSession()
+    if not await loop.run_in_executor(None, session.connect, '127.0.0.1', 'bench', 'bench', port):
+        raise RuntimeError('연결 실패')
+    session.start_reading(loop)
+    await asyncio.sleep(0.2)
+    if mode != 'off':
+        session.recorder = SessionRecorder(
+            os.path.join(recordings, f'bench-{mode}.cast'), 80, 24, compress=(mode == 'gzip')
+        )
+
+    cpu_start = time.process_time()
+    timings = [await drain(session, size) for _ in range(rounds)]
+    cpu = time.process_time() - cpu_start
+    session.disconnect()
+    while recording_writer.recorders:
+        await asyncio.sleep(0.05)
+
+    best = min(timings)
+    return {
+        'mode': mode,
+        'size_mb': size // (1024 * 1024),
+        'rounds': rounds,
+        'best_mb_s': round(size / best / (1024 * 1024), 1),
+        'median_mb_s': round(size / statistics.median(timings) / (1024 * 1024), 1),
+        'backend_cpu_s_per_round': round(cpu / rounds, 3),
+    }
+
+
+def measure_record_call(recordings, chunk_size, count):
+    """이벤트 루프에서 호출되는 record()만의 비용 (청크당 마이크로초)"""
+    recorder = SessionRecorder(os.path.join(recordings, 'bench-call.cast'), 80, 24)
+    chunk = b'x' * chunk_size
+    start = time.perf_counter()
+    for _ in range(count):
+        recorder.record('o', chunk)
+    elapsed = time.perf_counter() - start
+    recorder.close()
+    while recording_writer.recorders:
+        time.sleep(0.05)
+    return {'record_call_us': round(elapsed / count * 1e6, 3), 'chunk_bytes': chunk_size}
+
+
+async def run(args):
+    size = args.size_mb * 1024 * 1024
+    with tempfile.TemporaryDirectory() as root, tempfile.TemporaryDirectory() as recordings:
+        server = BenchSSHServer(root)
+        port = server.start()
+        try:
+            results = {}
+            for mode in args.modes.split(','):
+                results[mode] = await measure_throughput(port, size, mode, args.rounds, recordings)
+                print(json.dumps(results[mode]), flush=True)
+            if 'off' in results:
+                for mode, result in results.items():
+                    if mode != 'off':
+                        overhead = (1 - result['best_mb_s'] / results['off']['best_mb_s']) * 100
+                        cpu_overhead = (result['backend_cpu_s_per_round'] / results['off']['backend_cpu_s_per_round'] - 1) * 100
+                        print(json.dumps({
+                            'mode': mode,
+                            'throughput_overhead_percent': round(overhead, 1),
+                            'backend_cpu_overhead_percent': round(cpu_overhead, 1),
+                        }))
+            print(json.dumps(measure_record_call(recordings, 32768, 10000)))
+            recording_writer.shutdown()
+            writer_cpu = resource.getrusage(resource.RUSAGE_CHILDREN)
+            print(json.dumps({'writer_process_cpu_s': round(writer_cpu.ru_utime + writer_cpu.ru_stime, 3), 'cpus': os.cpu_count()}))
+            for name in sorted(os.listdir(recordings)):
+                print(json.dumps({'file': name, 'bytes': os.path.getsize(os.path.join(recordings, name))}))
+        finally:
+            server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--modes', default='off,plain,gzip')
+    args = parser.parse_args()
+    asyncio.run(run(args))
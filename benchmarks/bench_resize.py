@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""창 크기 조정 폭주 벤치마크: 원격 SIGWINCH/다시 그리기 양과 그동안의 키 입력 지연시간
+
+분할 창을 끄는 것처럼 --interval-ms마다 크기를 바꾸는 resize 메시지를 --duration초 동안 보내면서
+키 입력 하나를 보내고 에코가 돌아올 때까지의 시간을 계속 잰다.
+BenchSSHServer는 크기가 바뀔 때마다 전체 화면 앱처럼 화면 전체를 다시 그려 보낸다.
+RESIZE_THROTTLE=0(요청마다 적용, 이전 동작)과 기본 간격을 비교한다.
+
+    python benchmarks/bench_resize.py --throttles 0,0.1 --duration 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+import uvicorn  # noqa: E402
+import websockets  # noqa: E402
+
+import main  # noqa: E402
+from sshserver import BenchSSHServer  # noqa: E402
+
+KEY = b'@'  # 다시 그리기 화면('.')에 나오지 않는 문자
+
+
+async def run_storm(port, ssh_server, throttle, duration, interval):
+    main.RESIZE_THROTTLE = throttle
+    ws = await websockets.connect(f'ws://127.0.0.1:{port}/ws/storm-{throttle}', max_size=None)
+    await ws.send(json.dumps({
+        'type': 'connect', 'hostname': '127.0.0.1', 'username': 'bench', 'password': 'bench',
+        'port': ssh_server.port, 'protocol': 'binary'
+    }))
+    if not json.loads(await ws.recv())['success']:
+        raise RuntimeError('연결 실패')
+    await asyncio.sleep(0.3)
+
+    resizes_before = ssh_server.resize_count
+    redraw_before = ssh_server.redraw_bytes
+    received = 0
+    acks = 0
+    echo = asyncio.Event()
+
+    async def reader():
+        nonlocal received, acks
+        async for frame in ws:
+            if isinstance(frame, bytes):
+                if frame[0] == main.OP_RESIZE:
+                    acks += 1
+                    continue
+                received += len(frame) - 1
+                if KEY in frame:
+                    echo.set()
+
+    async def storm():
+        sent = 0
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            # 80~200열을 오가며 끄는 모양
+            cols = 80 + abs(sent % 240 - 120)
+            await ws.send(bytes([main.OP_RESIZE]) + struct.pack('!HH', cols, 48))
+            sent += 1
+            await asyncio.sleep(interval)
+        return sent, cols
+
+    async def typing(stop):
+        latencies = []
+        while not stop.is_set():
+            echo.clear()
+            start = time.perf_counter()
+            await ws.send(bytes([main.OP_DATA]) + KEY)
+            await echo.wait()
+            latencies.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.02)
+        return latencies
+
+    reader_task = asyncio.create_task(reader())
+    stop = asyncio.Event()
+    typing_task = asyncio.create_task(typing(stop))
+    sent, last_cols = await storm()
+    # 마지막 크기가 적용되고 다시 그린 화면이 도착할 때까지 대기
+    await asyncio.sleep(max(0.5, throttle * 3))
+    stop.set()
+    latencies = await typing_task
+    await ws.send(bytes([main.OP_DISCONNECT]))
+    await ws.close()
+    reader_task.cancel()
+
+    latencies.sort()
+    return {
+        'throttle_s': throttle,
+        'resize_messages': sent,
+        'remote_resizes': ssh_server.resize_count - resizes_before,
+        'final_size_applied': ssh_server.last_size == (last_cols, 48),
+        'acks': acks,
+        'redraw_kb': round((ssh_server.redraw_bytes - redraw_before) / 1024, 1),
+        'output_kb': round(received / 1024, 1),
+        'keystrokes': len(latencies),
+        'input_p50_ms': round(statistics.median(latencies), 2),
+        'input_p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 2),
+        'input_max_ms': round(latencies[-1], 2),
+        'cpus': os.cpu_count(),
+    }
+
+
+async def main_():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--throttles', default='0,0.1')
+    parser.add_argument('--duration', type=float, default=2.0)
+    parser.add_argument('--interval-ms', type=float, default=5.0)
+    args = parser.parse_args()
+    main.logger.setLevel('WARNING')
+
+    with tempfile.TemporaryDirectory() as root:
+        ssh_server = BenchSSHServer(root)
+        ssh_server.redraw_on_resize = True
+        ssh_server.start()
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        server = uvicorn.Server(uvicorn.Config(main.app, host='127.0.0.1', port=port, log_level='warning'))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            await asyncio.sleep(0.05)
+        try:
+            for throttle in (float(t) for t in args.throttles.split(',')):
+                result = await run_storm(port, ssh_server, throttle, args.duration, args.interval_ms / 1000)
+                print(json.dumps(result), flush=True)
+        finally:
+            server.should_exit = True
+            ssh_server.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main_())
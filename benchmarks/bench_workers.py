@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""멀티 워커 벤치마크: 워커 수에 따른 전체 출력 처리량과 워커 간 요청 전달 비용
+
+uvicorn --workers N (SESSION_REGISTRY=local)으로 백엔드를 띄우고
+1. 터미널 세션 여러 개에서 동시에 `bulk` 출력을 받아 전체 처리량 측정
+2. 세션 통계 REST 요청을 소유 워커가 직접 처리할 때와 다른 워커가 유닉스 소켓으로 전달할 때의 지연시간 비교
+   (어느 워커가 받을지는 커널이 정하므로 /api/registry 응답의 worker로 구분)
+
+    python benchmarks/bench_workers.py --workers 1,2,4 --sessions 8 --size-mb 20
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+import httpx  # noqa: E402
+import websockets  # noqa: E402
+
+from sshserver import BenchSSHServer  # noqa: E402
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def start_backend(workers, port, registry_dir):
+    env = dict(os.environ, SESSION_REGISTRY='local', REGISTRY_DIR=registry_dir)
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning'],
+        cwd=BACKEND_DIR, env=env, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if len(os.listdir(os.path.join(registry_dir, 'workers'))) >= workers:
+                return proc
+        except FileNotFoundError:
+            pass
+        time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError('백엔드 시작 실패')
+
+
+async def open_session(port, session_id, ssh_port):
+    ws = await websockets.connect(f'ws://127.0.0.1:{port}/ws/{session_id}', max_size=None)
+    await ws.send(json.dumps({
+        'type': 'connect', 'hostname': '127.0.0.1', 'username': 'bench', 'password': 'bench',
+        'port': ssh_port, 'protocol': 'binary'
+    }))
+    if not json.loads(await ws.recv())['success']:
+        raise RuntimeError('연결 실패')
+    return ws
+
+
+async def drain(ws, size):
+    await ws.send(b'\x00\rbulk %d\r' % size)
+    received = 0
+    while received < size:
+        frame = await ws.recv()
+        if isinstance(frame, bytes):
+            received += len(frame) - 1
+
+
+def forward_latency(port, owners, samples):
+    """연결마다 어느 워커가 받았는지 확인해 직접 처리/전달 처리 지연시간을 나눠 기록
+
+    owners: 세션 ID → 소유 워커 PID (keep-alive 연결 하나는 한 워커가 계속 처리)
+    """
+    direct, forwarded = [], []
+    session_ids = list(owners)
+    for i in range(samples):
+        session_id = session_ids[i % len(session_ids)]
+        with httpx.Client(base_url=f'http://127.0.0.1:{port}') as client:
+            worker = client.get('/api/registry').json()['worker']
+            start = time.perf_counter()
+            client.get(f'/api/sessions/{session_id}/stats').raise_for_status()
+            elapsed = (time.perf_counter() - start) * 1000
+        (direct if owners[session_id] == worker else forwarded).append(elapsed)
+    return direct, forwarded
+
+
+def summarize(latencies):
+    if not latencies:
+        return None
+    latencies.sort()
+    return {
+        'count': len(latencies),
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 3),
+    }
+
+
+async def run_scenario(workers, sessions, size, ssh_port, samples):
+    with tempfile.TemporaryDirectory() as registry_dir:
+        port = free_port()
+        proc = start_backend(workers, port, registry_dir)
+        try:
+            ids = [f'bench-{i}' for i in range(sessions)]
+            sockets = [await open_session(port, session_id, ssh_port) for session_id in ids]
+            await asyncio.sleep(0.5)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(drain(ws, size) for ws in sockets))
+            elapsed = time.perf_counter() - start
+
+            # 세션별 소유 워커 (기록 파일 내용 = 워커 소켓 경로 .../workers/<pid>.sock)
+            owners = {}
+            for session_id in ids:
+                with open(os.path.join(registry_dir, 'owners', hashlib.sha1(session_id.encode()).hexdigest())) as f:
+                    owners[session_id] = int(os.path.basename(f.read()).split('.')[0])
+
+            direct, forwarded = await asyncio.get_running_loop().run_in_executor(
+                None, forward_latency, port, owners, samples
+            )
+            for ws in sockets:
+                await ws.send(b'\x02')
+                await ws.close()
+            return {
+                'workers': workers,
+                'sessions': sessions,
+                'size_mb_per_session': size // (1024 * 1024),
+                'total_mb_s': round(size * sessions / elapsed / (1024 * 1024), 1),
+                'sessions_per_worker': sorted(list(owners.values()).count(pid) for pid in set(owners.values())),
+                'stats_direct': summarize(direct),
+                'stats_forwarded': summarize(forwarded),
+                'cpus': os.cpu_count(),
+            }
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--size-mb', type=int, default=20)
+    parser.add_argument('--samples', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        server = BenchSSHServer(root)
+        ssh_port = server.start()
+        try:
+            for workers in (int(w) for w in args.workers.split(',')):
+                result = await run_scenario(workers, args.sessions, args.size_mb * 1024 * 1024, ssh_port, args.samples)
+                print(json.dumps(result), flush=True)
+        finally:
+            server.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""부하/지연시간 벤치마크 모음 - 커밋 간 성능 비교용
+
+인프로세스 SSH/SFTP 서버(tests/sshserver.BenchSSHServer)와 FastAPI 앱을 한 프로세스에서 띄우고
+WebSocket 터미널/SFTP 클라이언트 여러 개로 시나리오를 실행한다.
+
+- echo: 키 입력 에코 지연시간 (p50/p99)
+- bulk: 대량 출력 처리량 (세션 여러 개 동시)
+- connect: 동시 연결 폭주 시 연결 완료까지 걸린 시간
+- transfer: 큰 파일 업로드/다운로드 처리량과 첫 바이트까지의 시간
+- listing: 아주 큰 디렉토리 목록 (첫 조회, 캐시된 조회, NDJSON 첫 항목까지의 시간)
+
+시나리오마다 벽시계 시간, 프로세스 CPU 시간, RSS를 함께 기록하고 결과 전체를 JSON으로 출력한다.
+
+    python benchmarks/suite.py --output before.json
+    python benchmarks/suite.py --output after.json --compare before.json
+    python benchmarks/suite.py --scenarios echo,bulk --terminals 50
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+import websockets  # noqa: E402
+
+import main  # noqa: E402
+from sshserver import BenchSSHServer  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def percentiles(samples):
+    """지연시간 목록(ms) → p50/p99/max"""
+    if not samples:
+        return {'count': 0}
+    samples = sorted(samples)
+    return {
+        'count': len(samples),
+        'p50_ms': round(statistics.median(samples), 3),
+        'p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+        'max_ms': round(samples[-1], 3),
+    }
+
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return round(int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / MB, 1)
+    except OSError:
+        return None
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+class Harness:
+    """SSH 서버와 백엔드 앱을 띄우고 클라이언트 연결을 만들어 주는 도우미"""
+
+    def __init__(self, root):
+        self.root = root
+        self.ssh = BenchSSHServer(root)
+        self.ssh_port = None
+        self.server = None
+        self.port = None
+        self.base_url = None
+
+    def start(self):
+        # 세션마다 남는 연결/종료 로그는 측정 출력과 섞이지 않도록 경고 이상만
+        main.logger.setLevel(logging.WARNING)
+        self.ssh_port = self.ssh.start()
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        self.port = sock.getsockname()[1]
+        sock.close()
+        self.server = uvicorn.Server(uvicorn.Config(main.app, host='127.0.0.1', port=self.port, log_level='warning'))
+        threading.Thread(target=self.server.run, daemon=True).start()
+        while not self.server.started:
+            time.sleep(0.05)
+        self.base_url = f'http://127.0.0.1:{self.port}'
+
+    def stop(self):
+        self.server.should_exit = True
+        self.ssh.stop()
+
+    def credentials(self):
+        return {'hostname': '127.0.0.1', 'username': 'bench', 'password': 'bench', 'port': self.ssh_port}
+
+    async def open_terminal(self, session_id, compression=False):
+        ws = await websockets.connect(f'ws://127.0.0.1:{self.port}/ws/{session_id}', max_size=None)
+        await ws.send(json.dumps({
+            'type': 'connect', 'protocol': 'binary',
+            'compression': 'deflate' if compression else None, **self.credentials()
+        }))
+        result = json.loads(await ws.recv())
+        if not result['success']:
+            raise RuntimeError(f'연결 실패: {session_id}')
+        return ws
+
+    async def close_terminal(self, ws):
+        try:
+            await ws.send(bytes([main.OP_DISCONNECT]))
+            await ws.close()
+        except websockets.ConnectionClosed:
+            pass
+
+
+async def measure(name, scenario, *args):
+    """시나리오 실행 - 결과에 벽시계/CPU 시간과 RSS를 덧붙임"""
+    rss_before = current_rss_mb()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    result = await scenario(*args)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    result.update({
+        'wall_s': round(wall, 3),
+        'cpu_s': round(cpu, 3),
+        'cpu_percent': round(cpu / wall * 100, 1) if wall else None,
+        'rss_mb': current_rss_mb(),
+        'rss_growth_mb': round(current_rss_mb() - rss_before, 1) if rss_before is not None else None,
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    })
+    print(json.dumps({'scenario': name, **result}), file=sys.stderr, flush=True)
+    return result
+
+
+async def scenario_echo(harness, args):
+    """터미널 N개에서 번갈아 한 글자씩 입력하고 에코가 돌아올 때까지의 시간"""
+    terminals = [await harness.open_terminal(f'echo-{i}') for i in range(args.terminals)]
+    await asyncio.sleep(0.5)
+    latencies = []
+    for i in range(args.echo_samples):
+        ws = terminals[i % len(terminals)]
+        start = time.perf_counter()
+        await ws.send(b'\x00x')
+        while True:
+            frame = await ws.recv()
+            if isinstance(frame, bytes) and frame[0] == main.OP_DATA:
+                break
+        latencies.append((time.perf_counter() - start) * 1000)
+    for ws in terminals:
+        await harness.close_terminal(ws)
+    return {'terminals': len(terminals), **percentiles(latencies)}
+
+
+async def scenario_bulk(harness, args):
+    """터미널 N개가 동시에 대량 출력을 받는 전체 처리량"""
+    size = args.bulk_mb * MB
+    terminals = [await harness.open_terminal(f'bulk-{i}', args.compression) for i in range(args.terminals)]
+    await asyncio.sleep(0.5)
+
+    async def drain(ws):
+        await ws.send(b'\x00\rbulk %d\r' % size)
+        received = wire = 0
+        while received < size:
+            frame = await ws.recv()
+            if not isinstance(frame, bytes):
+                continue
+            wire += len(frame)
+            if frame[0] == main.OP_DATA_DEFLATE:
+                received += struct.unpack('!I', frame[1:5])[0]
+            elif frame[0] == main.OP_DATA:
+                received += len(frame) - 1
+        return wire
+
+    start = time.perf_counter()
+    wire = sum(await asyncio.gather(*(drain(ws) for ws in terminals)))
+    elapsed = time.perf_counter() - start
+    for ws in terminals:
+        await harness.close_terminal(ws)
+    return {
+        'terminals': len(terminals),
+        'mb_per_terminal': args.bulk_mb,
+        'compression': args.compression,
+        'throughput_mb_s': round(size * len(terminals) / elapsed / MB, 1),
+        'wire_mb': round(wire / MB, 1),
+    }
+
+
+async def scenario_connect(harness, args):
+    """동시에 N개 연결 요청 - 각 연결이 connection_result를 받기까지의 시간"""
+    async def connect(i):
+        start = time.perf_counter()
+        try:
+            ws = await harness.open_terminal(f'storm-{i}')
+        except Exception:
+            return None, None
+        return (time.perf_counter() - start) * 1000, ws
+
+    results = await asyncio.gather(*(connect(i) for i in range(args.storm)))
+    latencies = [latency for latency, _ in results if latency is not None]
+    for _, ws in results:
+        if ws is not None:
+            await harness.close_terminal(ws)
+    return {'connects': args.storm, 'succeeded': len(latencies), **percentiles(latencies)}
+
+
+async def scenario_transfer(harness, args):
+    """SFTP 클라이언트 N개가 동시에 큰 파일을 업로드한 뒤 다운로드"""
+    size = args.transfer_mb * MB
+    block = os.urandom(MB)
+    async with httpx.AsyncClient(base_url=harness.base_url, timeout=None) as client:
+        for i in range(args.sftp_clients):
+            response = await client.post(f'/api/sftp/xfer-{i}/connect', json=harness.credentials())
+            if not response.json()['success']:
+                raise RuntimeError('SFTP 연결 실패')
+
+        async def body():
+            for _ in range(args.transfer_mb):
+                yield block
+
+        async def upload(i):
+            response = await client.put(
+                f'/api/sftp/xfer-{i}/upload/stream',
+                params={'filename': f'upload-{i}.bin', 'remote_path': harness.root},
+                content=body()
+            )
+            response.raise_for_status()
+
+        async def download(i):
+            start = time.perf_counter()
+            ttfb = None
+            received = 0
+            async with client.stream('GET', f'/api/sftp/xfer-{i}/download',
+                                     params={'remote_path': os.path.join(harness.root, f'upload-{i}.bin')}) as response:
+                async for chunk in response.aiter_raw():
+                    if ttfb is None:
+                        ttfb = (time.perf_counter() - start) * 1000
+                    received += len(chunk)
+            if received != size:
+                raise RuntimeError(f'다운로드 크기 불일치: {received}')
+            return ttfb
+
+        start = time.perf_counter()
+        await asyncio.gather(*(upload(i) for i in range(args.sftp_clients)))
+        upload_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        ttfbs = await asyncio.gather(*(download(i) for i in range(args.sftp_clients)))
+        download_elapsed = time.perf_counter() - start
+
+    for i in range(args.sftp_clients):
+        os.remove(os.path.join(harness.root, f'upload-{i}.bin'))
+    total = size * args.sftp_clients
+    return {
+        'clients': args.sftp_clients,
+        'mb_per_client': args.transfer_mb,
+        'upload_mb_s': round(total / upload_elapsed / MB, 1),
+        'download_mb_s': round(total / download_elapsed / MB, 1),
+        'download_ttfb': percentiles(ttfbs),
+    }
+
+
+async def scenario_listing(harness, args):
+    """항목이 아주 많은 디렉토리 - 첫 페이지(원격 조회), 캐시된 페이지, NDJSON 첫 항목까지의 시간"""
+    directory = os.path.join(harness.root, 'huge')
+    os.makedirs(directory, exist_ok=True)
+    for i in range(args.listing_entries):
+        open(os.path.join(directory, f'file-{i:07d}.log'), 'w').close()
+
+    async with httpx.AsyncClient(base_url=harness.base_url, timeout=None) as client:
+        await client.post('/api/sftp/listing/connect', json=harness.credentials())
+        url = '/api/sftp/listing/remote/files'
+
+        start = time.perf_counter()
+        first = await client.get(url, params={'path': directory})
+        cold_ms = (time.perf_counter() - start) * 1000
+        if first.json()['total'] != args.listing_entries:
+            raise RuntimeError('목록 항목 수 불일치')
+
+        cached = []
+        for page in range(args.listing_samples):
+            start = time.perf_counter()
+            await client.get(url, params={'path': directory, 'sort': 'size', 'order': 'desc',
+                                          'cursor': str(page * 100), 'limit': 100})
+            cached.append((time.perf_counter() - start) * 1000)
+
+        # 캐시를 비운 뒤 스트리밍 조회
+        await client.post('/api/sftp/listing/mkdir', params={'path': os.path.join(directory, 'invalidate')})
+        start = time.perf_counter()
+        first_entry_ms = None
+        lines = 0
+        async with client.stream('GET', url, params={'path': directory, 'format': 'ndjson'}) as response:
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                lines += 1
+                if lines == 2 and first_entry_ms is None:
+                    first_entry_ms = (time.perf_counter() - start) * 1000
+        stream_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        'entries': args.listing_entries,
+        'cold_page_ms': round(cold_ms, 1),
+        'cached_page': percentiles(cached),
+        'ndjson_first_entry_ms': round(first_entry_ms, 1) if first_entry_ms else None,
+        'ndjson_total_ms': round(stream_ms, 1),
+    }
+
+
+SCENARIOS = {
+    'echo': scenario_echo,
+    'bulk': scenario_bulk,
+    'connect': scenario_connect,
+    'transfer': scenario_transfer,
+    'listing': scenario_listing,
+}
+
+
+def flatten(prefix, value, out):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flatten(f'{prefix}.{key}' if prefix else key, item, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = value
+    return out
+
+
+def compare(baseline, results):
+    """이전 결과와 숫자 항목별 비교 (변화율 %)"""
+    before = flatten('', baseline.get('scenarios', {}), {})
+    after = flatten('', results['scenarios'], {})
+    return {
+        key: {'before': before[key], 'after': value,
+              'change_percent': round((value - before[key]) / before[key] * 100, 1) if before[key] else None}
+        for key, value in after.items() if key in before
+    }
+
+
+async def run(args):
+    names = args.scenarios.split(',')
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f'알 수 없는 시나리오: {", ".join(unknown)}')
+
+    with tempfile.TemporaryDirectory() as root:
+        harness = Harness(root)
+        harness.start()
+        try:
+            scenarios = {}
+            for name in names:
+                scenarios[name] = await measure(name, SCENARIOS[name], harness, args)
+        finally:
+            harness.stop()
+
+    results = {
+        'meta': {
+            'revision': git_revision(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'options': vars(args),
+        },
+        'scenarios': scenarios,
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            results['comparison'] = compare(json.load(f), results)
+    return results
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--terminals', type=int, default=10, help='echo/bulk 시나리오의 동시 터미널 수')
+    parser.add_argument('--echo-samples', type=int, default=500)
+    parser.add_argument('--bulk-mb', type=int, default=20, help='터미널당 출력 크기')
+    parser.add_argument('--compression', action='store_true', help='bulk 출력에 deflate 압축 사용')
+    parser.add_argument('--storm', type=int, default=50, help='동시 연결 수')
+    parser.add_argument('--sftp-clients', type=int, default=4)
+    parser.add_argument('--transfer-mb', type=int, default=64, help='클라이언트당 업로드/다운로드 크기')
+    parser.add_argument('--listing-entries', type=int, default=50000)
+    parser.add_argument('--listing-samples', type=int, default=50)
+    parser.add_argument('--output', help='결과 JSON 파일 (없으면 표준 출력)')
+    parser.add_argument('--compare', help='비교할 이전 결과 JSON 파일')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main_()
@@ -1,8 +1,16 @@
 #!/usr/bin/env python3
 import asyncio
+import getpass
+import os
 import websockets
 import json
 
+# 접속 정보는 환경 변수로 지정 (비밀번호가 없으면 입력 받음)
+# 실제 호스트 없이 성능을 측정하려면 benchmarks/suite.py 사용
+SSH_HOST = os.environ.get("SSH_HOST", "localhost")
+SSH_PORT = int(os.environ.get("SSH_PORT", "22"))
+SSH_USER = os.environ.get("SSH_USER") or getpass.getuser()
+
 async def test_websocket():
     uri = "ws://localhost:8000/ws/test-session"
     
@@ -13,10 +21,10 @@ async def test_websocket():
             # SSH 연결 테스트
             connect_message = {
                 "type": "connect",
-                "hostname": "192.168.10.100",
-                "username": "jrpark",
-                "password": "Qkrwjdfuf$00",
-                "port": 22
+                "hostname": SSH_HOST,
+                "username": SSH_USER,
+                "password": os.environ.get("SSH_PASSWORD") or getpass.getpass(f"{SSH_USER}@{SSH_HOST} 비밀번호: "),
+                "port": SSH_PORT
             }
             
             await websocket.send(json.dumps(connect_message))
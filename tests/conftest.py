@@ -0,0 +1,36 @@
+"""공용 픽스처 - 실제 원격 호스트 없이 인프로세스 SSH/SFTP 서버(sshserver.BenchSSHServer)에 접속"""
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+
+import main
+from sshserver import BenchSSHServer
+
+
+@pytest.fixture
+def ssh_server(tmp_path):
+    """tmp_path를 홈으로 하는 SSH/SFTP 서버 (테스트가 끝나면 종료)"""
+    server = BenchSSHServer(str(tmp_path))
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def app_port():
+    """백엔드 앱을 띄운 uvicorn 서버의 포트 (같은 프로세스의 스레드에서 실행)"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    server = uvicorn.Server(uvicorn.Config(main.app, host='127.0.0.1', port=port, log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    yield port
+    server.should_exit = True
+    thread.join(10)
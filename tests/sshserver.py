@@ -0,0 +1,334 @@
+"""테스트/벤치마크용 인프로세스 SSH/SFTP 서버
+
+paramiko ServerInterface 기반으로 실제 원격 호스트 없이 백엔드를 테스트/측정하기 위한 서버
+(tests/conftest.py의 ssh_server 픽스처, benchmarks/의 스크립트에서 사용).
+- 비밀번호는 무엇이든 허용
+- shell: 입력을 그대로 에코, `bulk <바이트수>` 줄을 받으면 해당 크기만큼 로그 형태의 출력 전송
+- exec: 루트 디렉토리에서 로컬 셸로 명령 실행 (pwd, find, du, tar 등)
+- sftp: 루트 디렉토리를 홈으로 하는 로컬 파일시스템 SFTP
+"""
+import os
+import socket
+import subprocess
+import threading
+import time
+
+import paramiko
+from paramiko import SFTPAttributes, SFTPHandle, SFTPServer, SFTPServerInterface
+from paramiko.sftp import SFTP_OK, SFTP_NO_SUCH_FILE, SFTP_PERMISSION_DENIED, SFTP_FAILURE
+import errno
+import logging
+
+_HOST_KEY = None
+
+# 클라이언트가 끊을 때마다 서버 측 트랜스포트가 남기는 소켓 오류 로그는 벤치마크 출력에서 제외
+logging.getLogger('benchserver').setLevel(logging.CRITICAL)
+
+
+def _host_key():
+    global _HOST_KEY
+    if _HOST_KEY is None:
+        _HOST_KEY = paramiko.RSAKey.generate(2048)
+    return _HOST_KEY
+
+
+def _errno_to_sftp(e):
+    if e.errno == errno.ENOENT:
+        return SFTP_NO_SUCH_FILE
+    if e.errno in (errno.EACCES, errno.EPERM):
+        return SFTP_PERMISSION_DENIED
+    return SFTP_FAILURE
+
+
+def _set_attr(path, attr):
+    """크기(잘라내기), 권한, 수정 시각만 반영 - 소유자는 무시"""
+    try:
+        if attr._flags & attr.FLAG_PERMISSIONS:
+            os.chmod(path, attr.st_mode & 0o7777)
+        if attr._flags & attr.FLAG_SIZE:
+            os.truncate(path, attr.st_size)
+        if attr._flags & attr.FLAG_AMTIME:
+            os.utime(path, (attr.st_atime, attr.st_mtime))
+    except OSError as e:
+        return _errno_to_sftp(e)
+    return SFTP_OK
+
+
+class _LocalSFTPHandle(SFTPHandle):
+    def stat(self):
+        try:
+            return SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return _errno_to_sftp(e)
+
+    def chattr(self, attr):
+        self.writefile.flush()
+        return _set_attr(self.filename, attr)
+
+
+class LocalSFTPServer(SFTPServerInterface):
+    """루트 디렉토리 기준의 로컬 파일시스템을 그대로 노출하는 SFTP 서버"""
+
+    def __init__(self, server, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.root = server.server.root
+
+    def _path(self, path):
+        if not os.path.isabs(path):
+            path = os.path.join(self.root, path)
+        return os.path.normpath(path)
+
+    def list_folder(self, path):
+        path = self._path(path)
+        try:
+            result = []
+            for entry in os.scandir(path):
+                attr = SFTPAttributes.from_stat(entry.stat(follow_symlinks=False))
+                attr.filename = entry.name
+                result.append(attr)
+            return result
+        except OSError as e:
+            return _errno_to_sftp(e)
+
+    def stat(self, path):
+        try:
+            return SFTPAttributes.from_stat(os.stat(self._path(path)))
+        except OSError as e:
+            return _errno_to_sftp(e)
+
+    def lstat(self, path):
+        try:
+            return SFTPAttributes.from_stat(os.lstat(self._path(path)))
+        except OSError as e:
+            return _errno_to_sftp(e)
+
+    def open(self, path, flags, attr):
+        path = self._path(path)
+        try:
+            fd = os.open(path, flags, 0o644)
+        except OSError as e:
+            return _errno_to_sftp(e)
+        if flags & os.O_WRONLY:
+            mode = 'ab' if flags & os.O_APPEND else 'wb'
+        elif flags & os.O_RDWR:
+            mode = 'a+b' if flags & os.O_APPEND else 'r+b'
+        else:
+            mode = 'rb'
+        handle = _LocalSFTPHandle(flags)
+        f = os.fdopen(fd, mode)
+        handle.filename = path
+        handle.readfile = f
+        handle.writefile = f
+        return handle
+
+    def remove(self, path):
+        try:
+            os.remove(self._path(path))
+        except OSError as e:
+            return _errno_to_sftp(e)
+        return SFTP_OK
+
+    def rename(self, oldpath, newpath):
+        try:
+            os.rename(self._path(oldpath), self._path(newpath))
+        except OSError as e:
+            return _errno_to_sftp(e)
+        return SFTP_OK
+
+    posix_rename = rename
+
+    def mkdir(self, path, attr):
+        try:
+            os.mkdir(self._path(path))
+        except OSError as e:
+            return _errno_to_sftp(e)
+        return SFTP_OK
+
+    def rmdir(self, path):
+        try:
+            os.rmdir(self._path(path))
+        except OSError as e:
+            return _errno_to_sftp(e)
+        return SFTP_OK
+
+    def chattr(self, path, attr):
+        return _set_attr(self._path(path), attr)
+
+    def canonicalize(self, path):
+        return self._path(path)
+
+
+class _BenchServerInterface(paramiko.ServerInterface):
+    def __init__(self, server):
+        self.server = server
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED_OPEN_REQUEST
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_window_change_request(self, channel, width, height, pixelwidth, pixelheight):
+        self.server.resize_count += 1
+        self.server.last_size = (width, height)
+        if self.server.redraw_on_resize:
+            # 전체 화면 앱처럼 화면을 새 크기로 다시 그림 (전송 스레드에서 막히지 않게 따로 보냄)
+            threading.Thread(target=self.server._redraw, args=(channel, width, height), daemon=True).start()
+        return True
+
+    def check_channel_shell_request(self, channel):
+        threading.Thread(target=self.server._run_shell, args=(channel,), daemon=True).start()
+        return True
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=self.server._run_exec, args=(channel, command), daemon=True).start()
+        return True
+
+
+class BenchSSHServer:
+    """127.0.0.1의 임의 포트에서 동작하는 SSH/SFTP 서버"""
+
+    def __init__(self, root, host='127.0.0.1', port=0):
+        self.root = os.path.realpath(root)
+        self.host = host
+        self.port = port
+        self.resize_count = 0
+        self.last_size = None
+        self.redraw_on_resize = False
+        self.redraw_bytes = 0
+        self.exit_status_delay = 0  # exec 출력 EOF와 종료 코드 사이 지연 (초)
+        self._sock = None
+        self._transports = []
+        self._running = False
+
+    def start(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((self.host, self.port))
+        self._sock.listen(1024)
+        self.port = self._sock.getsockname()[1]
+        self._running = True
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self.port
+
+    def stop(self):
+        self._running = False
+        if self._sock:
+            self._sock.close()
+        for transport in self._transports:
+            transport.close()
+        self._transports = []
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                client, _ = self._sock.accept()
+            except OSError:
+                break
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            transport = paramiko.Transport(client)
+            transport.set_log_channel('benchserver')
+            transport.add_server_key(_host_key())
+            transport.set_subsystem_handler('sftp', SFTPServer, LocalSFTPServer)
+            transport.server = self
+            try:
+                transport.start_server(server=_BenchServerInterface(self))
+            except Exception:
+                continue
+            self._transports.append(transport)
+
+    def _run_shell(self, channel):
+        line = b''
+        try:
+            while True:
+                data = channel.recv(32768)
+                if not data:
+                    break
+                channel.sendall(data)
+                line += data
+                while b'\r' in line or b'\n' in line:
+                    idx = min(i for i in (line.find(b'\r'), line.find(b'\n')) if i >= 0)
+                    cmd, line = line[:idx].strip(), line[idx + 1:]
+                    if cmd.startswith(b'bulk '):
+                        self._send_bulk(channel, int(cmd.split()[1]))
+        except Exception:
+            pass
+        finally:
+            _close_quietly(channel)
+
+    def _redraw(self, channel, width, height):
+        screen = b'\x1b[H\x1b[2J' + b'\r\n'.join(b'.' * width for _ in range(height))
+        try:
+            channel.sendall(screen)
+            self.redraw_bytes += len(screen)
+        except Exception:
+            pass
+
+    def _send_bulk(self, channel, size):
+        chunk = b''.join(
+            b'2024-01-01 00:00:%02d INFO \x1b[32mworker\x1b[0m processed request id=%06d\r\n' % (i % 60, i)
+            for i in range(512)
+        )
+        while size > 0:
+            part = chunk[:size]
+            channel.sendall(part)
+            size -= len(part)
+
+    def _run_exec(self, channel, command):
+        try:
+            proc = subprocess.Popen(
+                command.decode() if isinstance(command, bytes) else command,
+                shell=True, cwd=self.root,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+
+            def pump_stdin():
+                try:
+                    while True:
+                        data = channel.recv(32768)
+                        if not data:
+                            break
+                        proc.stdin.write(data)
+                except Exception:
+                    pass
+                finally:
+                    try:
+                        proc.stdin.close()
+                    except Exception:
+                        pass
+
+            def pump_stderr():
+                for data in iter(lambda: proc.stderr.read1(32768), b''):
+                    channel.sendall_stderr(data)
+
+            threading.Thread(target=pump_stdin, daemon=True).start()
+            stderr_thread = threading.Thread(target=pump_stderr, daemon=True)
+            stderr_thread.start()
+            for data in iter(lambda: proc.stdout.read1(32768), b''):
+                channel.sendall(data)
+            stderr_thread.join()
+            # sshd처럼 출력 EOF를 먼저 보내고 종료 코드는 그 뒤에 보냄
+            channel.shutdown_write()
+            status = proc.wait()
+            if self.exit_status_delay:
+                time.sleep(self.exit_status_delay)
+            channel.send_exit_status(status)
+        except Exception:
+            channel.send_exit_status(255)
+        finally:
+            _close_quietly(channel)
+
+
+def _close_quietly(channel):
+    try:
+        channel.close()
+    except Exception:
+        pass
@@ -0,0 +1,111 @@
+"""연결 폭주: 응답 없는 포트로 향하는 연결 50개가 다른 세션의 키 입력 에코를 막지 않고,
+연결 중인 WebSocket을 닫으면 연결 워커가 바로 반환되는지 확인
+
+실제 uvicorn 서버와 tests/sshserver.BenchSSHServer에 WebSocket으로 접속해서 측정
+(benchmarks/bench_connect_storm.py와 같은 구성).
+
+    python -m pytest -q tests
+"""
+import asyncio
+import json
+import socket
+import statistics
+import threading
+import time
+
+import pytest
+import websockets
+
+import main
+
+HANGING = 50              # 블랙홀 포트로 보내는 connect 수 (SSH_CONNECT_WORKERS보다 많게)
+ECHO_SECONDS = 1.5        # 에코 지연 측정 시간
+ECHO_P50_BOUND = 0.05     # 키 입력 에코 지연 상한 (중앙값, 초)
+ECHO_MAX_BOUND = 0.5      # 키 입력 에코 지연 상한 (최대, 초) - CI의 느린 코어 하나를 감안
+FRESH_CONNECT_BOUND = 5.0  # 연결 중인 WebSocket을 닫은 뒤 새 연결이 끝나야 하는 시간 (SSH_KEX_TIMEOUT보다 짧게)
+
+
+@pytest.fixture
+def black_hole_port():
+    """접속은 받아 두기만 하고 SSH 배너를 보내지 않는 포트"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(1024)
+    held = []
+
+    def accept_loop():
+        while True:
+            try:
+                held.append(sock.accept()[0])
+            except OSError:
+                break
+
+    threading.Thread(target=accept_loop, daemon=True).start()
+    yield sock.getsockname()[1]
+    sock.close()
+    for conn in held:
+        conn.close()
+
+
+async def open_terminal(app_port, session_id, ssh_port):
+    ws = await websockets.connect(f'ws://127.0.0.1:{app_port}/ws/{session_id}')
+    await ws.send(json.dumps({
+        'type': 'connect', 'hostname': '127.0.0.1', 'username': 'test', 'password': 'test',
+        'port': ssh_port, 'protocol': 'binary'
+    }))
+    return ws
+
+
+async def connection_result(ws, timeout):
+    return json.loads(await asyncio.wait_for(ws.recv(), timeout))
+
+
+async def echo_latencies(ws, duration):
+    latencies = []
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        await ws.send(b'\x00x')
+        await asyncio.wait_for(ws.recv(), 5)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.02)
+    return latencies
+
+
+def test_echo_not_blocked_by_hanging_connects(ssh_server, black_hole_port, app_port):
+    async def run():
+        live = await open_terminal(app_port, 'live', ssh_server.port)
+        assert (await connection_result(live, 10))['success']
+        hanging = [await open_terminal(app_port, f'hang-{i}', black_hole_port) for i in range(HANGING)]
+        try:
+            return await echo_latencies(live, ECHO_SECONDS)
+        finally:
+            for ws in hanging:
+                await ws.close()
+            await live.close()
+
+    latencies = asyncio.run(run())
+    assert statistics.median(latencies) < ECHO_P50_BOUND, latencies
+    assert max(latencies) < ECHO_MAX_BOUND, latencies
+
+
+def test_close_cancels_pending_connects(ssh_server, black_hole_port, app_port):
+    async def run():
+        assert HANGING > main.SSH_CONNECT_WORKERS
+        # 연결 워커를 모두 붙잡을 만큼 연결을 걸어 두고 WebSocket을 닫음 - 취소되지 않으면
+        # 새 연결은 SSH_KEX_TIMEOUT이 지나 워커가 빌 때까지 기다림
+        hanging = [await open_terminal(app_port, f'cancel-{i}', black_hole_port) for i in range(HANGING)]
+        await asyncio.sleep(0.5)
+        for ws in hanging:
+            await ws.close()
+        start = time.perf_counter()
+        fresh = await open_terminal(app_port, 'fresh', ssh_server.port)
+        try:
+            result = await connection_result(fresh, FRESH_CONNECT_BOUND)
+        finally:
+            await fresh.close()
+        return result, time.perf_counter() - start
+
+    result, elapsed = asyncio.run(run())
+    assert result['success']
+    assert elapsed < FRESH_CONNECT_BOUND
@@ -0,0 +1,117 @@
+"""ControlScheduler: 크기 조정 폭주 중에도 키 입력이 바로 에코되고, 간격마다 마지막 크기만 원격에 적용되는지 확인
+
+tests/sshserver.BenchSSHServer(에코 셸, 크기가 바뀔 때마다 화면 전체를 다시 그림)에 실제로 접속해서 측정.
+
+    python -m pytest -q tests
+"""
+import asyncio
+import statistics
+import time
+
+import pytest
+
+import main
+
+INTERVAL = 0.1           # 크기 조정 적용 간격 (초)
+STORM_SECONDS = 1.5      # 크기 조정 폭주 시간
+STORM_PERIOD = 0.005     # 크기 조정 요청 간격 (창 크기를 끄는 속도)
+ECHO_P50_BOUND = 0.05    # 키 입력 에코 지연 상한 (중앙값, 초)
+ECHO_MAX_BOUND = 0.5     # 키 입력 에코 지연 상한 (최대, 초) - CI의 느린 코어 하나를 감안
+KEY = b'@'               # 다시 그리는 화면('.')에 나오지 않는 문자
+
+
+@pytest.fixture
+def redraw_server(ssh_server):
+    ssh_server.redraw_on_resize = True
+    return ssh_server
+
+
+async def resize_storm(ssh_server):
+    loop = asyncio.get_running_loop()
+    session = main.SSHSession()
+    assert await loop.run_in_executor(None, session.connect, '127.0.0.1', 'test', 'test', ssh_server.port)
+    session.start_reading(loop)
+
+    requested = []   # (시각, 크기) - resize() 호출 순서
+    applied = []     # (시각, 크기) - 원격에 보낸 크기 조정
+    acks = []
+    resize_terminal = session.resize_terminal
+
+    def record_resize(cols, rows):
+        applied.append((loop.time(), (cols, rows)))
+        return resize_terminal(cols, rows)
+
+    session.resize_terminal = record_resize
+
+    async def send_ack(success, cols, rows):
+        acks.append((success, cols, rows))
+
+    scheduler = main.ControlScheduler(session, send_ack, interval=INTERVAL)
+    resizes_before = ssh_server.resize_count
+    echoed = asyncio.Event()
+
+    async def reader():
+        while (output := await session.get_output()) is not None:
+            if KEY in output:
+                echoed.set()
+
+    async def storm():
+        end = loop.time() + STORM_SECONDS
+        sent = 0
+        while loop.time() < end:
+            size = (80 + abs(sent % 240 - 120), 48)
+            requested.append((loop.time(), size))
+            scheduler.resize(*size)
+            sent += 1
+            await asyncio.sleep(STORM_PERIOD)
+
+    async def typing(stop):
+        latencies = []
+        while not stop.is_set():
+            echoed.clear()
+            start = time.perf_counter()
+            scheduler.input(KEY)
+            await asyncio.wait_for(echoed.wait(), ECHO_MAX_BOUND * 4)
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.02)
+        return latencies
+
+    reader_task = asyncio.create_task(reader())
+    stop = asyncio.Event()
+    typing_task = asyncio.create_task(typing(stop))
+    try:
+        await storm()
+        # 마지막 간격의 크기가 적용되고 원격에 도착할 때까지 대기
+        await asyncio.sleep(INTERVAL * 5)
+        stop.set()
+        latencies = await typing_task
+    finally:
+        scheduler.close()
+        session.disconnect()
+        reader_task.cancel()
+    return requested, applied, acks, latencies, ssh_server.resize_count - resizes_before
+
+
+def test_resize_storm_keeps_input_latency_and_applies_last_size(redraw_server):
+    requested, applied, acks, latencies, remote_resizes = asyncio.run(resize_storm(redraw_server))
+
+    # 키 입력 에코가 크기 조정/다시 그리기 뒤로 밀리지 않음
+    assert len(latencies) >= 10
+    assert statistics.median(latencies) < ECHO_P50_BOUND
+    assert max(latencies) < ECHO_MAX_BOUND
+
+    # 간격마다 한 번만 적용 (요청 수보다 훨씬 적음)
+    assert len(applied) <= STORM_SECONDS / INTERVAL + 2
+    assert len(applied) < len(requested) / 5
+    for (earlier, _), (later, _) in zip(applied, applied[1:]):
+        assert later - earlier >= INTERVAL * 0.9
+
+    # 적용된 크기는 그 시점까지 들어온 요청 중 마지막 것
+    for applied_at, size in applied:
+        latest = [requested_size for requested_at, requested_size in requested if requested_at <= applied_at]
+        assert size == latest[-1]
+
+    # 원격에는 적용한 만큼만 도착했고 최종 크기는 마지막 요청
+    assert remote_resizes == len(applied)
+    assert redraw_server.last_size == requested[-1][1]
+    assert acks[-1] == (True, *requested[-1][1])
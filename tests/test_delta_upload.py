@@ -0,0 +1,86 @@
+"""DeltaUpload: 끼어든/빠진 바이트 뒤의 블록도 원격에서 복사되고, 중단되면 원격 파일이 이전 내용 그대로인지 확인
+
+tests/sshserver.BenchSSHServer에 실제로 접속해서 확인. 서버는 실제 sshd처럼 EOF를 먼저 보내고
+종료 코드는 조금 늦게 보냄(exit_status_delay) - 종료 코드를 기다리지 않으면 exec 경로가 실패로 보임.
+
+    python -m pytest -q tests
+"""
+import os
+import random
+import threading
+
+import pytest
+
+import main
+
+MB = 1 << 20
+BLOCK = 64 * 1024
+CHUNK = 300000
+
+
+@pytest.fixture
+def session(ssh_server):
+    ssh_server.exit_status_delay = 0.2
+    session = main.SFTPSession()
+    assert session.connect('127.0.0.1', 'test', 'test', ssh_server.port)
+    yield session
+    session.disconnect()
+
+
+def upload(session, path, data, abort_at=None):
+    upload = main.DeltaUpload(session, path, block_size=BLOCK)
+    try:
+        upload.open()
+        for offset in range(0, len(data), CHUNK):
+            if abort_at is not None and offset >= abort_at:
+                raise RuntimeError('abort')
+            upload.write(data[offset:offset + CHUNK])
+        return upload.finish()
+    finally:
+        upload.close()
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_exit_status_after_eof(session):
+    assert main.remote_command_lines(session, 'printf "a\\nb\\n"', threading.Event()) == [b'a', b'b']
+
+
+@pytest.mark.parametrize('apply_method', ['exec', 'sftp'])
+def test_shifted_blocks_are_copied(session, ssh_server, monkeypatch, apply_method):
+    if apply_method == 'sftp':
+        monkeypatch.setattr(main, 'remote_block_signatures', lambda *args: None)
+    path = os.path.join(ssh_server.root, 'data.bin')
+    base = random.Random(1).randbytes(4 * MB)
+    upload(session, path, base)
+    os.chmod(path, 0o640)
+
+    inserted = base[:MB + 17] + b'INSERTED' * 5 + base[MB + 17:]
+    result = upload(session, path, inserted)
+    assert result['apply_method'] == apply_method
+    assert read(path) == inserted
+    assert result['bytes_sent'] < 2 * BLOCK
+
+    deleted = inserted[:3 * MB + 3] + inserted[3 * MB + 1000:]
+    result = upload(session, path, deleted)
+    assert read(path) == deleted
+    assert result['bytes_sent'] < 2 * BLOCK
+    assert os.stat(path).st_mode & 0o777 == 0o640
+
+
+@pytest.mark.parametrize('apply_method', ['exec', 'sftp'])
+def test_abort_keeps_old_file(session, ssh_server, monkeypatch, apply_method):
+    if apply_method == 'sftp':
+        monkeypatch.setattr(main, 'remote_block_signatures', lambda *args: None)
+    path = os.path.join(ssh_server.root, 'data.bin')
+    rng = random.Random(2)
+    old = rng.randbytes(2 * MB)
+    upload(session, path, old)
+
+    with pytest.raises(RuntimeError):
+        upload(session, path, rng.randbytes(2 * MB), abort_at=MB)
+    assert read(path) == old
+    assert os.listdir(ssh_server.root) == ['data.bin']
@@ -0,0 +1,46 @@
+"""RemoteIndex: INDEX_MAX_ENTRIES에서 끊긴 색인을 갱신하면 덜 읽은 디렉토리를 재사용하지 않고 전부 다시 읽는지 확인
+
+    python -m pytest -q tests
+"""
+import os
+
+import pytest
+
+import main
+
+DIRS = 5
+FILES = 20
+
+
+@pytest.fixture
+def session(ssh_server):
+    for d in range(DIRS):
+        os.makedirs(os.path.join(ssh_server.root, f'dir{d}'))
+        for f in range(FILES):
+            open(os.path.join(ssh_server.root, f'dir{d}', f'file{f}'), 'w').close()
+    session = main.SFTPSession()
+    assert session.connect('127.0.0.1', 'test', 'test', ssh_server.port)
+    yield session
+    session.disconnect()
+
+
+def build(index):
+    index.refresh()
+    index._thread.join(30)
+    assert index.state == 'ready', index.error
+
+
+@pytest.mark.parametrize('method', ['find', 'sftp'])
+def test_refresh_after_truncation_reads_everything(session, ssh_server, monkeypatch, method):
+    index = main.RemoteIndex(session, ssh_server.root)
+    index.method = method if method == 'sftp' else None
+    monkeypatch.setattr(main, 'INDEX_MAX_ENTRIES', DIRS * FILES // 2)
+    build(index)
+    assert index.truncated
+    assert len(index.snapshot) < DIRS + DIRS * FILES
+
+    monkeypatch.setattr(main, 'INDEX_MAX_ENTRIES', 10 * DIRS * FILES)
+    build(index)
+    assert index.method == method
+    assert not index.truncated
+    assert len(index.snapshot) == DIRS + DIRS * FILES
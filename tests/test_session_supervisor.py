@@ -0,0 +1,69 @@
+"""SessionSupervisor: 유휴 시간 초과로 정리한 연결된 터미널은 WebSocket에 알리고 닫으며,
+세션 수 상한에서는 충분히 쉰 SFTP 세션만 정리하는지 확인
+
+    python -m pytest -q tests
+"""
+import asyncio
+import json
+import time
+import urllib.request
+
+import pytest
+import websockets
+
+import main
+
+
+@pytest.fixture
+def no_sessions(monkeypatch):
+    """다른 테스트가 남긴 세션과 섞이지 않도록 빈 세션 목록으로 교체"""
+    monkeypatch.setattr(main, 'sessions', {})
+    monkeypatch.setattr(main, 'sftp_sessions', {})
+
+
+def add_sftp_session(session_id, idle):
+    session = main.SFTPSession()
+    session.last_activity = time.monotonic() - idle
+    main.sftp_sessions[session_id] = session
+    return session
+
+
+def test_idle_attached_terminal_is_told_and_closed(no_sessions, ssh_server, app_port, monkeypatch):
+    monkeypatch.setattr(main, 'SSH_IDLE_TIMEOUT', 0.2)
+
+    async def run():
+        async with websockets.connect(f'ws://127.0.0.1:{app_port}/ws/idle') as ws:
+            await ws.send(json.dumps({
+                'type': 'connect', 'hostname': '127.0.0.1', 'username': 'test', 'password': 'test',
+                'port': ssh_server.port
+            }))
+            assert json.loads(await asyncio.wait_for(ws.recv(), 10))['success']
+            await asyncio.sleep(0.5)
+            request = urllib.request.Request(f'http://127.0.0.1:{app_port}/api/supervisor/reap', method='POST')
+            response = await asyncio.to_thread(lambda: json.load(urllib.request.urlopen(request)))
+            messages = []
+            with pytest.raises(websockets.ConnectionClosed) as closed:
+                while True:
+                    messages.append(json.loads(await asyncio.wait_for(ws.recv(), 5)))
+            return response, messages, closed.value.rcvd
+
+    response, messages, close_frame = asyncio.run(run())
+    assert [(e['session'], e['reason']) for e in response['evicted']] == [('idle', 'idle')]
+    assert {'type': 'session_evicted', 'reason': 'idle'} in messages
+    assert close_frame.code == main.SESSION_EVICTED_CLOSE_CODE
+    assert close_frame.reason == 'idle'
+    assert 'idle' not in main.sessions
+
+
+def test_admit_spares_recently_used_sftp_sessions(no_sessions, monkeypatch):
+    monkeypatch.setattr(main, 'SESSIONS_MAX', 2)
+    add_sftp_session('busy-1', idle=1)
+    add_sftp_session('busy-2', idle=main.SESSION_CAP_MIN_IDLE / 2)
+    with pytest.raises(main.SessionLimitError):
+        main.supervisor.admit()
+    assert set(main.sftp_sessions) == {'busy-1', 'busy-2'}
+
+    main.sftp_sessions.pop('busy-2')
+    add_sftp_session('stale', idle=main.SESSION_CAP_MIN_IDLE + 1)
+    main.supervisor.admit()
+    assert set(main.sftp_sessions) == {'busy-1'}